@@ -1,21 +1,64 @@
+import hmac
 import os
 import sys
+import shutil
 import logging
-import asyncio
+import tempfile
 import time
 from typing import Optional, Dict, Type, Any, List, Tuple
 
 import uvicorn
-from fastapi import Request, FastAPI, HTTPException, status
+from fastapi import Request, FastAPI, HTTPException, Response, status
 from linebot.v3.webhook import WebhookParser
 from linebot.v3.messaging import (
-    AsyncApiClient,
     AsyncMessagingApi,
     Configuration,
 )
 from linebot.v3.exceptions import InvalidSignatureError
+from linebot.v3.webhooks import MessageEvent
 
+from core.instrumented_client import LINE_API_BASE_URL, LINE_DATA_API_BASE_URL
+from core.stats import EVENT_TYPE_NAMES
 from handlers.events import AVAILABLE_HANDLERS
+from core import (
+    API_ENDPOINT_NAMES,
+    ApiRateLimiter,
+    AsyncSamplingProfiler,
+    ConnectionPool,
+    OPENMETRICS_CONTENT_TYPE,
+    EventDispatcher,
+    EventQueueFullError,
+    EventDeduplicator,
+    FlightRecorder,
+    HandlerAwareParser,
+    HistogramFamily,
+    InstrumentedApiClient,
+    KeyedExecutor,
+    LatencyHistograms,
+    OpenMetricsExporter,
+    PreserializedMessagingApi,
+    ProfilerBusyError,
+    RateLimitedMessagingApi,
+    ReplyCoalescingMessagingApi,
+    RetryingMessagingApi,
+    Span,
+    SignatureVerifier,
+    StatsStore,
+    TaskRegistry,
+    Tracer,
+    create_dedup_backend,
+    create_span_exporter,
+    event_source_key,
+    flex_templates,
+    get_gazetteer,
+    reply_cache,
+    set_request_validation,
+    start_span,
+    static_messages,
+    track_api_usage,
+    use_event,
+    use_span,
+)
 
 # ログ設定
 logging.basicConfig(level=logging.INFO)
@@ -25,8 +68,90 @@ logger = logging.getLogger(__name__)
 REQUIRED_ENV_VARS = ["CHANNEL_SECRET", "CHANNEL_ACCESS_TOKEN"]
 CRITICAL_ERROR_KEYWORDS = {"rate", "limit", "timeout", "server", "quota"}
 LARGE_EVENT_THRESHOLD = 5  # 大量イベント判定の閾値
+BATCH_LATENCY_LABEL = "batch"  # Webhook受信からバッチ内の全イベント完了までのレイテンシ
 SLOW_PROCESSING_THRESHOLD = 1.0  # 処理遅延警告の閾値（秒）
 
+# イベントキューの設定
+EVENT_QUEUE_MAX_SIZE = int(os.getenv("EVENT_QUEUE_MAX_SIZE", "1000"))  # 滞留可能なバッチ数
+EVENT_WORKER_COUNT = int(os.getenv("EVENT_WORKER_COUNT", "8"))  # ワーカー数
+EVENT_QUEUE_BACKPRESSURE = os.getenv("EVENT_QUEUE_BACKPRESSURE", "reject")  # reject / wait
+EVENT_QUEUE_PUT_TIMEOUT = float(os.getenv("EVENT_QUEUE_PUT_TIMEOUT", "1.0"))  # wait時の最大待機（秒）
+MAX_ACTIVE_SHARDS = int(os.getenv("MAX_ACTIVE_SHARDS", "256"))  # 同時に処理するチャット数の上限
+MAX_SHARD_DEPTH = int(os.getenv("MAX_SHARD_DEPTH", "100"))  # チャットごとの滞留イベント数の上限
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "10.0"))  # 終了時の処理待ち（秒）
+
+# イベント処理の期限設定
+REPLY_TOKEN_TTL = float(os.getenv("REPLY_TOKEN_TTL", "60"))  # リプライトークンの有効期間（秒）
+EVENT_DEFAULT_TIMEOUT = float(os.getenv("EVENT_DEFAULT_TIMEOUT", "30"))  # リプライトークン無しイベントの期限（秒）
+
+# 再送イベントの重複排除設定
+DEDUP_BACKEND = os.getenv("DEDUP_BACKEND", "memory")  # memory / redis
+DEDUP_TTL_SECONDS = float(os.getenv("DEDUP_TTL_SECONDS", "3600"))  # 受信済みIDの保持期間
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "50000"))  # memory時の最大保持数
+REDIS_URL = os.getenv("REDIS_URL")
+
+# 実行モードの設定（production: 複数ワーカープロセスで起動）
+RUN_MODE = os.getenv("RUN_MODE", "development")
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))  # ワーカー数
+STATS_DIR = os.getenv("STATS_DIR")  # ワーカー間で統計を共有するディレクトリ
+
+# トレースの設定（Webhook単位でサンプリングし、OTLP/JSON形式で出力）
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))  # 0.0〜1.0
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")  # none / file / otlp
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")  # file時の出力先
+OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT", "http://localhost:4318/v1/traces")  # otlp時の送信先
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "linebot-template")
+
+# 遅延・失敗イベントのフライトレコーダー設定
+FLIGHT_RECORDER_SIZE = int(os.getenv("FLIGHT_RECORDER_SIZE", "200"))  # 保持する件数
+FLIGHT_RECORDER_THRESHOLD = float(
+    os.getenv("FLIGHT_RECORDER_THRESHOLD", str(SLOW_PROCESSING_THRESHOLD))
+)  # 記録対象とする受信からの経過時間（秒）
+FLIGHT_RECORDER_DUMP = os.getenv("FLIGHT_RECORDER_DUMP")  # 終了時の出力先（{pid} を置換）
+
+# 管理用エンドポイントの設定（ADMIN_TOKEN 未設定時は無効）
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))  # プロファイルの最大時間（秒）
+
+# 送信APIのレート制限（LINEが公開しているエンドポイントごとの上限に合わせて送信を待たせる）
+API_RATE_LIMIT_ENABLED = os.getenv("API_RATE_LIMIT_ENABLED", "true").lower() == "true"
+API_RATE_LIMITS = os.getenv("API_RATE_LIMITS", "")  # 上限の上書き（例: "push=500,multicast=100"、回/秒）
+API_RATE_LIMIT_SCALE = os.getenv("API_RATE_LIMIT_SCALE")  # このプロセスの割り当て（未指定時は 1/ワーカー数）
+API_RATE_LIMIT_RETRIES = int(os.getenv("API_RATE_LIMIT_RETRIES", "2"))  # 429 の再送回数
+
+# 送信の再送設定（一時的なエラーの再送と、リプライトークンが使えない場合のプッシュ送信）
+DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "3"))  # 初回を含む最大試行回数
+DELIVERY_RETRY_BASE_DELAY = float(os.getenv("DELIVERY_RETRY_BASE_DELAY", "0.2"))  # バックオフの基準（秒）
+DELIVERY_RETRY_MAX_DELAY = float(os.getenv("DELIVERY_RETRY_MAX_DELAY", "5"))  # バックオフの上限（秒）
+DELIVERY_PUSH_FALLBACK = os.getenv("DELIVERY_PUSH_FALLBACK", "true").lower() == "true"
+# 1イベント内の返信をまとめて1回のリプライで送る（5件を超えた分はプッシュ）
+REPLY_COALESCING_ENABLED = os.getenv("REPLY_COALESCING_ENABLED", "true").lower() == "true"
+# 送信リクエストをSDKのモデルで検証してから送る（false: シリアライズ済みのJSONを直接送信）
+OUTBOUND_VALIDATION = (
+    os.getenv("OUTBOUND_VALIDATION", "false" if RUN_MODE == "production" else "true").lower() == "true"
+)
+# 入力だけで内容が決まる返信（スタンプ・ファイル・位置情報）の描画結果のキャッシュ
+REPLY_CACHE_ENABLED = os.getenv("REPLY_CACHE_ENABLED", "true").lower() == "true"
+REPLY_CACHE_MAX_ENTRIES = int(os.getenv("REPLY_CACHE_MAX_ENTRIES", "1024"))
+REPLY_CACHE_MAX_BYTES = int(os.getenv("REPLY_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+REPLY_CACHE_TTL = float(os.getenv("REPLY_CACHE_TTL", "3600"))  # 秒
+
+# 送信先ホストの上書き（未設定時は api.line.me / api-data.line.me、ローカルのモックサーバー等で使用）
+LINE_API_HOST = os.getenv("LINE_API_HOST")
+LINE_DATA_API_HOST = os.getenv("LINE_DATA_API_HOST", LINE_API_HOST)
+
+# 送信APIの接続プール設定
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))  # 同時接続数の上限
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "0"))  # ホストごとの上限（0: 無制限）
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))  # 未使用接続の保持時間（秒）
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))  # DNSキャッシュの保持時間（秒）
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))  # 接続のタイムアウト（秒）
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))  # 読み込みのタイムアウト（秒）
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "60"))  # リクエスト全体のタイムアウト（秒）
+
+# Webhookのパースモード（lazy: ハンドラー登録済みのイベントのみモデル化 / full: SDKで全件パース）
+WEBHOOK_PARSER_MODE = os.getenv("WEBHOOK_PARSER_MODE", "lazy")
+
 
 def validate_environment() -> Tuple[str, str]:
     """起動時に必要な環境変数をチェック"""
@@ -45,9 +170,104 @@ channel_secret, channel_access_token = validate_environment()
 
 # LINE Bot API の初期化
 configuration = Configuration(access_token=channel_access_token)
-async_api_client = AsyncApiClient(configuration)
+api_host_overrides = {
+    LINE_API_BASE_URL: LINE_API_HOST,
+    LINE_DATA_API_BASE_URL: LINE_DATA_API_HOST,
+}
+
+
+def _create_connection_pool(name: str, limit: int) -> ConnectionPool:
+    return ConnectionPool(
+        name,
+        limit=limit,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        connect_timeout=HTTP_CONNECT_TIMEOUT,
+        read_timeout=HTTP_READ_TIMEOUT,
+        total_timeout=HTTP_TOTAL_TIMEOUT,
+    )
+
+
+# コンテンツ取得（blob API）を使うハンドラーを追加する場合は、メッセージ送信と接続を
+# 奪い合わないように別のプールを作成して connection_pools に加える
+messaging_pool = _create_connection_pool("messaging", HTTP_POOL_LIMIT)
+connection_pools = {messaging_pool.name: messaging_pool}
+
+async_api_client = InstrumentedApiClient(
+    configuration, host_overrides=api_host_overrides, connection_pool=messaging_pool
+)
+
+
+def _parse_rate_limits(spec: str) -> Dict[str, float]:
+    """"push=500,multicast=100" 形式の文字列をエンドポイントごとの上限に変換"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        endpoint, _, limit = item.partition("=")
+        limits[endpoint.strip()] = float(limit)
+    return limits
+
+
+# 複数ワーカーではチャネルの上限をワーカー数で分け合う
+api_rate_limiter = ApiRateLimiter(
+    _parse_rate_limits(API_RATE_LIMITS),
+    scale=(
+        float(API_RATE_LIMIT_SCALE)
+        if API_RATE_LIMIT_SCALE
+        else (1 / WEB_CONCURRENCY if RUN_MODE == "production" else 1.0)
+    ),
+    max_rate_limited_retries=API_RATE_LIMIT_RETRIES,
+)
 line_bot_api = AsyncMessagingApi(async_api_client)
-parser = WebhookParser(channel_secret)
+# 送信APIはSDKによる検証・再シリアライズを省き、生成済みのJSONをそのまま送る（開発時は検証する）
+line_bot_api = PreserializedMessagingApi(line_bot_api, validate=OUTBOUND_VALIDATION)
+# ハンドラーが生成する送信リクエストも、検証無効時はモデルの検証を省く
+set_request_validation(OUTBOUND_VALIDATION)
+outbound_api = line_bot_api
+if API_RATE_LIMIT_ENABLED:
+    line_bot_api = RateLimitedMessagingApi(line_bot_api, api_rate_limiter)
+# 再送はレート制限の外側で行い、再送分もレート制限の対象にする
+delivery_api = RetryingMessagingApi(
+    line_bot_api,
+    max_attempts=DELIVERY_MAX_ATTEMPTS,
+    base_delay=DELIVERY_RETRY_BASE_DELAY,
+    max_delay=DELIVERY_RETRY_MAX_DELAY,
+    push_fallback=DELIVERY_PUSH_FALLBACK,
+    reply_token_ttl=REPLY_TOKEN_TTL,
+)
+# ハンドラーの返信はイベントの処理終了時にまとめて送信（送信時に再送・フォールバックを適用）
+line_bot_api = ReplyCoalescingMessagingApi(delivery_api, enabled=REPLY_COALESCING_ENABLED)
+reply_cache.configure(
+    max_entries=REPLY_CACHE_MAX_ENTRIES,
+    max_bytes=REPLY_CACHE_MAX_BYTES,
+    ttl=REPLY_CACHE_TTL,
+    enabled=REPLY_CACHE_ENABLED,
+)
+# 署名はSignatureVerifierで生のbytesに対して検証済みのため、パーサーでは再検証しない
+signature_verifier = SignatureVerifier(channel_secret)
+parser = WebhookParser(channel_secret, skip_signature_verification=lambda: True)
+
+# 処理段階ごとのトレース
+tracer = Tracer(
+    service_name=TRACE_SERVICE_NAME,
+    sample_rate=TRACE_SAMPLE_RATE,
+    exporter=create_span_exporter(TRACE_EXPORTER, TRACE_FILE, OTLP_ENDPOINT),
+)
+
+# 遅延・失敗したイベントの直近の記録
+flight_recorder = FlightRecorder(
+    capacity=FLIGHT_RECORDER_SIZE, slow_threshold=FLIGHT_RECORDER_THRESHOLD
+)
+
+# 稼働中のプロセスを対象とするサンプリングプロファイラー
+profiler = AsyncSamplingProfiler(max_duration=PROFILE_MAX_SECONDS)
+
+# 再送イベントの重複排除インデックス
+event_deduplicator = EventDeduplicator(
+    create_dedup_backend(
+        DEDUP_BACKEND, DEDUP_TTL_SECONDS, DEDUP_MAX_ENTRIES, redis_url=REDIS_URL
+    )
+)
 
 # FastAPI アプリケーションの初期化
 app = FastAPI(
@@ -89,18 +309,106 @@ def register_all_event_handlers():
 # 起動時にハンドラーを登録
 register_all_event_handlers()
 
-# アプリケーションの統計情報を保持
-event_stats = {
-    "total_requests": 0,
-    "successful_requests": 0,
-    "failed_requests": 0,
-    "total_events": 0,
-    "processed_events": 0,
-    "failed_events": 0,
-    "processing_times": [],
-    "event_type_counts": {},
-    "last_event_time": None,
+# 登録済みハンドラーを元に遅延パーサーを初期化
+lazy_parser = HandlerAwareParser(event_handlers.keys())
+
+# アプリケーションの統計情報を保持（STATS_DIR 指定時は全ワーカーで集計）
+event_stats = StatsStore(STATS_DIR)
+
+# レイテンシ計測用のハンドラーラベル
+handler_labels = {
+    event_type: handler_func.__qualname__
+    for event_type, handler_func in event_handlers.items()
 }
+# MessageEvent はメッセージタイプ別のハンドラー単位でも計測
+message_handler_labels = {
+    content_type: f"{type(handler).__name__}.handle"
+    for content_type, handler in getattr(
+        getattr(event_handlers.get(MessageEvent), "__self__", None), "handlers", {}
+    ).items()
+}
+
+# 送信APIのエンドポイントごとのレイテンシラベル
+api_latency_labels = {endpoint: f"api:{endpoint}" for endpoint in API_ENDPOINT_NAMES}
+# レート制限による送信前の待機時間のラベル
+rate_limit_wait_labels = {endpoint: f"ratelimit:{endpoint}" for endpoint in API_ENDPOINT_NAMES}
+
+# バッチ・イベントタイプ・ハンドラー・送信APIごとのレイテンシヒストグラム
+latency_histograms = LatencyHistograms(
+    [
+        BATCH_LATENCY_LABEL,
+        *EVENT_TYPE_NAMES,
+        *handler_labels.values(),
+        *message_handler_labels.values(),
+        *api_latency_labels.values(),
+        *rate_limit_wait_labels.values(),
+    ],
+    STATS_DIR,
+)
+
+
+def _record_api_call(endpoint: str, outcome: str, elapsed: float) -> None:
+    """送信APIの呼び出し結果とレイテンシを記録"""
+    event_stats.incr_labeled("api_call", f"{endpoint}:{outcome}")
+    latency_histograms.record(api_latency_labels[endpoint], elapsed)
+
+
+def _record_rate_limit_wait(endpoint: str, waited: float) -> None:
+    """レート制限による待機時間を記録"""
+    latency_histograms.record(rate_limit_wait_labels[endpoint], waited)
+
+
+async_api_client.on_request = _record_api_call
+api_rate_limiter.on_wait = _record_rate_limit_wait
+
+
+def _record_delivery(endpoint: str, outcome: str) -> None:
+    """送信の再送・フォールバック・最終的な失敗を記録"""
+    event_stats.incr_labeled("delivery", f"{endpoint}:{outcome}")
+
+
+delivery_api.on_outcome = _record_delivery
+
+# /metrics の出力定義（系列と出力行は起動時に確定）
+metrics_exporter = OpenMetricsExporter(
+    event_stats,
+    latency_histograms,
+    [
+        HistogramFamily(
+            "webhook_batch_latency_seconds",
+            "Time from webhook receipt until every event in the batch finished",
+            None,
+            {BATCH_LATENCY_LABEL: BATCH_LATENCY_LABEL},
+        ),
+        HistogramFamily(
+            "event_latency_seconds",
+            "Event handler latency by event type",
+            "type",
+            {name: name for name in EVENT_TYPE_NAMES},
+        ),
+        HistogramFamily(
+            "handler_latency_seconds",
+            "Event handler latency by handler",
+            "handler",
+            {
+                label: label
+                for label in [*handler_labels.values(), *message_handler_labels.values()]
+            },
+        ),
+        HistogramFamily(
+            "api_request_latency_seconds",
+            "Outbound LINE API request latency by endpoint",
+            "endpoint",
+            {label: endpoint for endpoint, label in api_latency_labels.items()},
+        ),
+        HistogramFamily(
+            "api_rate_limit_wait_seconds",
+            "Time outbound LINE API requests waited for the rate limiter by endpoint",
+            "endpoint",
+            {label: endpoint for endpoint, label in rate_limit_wait_labels.items()},
+        ),
+    ],
+)
 
 
 @app.on_event("startup")
@@ -116,10 +424,19 @@ async def startup_event():
     logger.info("=" * 60)
     logger.info(f"Handler Modules: {handler_count}")
     logger.info(f"Registered Event Types: {registered_events}")
-    logger.info(f"Parser: {parser.__class__.__name__}")
+    logger.info(f"Parser: {parser.__class__.__name__} (mode: {WEBHOOK_PARSER_MODE})")
     logger.info(f"API: {line_bot_api.__class__.__name__}")
     logger.info("=" * 60)
 
+    if event_stats.multi_process:
+        logger.info(f"Worker PID: {os.getpid()} (stats: {STATS_DIR})")
+        if DEDUP_BACKEND == "memory":
+            logger.warning("DEDUP_BACKEND=memory does not share dedup state between workers")
+
+    # イベント処理ワーカー・トレースの出力を起動
+    await event_dispatcher.start()
+    await tracer.start()
+
     # デバッグモードで詳細情報を出力
     for event_type in event_handlers.keys():
         logger.debug(f"{event_type.__name__} handler registered")
@@ -129,14 +446,29 @@ async def startup_event():
 async def shutdown_event():
     """アプリケーション終了時のクリーンアップ処理"""
     try:
-        # APIクライアントを適切に閉じる
+        # 処理中・滞留中のイベントを処理し終えてからAPIクライアントを閉じる
+        await event_dispatcher.drain(SHUTDOWN_DRAIN_TIMEOUT)
+        await keyed_executor.drain(SHUTDOWN_DRAIN_TIMEOUT)
+        await task_registry.cancel_all()
         await async_api_client.close()
+        await event_deduplicator.close()
+        await tracer.shutdown()
 
-        # 統計情報の計算
-        total_requests = event_stats["total_requests"]
-        total_events = event_stats["total_events"]
+        # フライトレコーダーの内容を書き出し
+        if FLIGHT_RECORDER_DUMP:
+            dump_path = FLIGHT_RECORDER_DUMP.format(pid=os.getpid())
+            try:
+                dumped = flight_recorder.dump(dump_path)
+                logger.info(f"Flight recorder dumped: {dumped} entries -> {dump_path}")
+            except OSError as e:
+                logger.error(f"Flight recorder dump failed: {e}")
+
+        # 統計情報の計算（このワーカーの分）
+        worker_stats = event_stats.snapshot()
+        total_requests = worker_stats["total_requests"]
+        total_events = worker_stats["total_events"]
         success_rate = (
-            (event_stats["processed_events"] / total_events * 100)
+            (worker_stats["processed_events"] / total_events * 100)
             if total_events > 0
             else 0
         )
@@ -150,11 +482,14 @@ async def shutdown_event():
         logger.info(f"Success Rate: {success_rate:.1f}%")
 
         # イベントタイプ別の統計を出力
-        if event_stats["event_type_counts"]:
+        if worker_stats["event_type_counts"]:
             logger.info("📋Event Type Statistics:")
-            for event_type, count in event_stats["event_type_counts"].items():
+            for event_type, count in worker_stats["event_type_counts"].items():
                 logger.info(f"   • {event_type}: {count:,}")
 
+        event_stats.close()
+        latency_histograms.close()
+
         logger.info("=" * 60)
         logger.info("Server stopped successfully")
 
@@ -167,17 +502,21 @@ async def health_check():
     """基本的なヘルスチェック"""
     handler_names = [module.__name__.split(".")[-1] for module in AVAILABLE_HANDLERS]
 
+    # 全ワーカーの統計を集計
+    cluster = event_stats.aggregate()
+    totals = cluster["totals"]
+
     # 平均処理時間を計算
     avg_processing_time = (
-        sum(event_stats["processing_times"]) / len(event_stats["processing_times"])
-        if event_stats["processing_times"]
+        totals["processing_time_total_us"] / totals["processing_time_count"] / 1_000_000
+        if totals["processing_time_count"]
         else 0
     )
 
     # 成功率を計算
     success_rate = (
-        (event_stats["processed_events"] / event_stats["total_events"] * 100)
-        if event_stats["total_events"] > 0
+        (totals["processed_events"] / totals["total_events"] * 100)
+        if totals["total_events"] > 0
         else 100
     )
 
@@ -188,17 +527,40 @@ async def health_check():
         "registered_event_types": len(event_handlers),
         "handler_modules": handler_names,
         "stats": {
-            "total_requests": event_stats["total_requests"],
-            "successful_requests": event_stats["successful_requests"],
-            "failed_requests": event_stats["failed_requests"],
-            "total_events": event_stats["total_events"],
-            "processed_events": event_stats["processed_events"],
-            "failed_events": event_stats["failed_events"],
+            "total_requests": totals["total_requests"],
+            "successful_requests": totals["successful_requests"],
+            "failed_requests": totals["failed_requests"],
+            "total_events": totals["total_events"],
+            "processed_events": totals["processed_events"],
+            "failed_events": totals["failed_events"],
             "success_rate_percent": round(success_rate, 2),
             "avg_processing_time_ms": round(avg_processing_time * 1000, 2),
+            "latency_ms": latency_histograms.summary([BATCH_LATENCY_LABEL]).get(
+                BATCH_LATENCY_LABEL, {}
+            ),
+            "queue_depth": event_dispatcher.depth,
+            "active_shards": keyed_executor.stats["active_shards"],
+            "in_flight_events": task_registry.in_flight,
+            "event_timeouts": sum(task_registry.timeouts.values()),
+            "api_connections": {name: pool.get_usage() for name, pool in connection_pools.items()},
         },
         "uptime": {
-            "last_event_time": event_stats["last_event_time"],
+            "last_event_time": totals["last_event_time"],
+        },
+        "workers": {
+            "worker_pid": os.getpid(),
+            "worker_count": cluster["worker_count"],
+            "alive_workers": cluster["alive_workers"],
+            "per_worker": [
+                {
+                    "pid": worker["pid"],
+                    "alive": worker["alive"],
+                    "total_requests": worker["total_requests"],
+                    "total_events": worker["total_events"],
+                    "failed_events": worker["failed_events"],
+                }
+                for worker in cluster["workers"]
+            ],
         },
         "message": "OK",
     }
@@ -220,12 +582,18 @@ async def health_check_detail():
             }
         )
 
+    # 全ワーカーの統計を集計
+    cluster = event_stats.aggregate()
+    event_type_counts = cluster["totals"]["event_type_counts"]
+    merged_values = event_stats.merged_values()
+
     # 登録済みイベントの詳細情報を収集
     registered_events = {}
     for event_type, handler_func in event_handlers.items():
         registered_events[event_type.__name__] = {
             "handler_function": handler_func.__name__,
-            "event_count": event_stats["event_type_counts"].get(event_type.__name__, 0),
+            "event_count": event_type_counts.get(event_type.__name__, 0),
+            "timeouts": task_registry.timeouts.get(handler_func.__qualname__, 0),
         }
 
     return {
@@ -235,146 +603,400 @@ async def health_check_detail():
             "total_handler_modules": len(AVAILABLE_HANDLERS),
             "registered_event_types": len(event_handlers),
             "parser_class": parser.__class__.__name__,
+            "parser_mode": WEBHOOK_PARSER_MODE,
             "api_class": line_bot_api.__class__.__name__,
             "channel_secret_configured": bool(channel_secret),
             "channel_access_token_configured": bool(channel_access_token),
+            "run_mode": RUN_MODE,
+            "worker_pid": os.getpid(),
         },
         "handler_details": handler_details,
         "registered_events": registered_events,
-        "detailed_stats": {
-            **event_stats,
-            "processing_times_sample": event_stats["processing_times"][
-                -10:
-            ],  # 最新10件
-        },
+        "event_queue": event_dispatcher.get_stats(),
+        "event_shards": keyed_executor.get_stats(),
+        "event_tasks": task_registry.get_stats(),
+        "dedup": event_deduplicator.get_stats(),
+        "signature_verification": signature_verifier.get_stats(),
+        "parser": lazy_parser.get_stats(),
+        "tracing": tracer.get_stats(),
+        "profiler": profiler.get_stats(),
+        "flight_recorder": flight_recorder.get_stats(),
+        "rate_limiter": api_rate_limiter.get_stats(),
+        "delivery": delivery_api.get_stats(),
+        "reply_coalescing": line_bot_api.get_stats(),
+        "outbound_serialization": outbound_api.get_stats(),
+        "static_messages": static_messages.get_stats(),
+        "flex_templates": flex_templates.get_stats(),
+        "reply_cache": reply_cache.get_stats(),
+        "gazetteer": get_gazetteer().get_stats(),
+        "connection_pools": {name: pool.get_stats() for name, pool in connection_pools.items()},
+        "detailed_stats": cluster["totals"],
+        "error_classes": event_stats.labeled_counts("error_class", merged_values),
+        "api_calls": event_stats.labeled_counts("api_call", merged_values),
+        "latency_ms": latency_histograms.summary(),
+        "workers": cluster["workers"],
         "message": "Detailed health check completed",
     }
 
 
+def _require_admin(request: Request) -> None:
+    """管理用エンドポイントの認証（Authorization: Bearer <ADMIN_TOKEN>）"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    authorization = request.headers.get("Authorization", "")
+    token = authorization[7:] if authorization.startswith("Bearer ") else ""
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+
+@app.post("/health/profile")
+async def health_profile(
+    request: Request, seconds: float = 10.0, interval_ms: float = 5.0, mode: str = "cpu"
+):
+    """稼働中のワーカーを指定秒数プロファイルし、collapsed stack 形式で返す（要認証）"""
+    _require_admin(request)
+
+    try:
+        counts, summary = await profiler.profile(seconds, interval_ms / 1000, mode)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return Response(
+        content=profiler.to_collapsed(counts),
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{os.getpid()}-{mode}.collapsed"',
+            "X-Profile-Worker-Pid": str(os.getpid()),
+            "X-Profile-Samples": str(summary["samples"]),
+            "X-Profile-Duration": str(summary["duration"]),
+            "X-Profile-Overhead-Percent": str(summary["overhead_percent"]),
+        },
+    )
+
+
+@app.get("/health/flight-recorder")
+async def health_flight_recorder(limit: int = 50):
+    """遅延・失敗したイベントの直近の記録（このワーカー分、新しい順）"""
+    return {
+        "worker_pid": os.getpid(),
+        "recorder": flight_recorder.get_stats(),
+        "entries": flight_recorder.entries(max(0, limit)),
+    }
+
+
 @app.get("/health/events")
 async def health_check_events():
     """イベント処理に関する統計情報"""
+    cluster = event_stats.aggregate()
+    totals = cluster["totals"]
+
     return {
-        "event_statistics": event_stats["event_type_counts"],
-        "total_events": event_stats["total_events"],
+        "event_statistics": totals["event_type_counts"],
+        "event_latency_ms": latency_histograms.summary(EVENT_TYPE_NAMES),
+        "total_events": totals["total_events"],
         "registered_event_types": [
             event_type.__name__ for event_type in event_handlers.keys()
         ],
-        "last_event_time": event_stats["last_event_time"],
+        "unhandled_event_types": lazy_parser.unhandled_counts,
+        "timeouts_by_handler": task_registry.timeouts,
+        "last_event_time": totals["last_event_time"],
+        "workers": [
+            {
+                "pid": worker["pid"],
+                "alive": worker["alive"],
+                "total_events": worker["total_events"],
+                "event_statistics": worker["event_type_counts"],
+            }
+            for worker in cluster["workers"]
+        ],
     }
 
 
+def _connection_pool_gauges() -> Dict[str, Tuple[str, float]]:
+    """接続プールごとの使用中・待機中の接続数と空き待ちのリクエスト数"""
+    gauges = {}
+    for name, pool in connection_pools.items():
+        stats = pool.get_usage()
+        gauges[f"api_pool_{name}_connections_in_use"] = (
+            f"Connections in use in the {name} API pool", stats["in_use"]
+        )
+        gauges[f"api_pool_{name}_connections_idle"] = (
+            f"Idle keep-alive connections in the {name} API pool", stats["idle"]
+        )
+        gauges[f"api_pool_{name}_waiters"] = (
+            f"Requests waiting for a connection in the {name} API pool", stats["waiters"]
+        )
+    return gauges
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus / OpenMetrics 形式のメトリクス（カウンタ・ヒストグラムは全ワーカー分を合算）"""
+    content = metrics_exporter.render(
+        {
+            "event_queue_depth": ("Batches waiting in this worker's event queue", event_dispatcher.depth),
+            "active_shards": ("Chats being processed by this worker", keyed_executor.stats["active_shards"]),
+            "in_flight_events": ("Event handlers running in this worker", task_registry.in_flight),
+            **_connection_pool_gauges(),
+        }
+    )
+    return Response(content=content, media_type=OPENMETRICS_CONTENT_TYPE)
+
+
 @app.post("/callback")
 async def webhook_callback(request: Request):
     """LINE からの Webhook を受信・処理するエンドポイント"""
     signature = request.headers.get("X-Line-Signature")
     body = await request.body()
-    body_str = body.decode("utf-8")
 
     # リクエスト統計を更新
-    event_stats["total_requests"] += 1
+    event_stats.incr("total_requests")
     start_time = time.time()
 
-    try:
-        # Webhook の署名を検証してイベントをパース
-        events = parser.parse(body_str, signature)
+    # サンプリング対象のリクエストのみルートスパンを開始
+    root_span = tracer.start_trace(
+        "POST /callback", **{"http.route": "/callback", "http.request.body.size": len(body)}
+    )
 
-        if events:
-            # イベントがある場合はバックグラウンドで処理
-            asyncio.create_task(_handle_events_background(events, start_time))
-            event_stats["last_event_time"] = time.strftime("%Y-%m-%d %H:%M:%S")
-        else:
-            # イベントがない場合も成功とカウント
-            event_stats["successful_requests"] += 1
-
-        # LINEへの即座のレスポンス
-        return {"message": "ok"}
-
-    except InvalidSignatureError:
-        # 署名検証エラー（設定ミスの可能性が高い）
-        event_stats["failed_requests"] += 1
-        logger.warning("Signature verification failed: Check CHANNEL_SECRET")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid signature"
-        )
-    except Exception as e:
-        # その他の予期しないエラー
-        event_stats["failed_requests"] += 1
-        logger.error(f"Webhook parsing error: {type(e).__name__}: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal server error",
-        )
+    with use_span(root_span, end=True):
+        try:
+            # デコードやJSON解析の前に生のbytesで署名を検証
+            with start_span("webhook.verify_signature"):
+                if not signature_verifier.verify(body, signature):
+                    raise InvalidSignatureError(f"Invalid signature. signature={signature}")
+
+            # 検証済みのbytesをそのままパース
+            with start_span("webhook.parse", parser_mode=WEBHOOK_PARSER_MODE) as span:
+                if WEBHOOK_PARSER_MODE == "lazy":
+                    events = lazy_parser.parse(body)
+                else:
+                    events = parser.parse(body, signature)
+                if span is not None:
+                    span.set_attribute("event_count", len(events))
+
+            # 再送などで受信済みのイベントを除外
+            with start_span("webhook.dedup"):
+                events = await event_deduplicator.filter_events(events)
+
+            if events:
+                # イベントがある場合はキューに投入してワーカーで処理
+                # （キュー待機スパンはワーカーが取り出した時点で終了）
+                queue_span = root_span.child("event_queue.wait") if root_span else None
+                request_info = {"body_size": len(body), "queue_span": queue_span}
+                try:
+                    await event_dispatcher.submit(events, start_time, request_info)
+                except EventQueueFullError as e:
+                    if queue_span is not None:
+                        queue_span.record_error(e)
+                        queue_span.end()
+                    # 受け付けられなかったイベントは再送時に処理できるようにする
+                    await event_deduplicator.forget(events)
+                    raise
+                event_stats.set("last_event_timestamp", int(time.time()))
+            else:
+                # イベントがない場合も成功とカウント
+                event_stats.incr("successful_requests")
+
+            # LINEへの即座のレスポンス
+            return {"message": "ok"}
+
+        except EventQueueFullError as e:
+            # キューが満杯（LINE側の再送に任せる）
+            event_stats.incr("failed_requests")
+            logger.warning(f"Event queue rejected request: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Server busy"
+            )
+        except InvalidSignatureError:
+            # 署名検証エラー（設定ミスの可能性が高い）
+            event_stats.incr("failed_requests")
+            logger.warning("Signature verification failed: Check CHANNEL_SECRET")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid signature"
+            )
+        except Exception as e:
+            # その他の予期しないエラー
+            event_stats.incr("failed_requests")
+            logger.error(f"Webhook parsing error: {type(e).__name__}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error",
+            )
 
 
-async def _handle_events_background(events: List[Any], start_time: float) -> None:
-    """受信したイベントをバックグラウンドで並列処理"""
+async def _handle_events_background(
+    events: List[Any], start_time: float, request_info: Dict[str, Any]
+) -> None:
+    """受信したイベントを送信元ごとのシャードに振り分けて処理"""
+    dequeued_at = time.time()
+    queue_span: Optional[Span] = request_info["queue_span"]
+    if queue_span is not None:
+        queue_span.end()
+
     event_count = len(events)
-    event_stats["total_events"] += event_count
+    event_stats.incr("total_events", event_count)
 
     # イベントタイプ別の統計を更新
     for event in events:
-        event_type_name = type(event).__name__
-        event_stats["event_type_counts"][event_type_name] = (
-            event_stats["event_type_counts"].get(event_type_name, 0) + 1
-        )
+        event_stats.incr_event_type(type(event).__name__)
 
     # 大量イベントの場合はログ出力
     if event_count > LARGE_EVENT_THRESHOLD:
         logger.info(f"Processing large event batch: {event_count} events")
 
+    batch = {
+        "start_time": start_time,
+        "event_count": event_count,
+        "pending": event_count,
+        "error_count": 0,
+        "trace_span": queue_span.parent if queue_span is not None else None,
+        "body_size": request_info["body_size"],
+        "dequeued_at": dequeued_at,
+    }
+
+    submitted_count = 0
     try:
-        # 全イベントを並列で処理
-        tasks = [_handle_single_event(event) for event in events]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # 結果を集計
-        error_count = sum(1 for result in results if isinstance(result, Exception))
-        success_count = event_count - error_count
-
-        # 統計を更新
-        event_stats["processed_events"] += success_count
-        event_stats["failed_events"] += error_count
-        event_stats["successful_requests"] += 1
-
-        # エラーがあった場合の詳細ログ
-        if error_count > 0:
-            logger.warning(
-                f"Processing completed - Success: {success_count}, Errors: {error_count}"
-            )
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    event_type = type(events[i]).__name__
-                    logger.error(
-                        f"   • {event_type} error: {type(result).__name__}: {result}"
-                    )
-        elif event_count > 1:
-            # 複数イベントが全て成功した場合
-            logger.info(f"All events processed successfully: {success_count}")
-
-        # 処理時間の記録と分析
-        processing_time = time.time() - start_time
-        event_stats["processing_times"].append(processing_time)
-
-        # 処理時間履歴を100件に制限
-        if len(event_stats["processing_times"]) > 100:
-            event_stats["processing_times"] = event_stats["processing_times"][-100:]
-
-        # パフォーマンス監視
-        if processing_time > SLOW_PROCESSING_THRESHOLD:
-            logger.warning(
-                f"Slow processing detected: {processing_time:.2f}s ({event_count} events)"
+        # 送信元ごとのシャードに振り分け（同一チャットは順番に、チャット間は並列で処理）
+        for event in events:
+            await keyed_executor.submit(
+                event_source_key(event), _handle_batched_event, event, batch, time.perf_counter()
             )
-        elif event_count > 3:
-            logger.info(f"⚡ Events processed: {event_count} in {processing_time:.3f}s")
+            submitted_count += 1
 
     except Exception as e:
-        # バックグラウンド処理全体でエラーが発生
-        event_stats["failed_requests"] += 1
-        event_stats["failed_events"] += event_count
+        # 振り分けられなかったイベントは失敗として計上
+        event_stats.incr("failed_requests")
+        event_stats.incr("failed_events", event_count - submitted_count)
         logger.error(f"Background processing error: {type(e).__name__}: {e}")
 
 
+async def _handle_batched_event(
+    event: Any, batch: Dict[str, Any], submitted_at: float
+) -> None:
+    """シャード上で個々のイベントを処理し、イベント単位で統計を更新"""
+    # シャードのタスク上でもリクエストのトレースを引き継ぐ
+    parent_span = batch["trace_span"]
+    event_span = (
+        parent_span.child("event.process", event_type=type(event).__name__)
+        if parent_span is not None
+        else None
+    )
+    started_at = time.perf_counter()
+    error = None
+
+    with track_api_usage() as api_usage:
+        try:
+            with use_span(event_span, end=True):
+                await _handle_single_event(event)
+            event_stats.incr("processed_events")
+        except Exception as e:
+            error = e
+            batch["error_count"] += 1
+            event_stats.incr("failed_events")
+            logger.error(f"   • {type(event).__name__} error: {type(e).__name__}: {e}")
+        finally:
+            # 遅延・失敗したイベントはフライトレコーダーに記録
+            total_time = time.time() - batch["start_time"]
+            if flight_recorder.should_record(total_time, error is not None):
+                _record_flight(event, batch, submitted_at, started_at, api_usage, error, total_time)
+
+            batch["pending"] -= 1
+            if batch["pending"] == 0:
+                _finish_batch(batch)
+
+
+def _record_flight(
+    event: Any,
+    batch: Dict[str, Any],
+    submitted_at: float,
+    started_at: float,
+    api_usage: Any,
+    error: Optional[Exception],
+    total_time: float,
+) -> None:
+    """イベント1件分の処理段階ごとの所要時間をフライトレコーダーに記録"""
+    finished_at = time.perf_counter()
+    event_type = type(event)
+    handler = handler_labels.get(event_type)
+    if event_type is MessageEvent:
+        handler = message_handler_labels.get(type(event.message), handler)
+
+    trace_span = batch["trace_span"]
+    delivery_context = getattr(event, "delivery_context", None)
+    flight_recorder.record(
+        event,
+        handler,
+        {
+            "dispatch": batch["dequeued_at"] - batch["start_time"],
+            "shard_wait": started_at - submitted_at,
+            "handler": finished_at - started_at,
+            "api": api_usage.seconds,
+            "total": total_time,
+        },
+        error,
+        api_calls=api_usage.calls,
+        payload_bytes=batch["body_size"],
+        batch_events=batch["event_count"],
+        redelivery=getattr(delivery_context, "is_redelivery", None),
+        trace_id=trace_span.trace.trace_id_hex if trace_span is not None else None,
+    )
+
+
+def _finish_batch(batch: Dict[str, Any]) -> None:
+    """バッチ内の全イベントの処理完了時に結果を集計"""
+    event_count = batch["event_count"]
+    error_count = batch["error_count"]
+    success_count = event_count - error_count
+
+    event_stats.incr("successful_requests")
+
+    # エラーがあった場合の詳細ログ
+    if error_count > 0:
+        logger.warning(
+            f"Processing completed - Success: {success_count}, Errors: {error_count}"
+        )
+    elif event_count > 1:
+        # 複数イベントが全て成功した場合
+        logger.info(f"All events processed successfully: {success_count}")
+
+    # 処理時間の記録と分析
+    processing_time = time.time() - batch["start_time"]
+    event_stats.incr("processing_time_total_us", int(processing_time * 1_000_000))
+    event_stats.incr("processing_time_count")
+    latency_histograms.record(BATCH_LATENCY_LABEL, processing_time)
+
+    # パフォーマンス監視
+    if processing_time > SLOW_PROCESSING_THRESHOLD:
+        logger.warning(
+            f"Slow processing detected: {processing_time:.2f}s ({event_count} events)"
+        )
+        # サンプリング対象であれば処理段階ごとの内訳も出力
+        if batch["trace_span"] is not None:
+            trace = batch["trace_span"].trace
+            logger.warning(f"   trace_id={trace.trace_id_hex} breakdown_ms={trace.breakdown()}")
+    elif event_count > 3:
+        logger.info(f"⚡ Events processed: {event_count} in {processing_time:.3f}s")
+
+
+# 処理中タスクの管理、チャット単位の順序保証付き実行器、イベントキューの初期化
+task_registry = TaskRegistry(
+    reply_token_ttl=REPLY_TOKEN_TTL, default_timeout=EVENT_DEFAULT_TIMEOUT
+)
+keyed_executor = KeyedExecutor(
+    max_active_shards=MAX_ACTIVE_SHARDS, max_shard_depth=MAX_SHARD_DEPTH
+)
+event_dispatcher = EventDispatcher(
+    _handle_events_background,
+    max_size=EVENT_QUEUE_MAX_SIZE,
+    worker_count=EVENT_WORKER_COUNT,
+    backpressure=EVENT_QUEUE_BACKPRESSURE,
+    put_timeout=EVENT_QUEUE_PUT_TIMEOUT,
+)
+
+
 async def _handle_single_event(event: Any) -> None:
     """個々のイベントを適切なハンドラーで処理"""
     try:
@@ -384,7 +1006,30 @@ async def _handle_single_event(event: Any) -> None:
         # 対応するハンドラーが存在するかチェック
         if event_type in event_handlers:
             handler_func = event_handlers[event_type]
-            await handler_func(event)
+            handler_label = handler_labels[event_type]
+            start_time = time.perf_counter()
+            try:
+                # リプライトークンの有効期間を期限として実行
+                with use_event(event), line_bot_api.buffer(event) as reply_buffer:
+                    try:
+                        with start_span(handler_label, **{"linebot.handler": handler_label}):
+                            await task_registry.run(
+                                handler_func(event),
+                                label=handler_label,
+                                timeout=task_registry.deadline_for(event),
+                            )
+                    finally:
+                        # ハンドラーが失敗しても、それまでに溜めた返信は送る
+                        await line_bot_api.flush(reply_buffer)
+            finally:
+                # イベントタイプ・ハンドラーごとのレイテンシを記録
+                elapsed = time.perf_counter() - start_time
+                latency_histograms.record(event_type_name, elapsed)
+                latency_histograms.record(handler_label, elapsed)
+                if event_type is MessageEvent:
+                    message_label = message_handler_labels.get(type(event.message))
+                    if message_label:
+                        latency_histograms.record(message_label, elapsed)
             logger.debug(f"{event_type_name} processed successfully")
         else:
             # 未対応のイベントタイプの場合
@@ -403,6 +1048,9 @@ async def _handle_processing_error(error: Exception, event_type: Type) -> None:
     error_type_name = type(error).__name__
     event_type_name = event_type.__name__
 
+    # エラー分類ごとの失敗件数を記録
+    event_stats.incr_error_class(error)
+
     # 重要度の高いエラーキーワードをチェック
     is_critical_error = bool(CRITICAL_ERROR_KEYWORDS & error_message_words)
 
@@ -427,4 +1075,24 @@ if __name__ == "__main__":
     logger.info(f"FastAPI starting on http://0.0.0.0:8000")
     logger.info(f"Health check: http://0.0.0.0:8000/health")
 
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
+    if RUN_MODE == "production":
+        # 本番モード: 複数ワーカープロセスで起動し、統計は共有ディレクトリで集計
+        stats_dir = STATS_DIR or tempfile.mkdtemp(prefix="linebot-stats-")
+        os.environ["STATS_DIR"] = stats_dir
+        event_stats.close(remove=True)  # 親プロセス自身は集計対象外
+        latency_histograms.close(remove=True)
+        logger.info(f"Production mode: {WEB_CONCURRENCY} workers (stats: {stats_dir})")
+
+        try:
+            uvicorn.run(
+                "app:app",
+                host="0.0.0.0",
+                port=8000,
+                workers=WEB_CONCURRENCY,
+                log_level="info",
+            )
+        finally:
+            if not STATS_DIR:
+                shutil.rmtree(stats_dir, ignore_errors=True)
+    else:
+        uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
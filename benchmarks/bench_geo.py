@@ -0,0 +1,131 @@
+"""最寄り地点の検索性能比較（主要10都市の線形探索 / 地名辞書の線形探索 / KD-tree）
+
+使い方: python -m benchmarks.bench_geo [--queries 2000] [--repeat 5]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, List, Sequence, Tuple
+
+from core.gazetteer import CITY_KINDS, Gazetteer, Place, get_gazetteer, haversine_km
+
+# 以前の LocationMessageHandler が距離を計算していた主要都市
+MAJOR_CITIES = {
+    "東京": (35.6762, 139.6503),
+    "大阪": (34.6937, 135.5023),
+    "名古屋": (35.1815, 136.9066),
+    "福岡": (33.5904, 130.4017),
+    "札幌": (43.0642, 141.3469),
+    "仙台": (38.2682, 140.8694),
+    "広島": (34.3853, 132.4553),
+    "京都": (35.0116, 135.7681),
+    "神戸": (34.6901, 135.1956),
+    "熊本": (32.7898, 130.7417),
+}
+
+Point = Tuple[float, float]
+
+
+def _build_queries(count: int, rng: random.Random) -> List[Point]:
+    """日本周辺の座標（一部は海外）"""
+    queries = []
+    for _ in range(count):
+        if rng.random() < 0.9:
+            queries.append((rng.uniform(24.0, 45.5), rng.uniform(123.0, 146.0)))
+        else:
+            queries.append((rng.uniform(-80.0, 80.0), rng.uniform(-180.0, 180.0)))
+    return queries
+
+
+def _major_cities_nearest(lat: float, lng: float) -> Tuple[str, float]:
+    distances = {
+        name: haversine_km(lat, lng, city_lat, city_lng)
+        for name, (city_lat, city_lng) in MAJOR_CITIES.items()
+    }
+    nearest = min(distances, key=lambda name: distances[name])
+    return nearest, distances[nearest]
+
+
+def _linear_nearest(places: Sequence[Place], lat: float, lng: float, k: int) -> List[float]:
+    distances = sorted(haversine_km(lat, lng, p.latitude, p.longitude) for p in places)
+    return distances[:k]
+
+
+def _measure(func: Callable[[], object], repeat: int) -> float:
+    func()  # ウォームアップ
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def _mismatches(gazetteer: Gazetteer, queries: List[Point], kinds: Tuple[str, ...], k: int) -> int:
+    """KD-tree の結果の距離が線形探索と一致しない問い合わせの数"""
+    places = [place for place in gazetteer.places if place.kind in kinds]
+    mismatches = 0
+    for lat, lng in queries:
+        expected = _linear_nearest(places, lat, lng, k)
+        actual = [distance for _, distance in gazetteer.nearest(lat, lng, k, kinds)]
+        if len(actual) != len(expected) or any(
+            abs(a - e) > 1e-6 for a, e in zip(actual, expected)
+        ):
+            mismatches += 1
+    return mismatches
+
+
+def run(query_count: int, repeat: int) -> None:
+    gazetteer = get_gazetteer()
+    queries = _build_queries(query_count, random.Random(query_count))
+    stats = gazetteer.get_stats()
+    print(f"gazetteer: {stats['places']} (build {stats['build_time_ms']:.1f}ms)")
+
+    cities = [place for place in gazetteer.places if place.kind in CITY_KINDS]
+    stations = [place for place in gazetteer.places if place.kind == "station"]
+    cases = [
+        ("major10.linear", 10, lambda lat, lng: _major_cities_nearest(lat, lng)),
+        ("city.linear", len(cities), lambda lat, lng: _linear_nearest(cities, lat, lng, 1)),
+        ("city.kdtree", len(cities), lambda lat, lng: gazetteer.nearest_one(lat, lng, CITY_KINDS)),
+        ("station.linear", len(stations), lambda lat, lng: _linear_nearest(stations, lat, lng, 1)),
+        (
+            "station.kdtree",
+            len(stations),
+            lambda lat, lng: gazetteer.nearest_one(lat, lng, ("station",)),
+        ),
+        (
+            "station.kdtree.3km",
+            len(stations),
+            lambda lat, lng: gazetteer.nearest_one(lat, lng, ("station",), max_distance_km=3.0),
+        ),
+        ("all.kdtree.k5", len(gazetteer.places), lambda lat, lng: gazetteer.nearest(lat, lng, 5)),
+    ]
+
+    print(f"{'case':<20} {'places':>8} {'us/query':>10}")
+    for name, size, func in cases:
+        # 線形探索は遅いため問い合わせ数を絞る
+        case_queries = queries if "linear" not in name or size <= 10 else queries[:200]
+        elapsed = _measure(lambda: [func(lat, lng) for lat, lng in case_queries], repeat)
+        print(f"{name:<20} {size:>8,} {elapsed / len(case_queries) * 1e6:>10.2f}")
+
+    check_queries = queries[:500]
+    print(
+        f"mismatches vs linear ({len(check_queries)} queries): "
+        f"city k=1 {_mismatches(gazetteer, check_queries, CITY_KINDS, 1)}, "
+        f"station k=5 {_mismatches(gazetteer, check_queries, ('station',), 5)}"
+    )
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--queries", type=int, default=2000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    run(args.queries, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""メッセージハンドラーの分析・Flex生成処理のマイクロベンチマーク
+
+使い方:
+    python -m benchmarks.bench_handlers                     # 計測してベースラインと比較
+    python -m benchmarks.bench_handlers --update-baseline   # ベースラインを更新
+    python -m benchmarks.bench_handlers --only location --threshold 0.2
+
+各ケースについて1回あたりの実行時間（中央値）と、tracemalloc による
+一時的なメモリ使用量のピーク・戻り値として残るメモリブロック数を計測する。
+ベースラインより threshold（割合）以上悪化したケースがあれば終了コード 1 で終了する。
+実行時間のベースラインはマシン依存のため、比較は同じ環境で更新したものに対して行うこと。
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from linebot.v3.messaging import FlexMessage, ReplyMessageRequest
+from linebot.v3.webhook import WebhookParser
+
+from commands.postback_command import PostbackCommand
+from core.outbound import encode_request
+from core.reply_cache import RenderedReplyCache
+from handlers.events.messages.audio_handler import AudioHandler
+from handlers.events.messages.file_handler import FileHandler
+from handlers.events.messages.image_handler import ImageHandler
+from handlers.events.messages.location_handler import LocationHandler
+from handlers.events.messages.sticker_handler import StickerHandler
+from handlers.events.messages.video_handler import VideoHandler
+
+from .payloads import (
+    _source,
+    audio_content,
+    build_body,
+    file_content,
+    location_content,
+    message_event,
+    sticker_content,
+    video_content,
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "handlers.json")
+
+# 実運用を想定した入力のバリエーション
+LOCATIONS = [
+    ("東京駅", 35.681236, 139.767125),
+    ("札幌駅", 43.068661, 141.350755),
+    ("那覇空港", 26.2, 127.65),
+    ("大阪城", 34.6873, 135.5262),
+    ("道の駅", 36.2, 138.25),
+    ("ホノルル", 21.3069, -157.8583),
+]
+FILES = [
+    ("report.pdf", 2_400_000),
+    ("photo.JPG", 850_000),
+    ("archive.tar.gz", 120_000_000),
+    ("setup.exe", 45_000_000),
+    ("notes", 512),
+    ("data.csv", 34_000),
+]
+STICKER_TYPES = ["STATIC", "ANIMATION", "SOUND", "ANIMATION_SOUND", "POPUP", "POPUP_SOUND", "CUSTOM"]
+DURATIONS = [3_500, 45_000, 240_000, 1_250_000, 5_400_000]
+
+Case = Tuple[Callable[..., Any], List[Tuple[Any, ...]]]
+
+
+def _parse_messages(contents: List[Dict[str, Any]]) -> List[Any]:
+    """メッセージコンテンツを SDK の MessageEvent に変換"""
+    events = []
+    for index, content in enumerate(contents):
+        event = message_event(_source("user", index), "text")
+        event["message"] = content
+        events.append(event)
+    parser = WebhookParser("bench", skip_signature_verification=lambda: True)
+    return parser.parse(build_body(events).decode(), "")
+
+
+def _location_content(title: str, latitude: float, longitude: float) -> Dict[str, Any]:
+    content = location_content(latitude, longitude)
+    content["title"] = title
+    return content
+
+
+def build_cases() -> Dict[str, Case]:
+    """ケース名 -> (計測対象の関数, 入力の引数リスト)"""
+    location = LocationHandler(None)
+    file = FileHandler(None)
+    sticker = StickerHandler(None)
+    audio = AudioHandler(None)
+    video = VideoHandler(None)
+    image = ImageHandler(None)
+    postback = PostbackCommand(None)
+
+    location_infos = [
+        location._get_location_info(event)
+        for event in _parse_messages([_location_content(*args) for args in LOCATIONS])
+    ]
+    location_args = [(info, location._analyze_location(info)) for info in location_infos]
+
+    file_infos = [
+        file._get_file_info(event)
+        for event in _parse_messages([file_content(*args) for args in FILES])
+    ]
+    file_args = [(info, file._analyze_file(info)) for info in file_infos]
+
+    sticker_infos = [
+        sticker._get_sticker_info(event)
+        for event in _parse_messages([sticker_content(kind) for kind in STICKER_TYPES])
+    ]
+    audio_args = [
+        (event.message.id, event.message.duration, audio._format_duration(event.message.duration))
+        for event in _parse_messages([audio_content(duration) for duration in DURATIONS])
+    ]
+    video_args = [
+        (event.message.id, event.message.duration)
+        for event in _parse_messages([video_content(duration) for duration in DURATIONS])
+    ]
+    image_args = [(f"{index:018d}",) for index in range(5)]
+
+    builders: Dict[str, Case] = {
+        "location.analyze": (location._analyze_location, [(info,) for info in location_infos]),
+        "location.flex": (location._create_location_flex_message, location_args),
+        "file.analyze": (file._analyze_file, [(info,) for info in file_infos]),
+        "file.flex": (file._create_file_flex_message, file_args),
+        "sticker.flex": (sticker._create_sticker_flex_message, [(info,) for info in sticker_infos]),
+        "audio.flex": (audio._create_audio_flex_message, audio_args),
+        "video.flex": (video._create_video_flex_message, video_args),
+        "image.flex": (image._create_image_flex_message, image_args),
+        # 起動時に生成済みのものを使い回す場合と、毎回モデルを組み立てる場合
+        "postback.flex": (postback._postback_flex_message, [()]),
+        "postback.build": (postback._create_postback_flex_message, [()]),
+    }
+
+    # 描画済みの返信のキャッシュに当たる場合（キーの作成と取得のみ）
+    reply_cache = RenderedReplyCache()
+    sticker_inputs = [(info,) for info in sticker_infos]
+    file_inputs = [(info,) for info in file_infos]
+
+    def cached_sticker(info):
+        return reply_cache.get_or_render(
+            "sticker", sticker._reply_cache_key(info), lambda: sticker._create_sticker_flex_message(info)
+        )
+
+    def cached_file(info):
+        return reply_cache.get_or_render(
+            "file",
+            file._reply_cache_key(info),
+            lambda: file._create_file_flex_message(info, file._analyze_file(info)),
+        )
+
+    for func, inputs in (
+        (cached_sticker, sticker_inputs),
+        (cached_file, file_inputs),
+    ):
+        for args in inputs:
+            func(*args)
+    builders.update(
+        {
+            "sticker.cached": (cached_sticker, sticker_inputs),
+            "file.cached": (cached_file, file_inputs),
+        }
+    )
+
+    cases = dict(builders)
+    for name, (func, inputs) in builders.items():
+        if not name.endswith(".flex"):
+            continue
+        messages = [func(*args) for args in inputs]
+        # 同じ内容をSDKのモデルとして組み立てた場合（テンプレート導入前の方式との比較用）
+        if name != "postback.flex":
+            cases[name.replace(".flex", ".model")] = (
+                FlexMessage.from_dict,
+                [(message.to_dict(),) for message in messages],
+            )
+        # 生成済みのFlexメッセージをリクエストボディにするまで（SDKの検証とJSON化）
+        cases[name.replace(".flex", ".serialize")] = (
+            lambda message: ReplyMessageRequest(reply_token="bench", messages=[message]).to_json(),
+            [(message,) for message in messages],
+        )
+        # 検証を省いてシリアライズ済みのJSONから組み立てる場合（OUTBOUND_VALIDATION=false）
+        cases[name.replace(".flex", ".preserialized")] = (
+            lambda message: encode_request(
+                ReplyMessageRequest.construct(reply_token="bench", messages=[message])
+            ),
+            [(message,) for message in messages],
+        )
+    return cases
+
+
+def _run_inputs(func: Callable[..., Any], inputs: Sequence[Tuple[Any, ...]], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        for args in inputs:
+            func(*args)
+    return time.perf_counter() - start
+
+
+def measure_time(
+    func: Callable[..., Any], inputs: Sequence[Tuple[Any, ...]], repeat: int, min_time: float
+) -> float:
+    """1回あたりの実行時間（マイクロ秒、repeat 回の中央値）"""
+    # 1ラウンドが min_time 以上になるように回数を決める
+    number = 1
+    while True:
+        elapsed = _run_inputs(func, inputs, number)
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    timings = [_run_inputs(func, inputs, number) for _ in range(repeat)]
+    return statistics.median(timings) / (number * len(inputs)) * 1_000_000
+
+
+def measure_memory(func: Callable[..., Any], inputs: Sequence[Tuple[Any, ...]]) -> Dict[str, float]:
+    """1回あたりの一時メモリのピーク（KB）と戻り値として残るメモリブロック数"""
+    for args in inputs:  # 遅延初期化されるキャッシュ等を除外
+        func(*args)
+
+    tracemalloc.start()
+    try:
+        peaks = []
+        for args in inputs:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            func(*args)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+
+        results = [func(*args) for args in inputs]
+        snapshot = tracemalloc.take_snapshot()
+        retained_blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+        del results
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "peak_kb": round(statistics.mean(peaks) / 1024, 2),
+        # results リスト自体の分を除く
+        "retained_blocks": round(max(0, retained_blocks - 1) / len(inputs), 1),
+    }
+
+
+def run(
+    cases: Dict[str, Case], repeat: int, min_time: float, only: Optional[str] = None
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, (func, inputs) in cases.items():
+        if only and only not in name:
+            continue
+        results[name] = {
+            "time_us": round(measure_time(func, inputs, repeat, min_time), 2),
+            **measure_memory(func, inputs),
+        }
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """ベースラインから threshold 以上悪化した指標の一覧"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric, value in result.items():
+            base_value = base.get(metric)
+            if base_value and value > base_value * (1 + threshold):
+                regressions.append(
+                    f"{name} {metric}: {base_value} -> {value} (+{(value / base_value - 1) * 100:.1f}%)"
+                )
+    return regressions
+
+
+def _print_results(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'case':<22} {'time us':>10} {'vs base':>8} {'peak KB':>9} {'blocks':>8}")
+    for name, result in results.items():
+        base = baseline.get(name, {}).get("time_us")
+        change = f"{(result['time_us'] / base - 1) * 100:+.1f}%" if base else "-"
+        print(
+            f"{name:<22} {result['time_us']:>10.2f} {change:>8} "
+            f"{result['peak_kb']:>9.2f} {result['retained_blocks']:>8.1f}"
+        )
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("cases", {})
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cases = {**load_baseline(path), **results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "cases": dict(sorted(cases.items())),
+            },
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    arg_parser.add_argument("--only", help="ケース名に含まれる文字列で絞り込み")
+    arg_parser.add_argument("--repeat", type=int, default=7)
+    arg_parser.add_argument("--min-time", type=float, default=0.05, help="1ラウンドの最小時間（秒）")
+    arg_parser.add_argument("--threshold", type=float, default=0.25, help="悪化とみなす割合")
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    arg_parser.add_argument("--update-baseline", action="store_true")
+    args = arg_parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    results = run(build_cases(), args.repeat, args.min_time, args.only)
+    _print_results(results, baseline)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline updated: {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold * 100:.0f}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
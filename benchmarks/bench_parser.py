@@ -0,0 +1,86 @@
+"""WebhookParser と HandlerAwareParser のパース性能比較
+
+使い方: python -m benchmarks.bench_parser [--sizes 10 100 500] [--repeat 20]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from linebot.v3.webhook import WebhookParser
+
+from core.lazy_parser import HandlerAwareParser
+from handlers.events import AVAILABLE_HANDLERS
+
+from .payloads import build_body, build_mixed_events
+
+# 実運用を想定したイベント構成（未登録イベントを含む）
+DEFAULT_MIX = {
+    "message:text": 30,
+    "message:sticker": 10,
+    "message:image": 8,
+    "message:location": 4,
+    "message:file": 3,
+    "postback": 8,
+    "follow": 3,
+    "unfollow": 3,
+    "unsend": 3,
+    "activated": 10,
+    "membership": 8,
+    "delivery": 10,
+}
+
+
+def _registered_event_types() -> List[type]:
+    """app.register_all_event_handlers と同じ方法で登録済みイベントを収集"""
+    event_types = []
+    for handler_module in AVAILABLE_HANDLERS:
+        if hasattr(handler_module, "get_handlers"):
+            event_types.extend(handler_module.get_handlers(None).keys())
+    return event_types
+
+
+def _measure(func: Callable[[], object], repeat: int) -> List[float]:
+    func()  # ウォームアップ
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(sizes: List[int], repeat: int, mix: Dict[str, float]) -> None:
+    sdk_parser = WebhookParser("bench", skip_signature_verification=lambda: True)
+    lazy_parser = HandlerAwareParser(_registered_event_types())
+
+    print(f"{'events':>8} {'bytes':>10} {'sdk ms':>10} {'lazy ms':>10} {'speedup':>8} {'built':>7}")
+    for size in sizes:
+        events = build_mixed_events(size, mix, rng=random.Random(size))
+        body = build_body(events)
+
+        sdk_timings = _measure(lambda: sdk_parser.parse(body, ""), repeat)
+        lazy_timings = _measure(lambda: lazy_parser.parse(body), repeat)
+        built = len(lazy_parser.parse(body))
+
+        sdk_ms = statistics.median(sdk_timings) * 1000
+        lazy_ms = statistics.median(lazy_timings) * 1000
+        print(
+            f"{size:>8} {len(body):>10,} {sdk_ms:>10.3f} {lazy_ms:>10.3f} "
+            f"{sdk_ms / lazy_ms:>7.2f}x {built:>7}"
+        )
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 1000])
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    run(args.sizes, args.repeat, DEFAULT_MIX)
+
+
+if __name__ == "__main__":
+    main()
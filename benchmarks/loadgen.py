@@ -0,0 +1,404 @@
+"""Webhook の負荷試験（署名付きペイロードを目標レートで /callback に送信）
+
+使い方:
+    # 起動済みのサーバーに送信
+    CHANNEL_SECRET=... python -m benchmarks.loadgen --url http://127.0.0.1:8000 --rate 200 --duration 30
+
+    # アプリをプロセス内で起動して送信（ネットワーク不要）
+    python -m benchmarks.loadgen --in-process --rate 200 --duration 30
+
+    # 送信APIもプロセス内のモックサーバーに向ける（遅延・障害注入は --mock-* で指定）
+    python -m benchmarks.loadgen --in-process --mock-api --mock-latency lognormal:40:0.5
+
+スループット・レイテンシのパーセンタイル・エラー率・メモリ増加量を出力する。
+レイテンシは送信予定時刻から計測する（送信側の遅れもレイテンシに含める）。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .mock_line_api import MockLineApi, add_fault_arguments, config_from_args
+from .payloads import (
+    build_body,
+    build_mixed_events,
+    parse_mix,
+    registered_mix_keys,
+    sign_body,
+)
+
+DEFAULT_SECRET = "bench-channel-secret"
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(len(sorted_values) * percentile / 100 + 0.5) - 1))
+    return sorted_values[index]
+
+
+def read_rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """プロセスの常駐メモリ（RSS）を取得（Linux の /proc を使用）"""
+    try:
+        with open(f"/proc/{pid or os.getpid()}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class HttpTarget:
+    """起動済みのサーバーにHTTPで送信"""
+
+    def __init__(self, base_url: str, concurrency: int):
+        import aiohttp
+
+        self.base_url = base_url.rstrip("/")
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=concurrency),
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+
+    async def start(self) -> None:
+        pass
+
+    async def post(self, path: str, body: bytes, headers: Dict[str, str]) -> int:
+        async with self._session.post(self.base_url + path, data=body, headers=headers) as response:
+            await response.read()
+            return response.status
+
+    async def get_json(self, path: str) -> Dict[str, Any]:
+        async with self._session.get(self.base_url + path) as response:
+            return await response.json()
+
+    async def close(self) -> None:
+        await self._session.close()
+
+
+class AsgiTarget:
+    """アプリをプロセス内で起動し、ASGIインターフェースを直接呼び出して送信"""
+
+    def __init__(self, asgi_app: Any):
+        self.app = asgi_app
+        self._lifespan_task: Optional[asyncio.Task] = None
+        self._lifespan_in: asyncio.Queue = asyncio.Queue()
+        self._lifespan_out: asyncio.Queue = asyncio.Queue()
+
+    async def _lifespan(self, message_type: str) -> None:
+        await self._lifespan_in.put({"type": message_type})
+        message = await self._lifespan_out.get()
+        if message["type"].endswith(".failed"):
+            raise RuntimeError(message.get("message", message_type))
+
+    async def start(self) -> None:
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan_task = asyncio.create_task(
+            self.app(scope, self._lifespan_in.get, self._lifespan_out.put)
+        )
+        await self._lifespan("lifespan.startup")
+
+    async def _request(
+        self, method: str, path: str, body: bytes, headers: Dict[str, str]
+    ) -> Tuple[int, bytes]:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+            "client": ("127.0.0.1", 0),
+            "server": ("loadgen", 80),
+        }
+        request_sent = False
+        response: Dict[str, Any] = {"status": 0, "body": []}
+        disconnected = asyncio.Event()
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            disconnected.set()
+        return response["status"], b"".join(response["body"])
+
+    async def post(self, path: str, body: bytes, headers: Dict[str, str]) -> int:
+        status, _ = await self._request("POST", path, body, headers)
+        return status
+
+    async def get_json(self, path: str) -> Dict[str, Any]:
+        _, body = await self._request("GET", path, b"", {})
+        return json.loads(body)
+
+    async def close(self) -> None:
+        if self._lifespan_task is not None:
+            await self._lifespan("lifespan.shutdown")
+            await self._lifespan_task
+
+
+async def _processed_events(target: Any) -> Optional[int]:
+    try:
+        health = await target.get_json("/health")
+        return health["stats"]["processed_events"] + health["stats"]["failed_events"]
+    except Exception:
+        return None
+
+
+async def run_load(
+    target: Any,
+    channel_secret: str,
+    rate: float,
+    duration: float,
+    batch_sizes: Tuple[int, int],
+    mix: Dict[str, float],
+    concurrency: int,
+    source_pool: int,
+    seed: int,
+    server_pid: Optional[int],
+    payload_pool: int = 500,
+) -> Dict[str, Any]:
+    """目標レートで送信し、結果の集計を返す"""
+    rng = random.Random(seed)
+
+    # 署名済みペイロードを事前生成（送信側の負荷を計測に含めない）
+    payloads = []
+    for _ in range(payload_pool):
+        events = build_mixed_events(
+            rng.randint(*batch_sizes), mix, rng=rng, source_pool=source_pool
+        )
+        body = build_body(events)
+        payloads.append((body, sign_body(body, channel_secret), len(events)))
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    sent_events = 0
+    in_flight = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def send_one(scheduled_at: float, body: bytes, signature: str) -> None:
+        async with in_flight:
+            try:
+                status = await target.post(
+                    "/callback",
+                    body,
+                    {"Content-Type": "application/json", "X-Line-Signature": signature},
+                )
+                key = str(status)
+            except Exception as e:
+                key = type(e).__name__
+            latencies.append(time.perf_counter() - scheduled_at)
+            statuses[key] = statuses.get(key, 0) + 1
+
+    processed_before = await _processed_events(target)
+    rss_before = read_rss_bytes(server_pid)
+    interval = 1.0 / rate
+    started = time.perf_counter()
+    request_count = int(rate * duration)
+
+    # オープンループ: 応答を待たずに予定時刻ごとに送信
+    for i in range(request_count):
+        scheduled_at = started + i * interval
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        body, signature, event_count = payloads[i % len(payloads)]
+        if i >= len(payloads):
+            # 重複排除にかからないよう、2巡目以降は新しいイベントIDで生成し直す
+            events = build_mixed_events(event_count, mix, rng=rng, source_pool=source_pool)
+            body = build_body(events)
+            signature = sign_body(body, channel_secret)
+        sent_events += event_count
+        task = asyncio.create_task(send_one(scheduled_at, body, signature))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    await asyncio.gather(*tasks)
+    send_elapsed = time.perf_counter() - started
+
+    # バックグラウンド処理が追いつくまで待機（最大10秒）
+    processed_after = processed_before
+    if processed_before is not None:
+        deadline = time.perf_counter() + 10
+        while time.perf_counter() < deadline:
+            processed_after = await _processed_events(target)
+            if processed_after is None or processed_after - processed_before >= sent_events:
+                break
+            await asyncio.sleep(0.1)
+    total_elapsed = time.perf_counter() - started
+    rss_after = read_rss_bytes(server_pid)
+
+    latencies.sort()
+    ok = statuses.get("200", 0)
+    result = {
+        "target_rate": rate,
+        "duration_s": round(send_elapsed, 3),
+        "requests": len(latencies),
+        "events": sent_events,
+        "statuses": statuses,
+        "error_rate_percent": round((len(latencies) - ok) / len(latencies) * 100, 3)
+        if latencies
+        else 0.0,
+        "throughput_rps": round(len(latencies) / send_elapsed, 2),
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50) * 1000, 3),
+            "p90": round(_percentile(latencies, 90) * 1000, 3),
+            "p99": round(_percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        },
+    }
+    if processed_before is not None and processed_after is not None:
+        processed = processed_after - processed_before
+        result["processed_events"] = processed
+        result["processed_events_per_s"] = round(processed / total_elapsed, 2)
+    if rss_before is not None and rss_after is not None:
+        result["memory"] = {
+            "rss_before_mb": round(rss_before / 1_048_576, 2),
+            "rss_after_mb": round(rss_after / 1_048_576, 2),
+            "growth_mb": round((rss_after - rss_before) / 1_048_576, 2),
+        }
+    return result
+
+
+def _print_report(result: Dict[str, Any]) -> None:
+    latency = result["latency_ms"]
+    print(f"requests:    {result['requests']:,} ({result['events']:,} events) in {result['duration_s']}s")
+    print(f"throughput:  {result['throughput_rps']} req/s (target {result['target_rate']})")
+    if "processed_events_per_s" in result:
+        print(
+            f"processed:   {result['processed_events']:,} events "
+            f"({result['processed_events_per_s']} events/s)"
+        )
+    print(
+        f"latency ms:  p50 {latency['p50']}  p90 {latency['p90']}  p99 {latency['p99']}  "
+        f"max {latency['max']}  mean {latency['mean']}"
+    )
+    print(f"statuses:    {result['statuses']}  (error rate {result['error_rate_percent']}%)")
+    if "line_api" in result:
+        line_api = result["line_api"]
+        calls = {
+            endpoint: stats["requests"] for endpoint, stats in line_api["endpoints"].items()
+        }
+        print(f"LINE API:    {line_api['total_requests']:,} calls {calls}")
+    if "memory" in result:
+        memory = result["memory"]
+        print(
+            f"memory:      {memory['rss_before_mb']} MB -> {memory['rss_after_mb']} MB "
+            f"({memory['growth_mb']:+} MB)"
+        )
+
+
+def _parse_batch_sizes(spec: str) -> Tuple[int, int]:
+    low, _, high = spec.partition("-")
+    return int(low), int(high or low)
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    mix = parse_mix(args.mix) if args.mix else {key: 1.0 for key in registered_mix_keys()}
+
+    mock_api = None
+    if args.mock_api:
+        if not args.in_process:
+            raise SystemExit("--mock-api requires --in-process")
+        mock_api = MockLineApi(config_from_args(args, prefix="mock-"), seed=args.seed)
+        # アプリの import 前に送信先を設定
+        os.environ["LINE_API_HOST"] = await mock_api.start()
+
+    if args.in_process:
+        # アプリの import 前に認証情報を設定
+        os.environ.setdefault("CHANNEL_SECRET", DEFAULT_SECRET)
+        os.environ.setdefault("CHANNEL_ACCESS_TOKEN", "bench-access-token")
+        import app as app_module
+
+        target: Any = AsgiTarget(app_module.app)
+        server_pid = None
+    else:
+        target = HttpTarget(args.url, args.concurrency)
+        server_pid = args.server_pid
+
+    channel_secret = os.getenv("CHANNEL_SECRET", DEFAULT_SECRET)
+    await target.start()
+    try:
+        result = await run_load(
+            target,
+            channel_secret,
+            rate=args.rate,
+            duration=args.duration,
+            batch_sizes=_parse_batch_sizes(args.batch_size),
+            mix=mix,
+            concurrency=args.concurrency,
+            source_pool=args.source_pool,
+            seed=args.seed,
+            server_pid=server_pid,
+        )
+    finally:
+        await target.close()
+        if mock_api is not None:
+            await mock_api.stop()
+
+    if mock_api is not None:
+        result["line_api"] = mock_api.get_stats()
+    return result
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    arg_parser.add_argument("--url", default="http://127.0.0.1:8000", help="送信先サーバー")
+    arg_parser.add_argument("--in-process", action="store_true", help="アプリをプロセス内で起動")
+    arg_parser.add_argument("--rate", type=float, default=100.0, help="目標リクエスト数/秒")
+    arg_parser.add_argument("--duration", type=float, default=10.0, help="送信時間（秒）")
+    arg_parser.add_argument("--batch-size", default="1-5", help="1リクエストのイベント数（例: 1 / 1-5）")
+    arg_parser.add_argument(
+        "--mix",
+        default="",
+        help='イベント構成（例: "message:text=30,postback=5"、未指定時は登録済み全タイプを均等）',
+    )
+    arg_parser.add_argument("--concurrency", type=int, default=256, help="同時送信数の上限")
+    arg_parser.add_argument("--source-pool", type=int, default=100, help="送信元ユーザー/グループ数")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--server-pid", type=int, help="メモリ計測対象のサーバーPID（--url 時）")
+    arg_parser.add_argument("--json", help="結果をJSONで書き出すパス")
+    arg_parser.add_argument(
+        "--mock-api", action="store_true", help="送信APIをプロセス内のモックサーバーに向ける（--in-process 時）"
+    )
+    add_fault_arguments(arg_parser, prefix="mock-")
+    args = arg_parser.parse_args()
+
+    result = asyncio.run(_main(args))
+    _print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if result["requests"] and result["error_rate_percent"] >= 100:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
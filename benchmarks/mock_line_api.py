@@ -0,0 +1,450 @@
+"""LINE Messaging API（api.line.me / api-data.line.me）のローカル代替サーバー
+
+使い方:
+    python -m benchmarks.mock_line_api --port 8090 --latency lognormal:40:0.5 \\
+        --rate-limit-rps 100 --retry-after 1 --error-burst 30:2
+
+    # アプリ側は送信先を差し替えて起動
+    LINE_API_HOST=http://127.0.0.1:8090 python app.py
+
+遅延の分布・429（Retry-After 付き）・5xx の連続発生・遅いレスポンスボディを注入でき、
+受信した全リクエストを記録する（/__mock/requests, /__mock/stats で参照）。
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from aiohttp import web
+
+from core.instrumented_client import api_endpoint_name
+
+MOCK_ADMIN_PREFIX = "/__mock"
+
+_message_ids = itertools.count(100000000000000)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """遅延分布の指定（ミリ秒）を秒を返す関数に変換
+
+    fixed:MS / uniform:MIN:MAX / normal:MEAN:STDDEV / lognormal:MEDIAN:SIGMA / pareto:SCALE:ALPHA
+    """
+    kind, *params = spec.split(":")
+    values = [float(param) / 1000 if i == 0 or kind in ("uniform", "normal") else float(param)
+              for i, param in enumerate(params)]
+
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0]) if values[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, values[1]) if values[0] > 0 else 0.0
+    if kind == "pareto" and len(values) == 2:
+        return lambda rng: values[0] * rng.paretovariate(values[1])
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+class MockConfig:
+    """障害注入の設定（/__mock/config で実行中に変更可能）"""
+
+    FIELDS = {
+        "latency": str,  # 遅延分布（parse_latency の形式）
+        "content_latency": str,  # コンテンツ取得（api-data）の遅延分布
+        "rate_limit_rps": float,  # 秒間リクエスト数の上限（0: 無制限）
+        "rate_limit_probability": float,  # ランダムに 429 を返す確率
+        "retry_after": int,  # 429 の Retry-After（秒）
+        "error_rate": float,  # ランダムに 5xx を返す確率
+        "error_status": int,  # 5xx のステータスコード
+        "error_burst_interval": float,  # 5xx を連続で返す周期（秒、0: 無効）
+        "error_burst_duration": float,  # 周期ごとに 5xx を返し続ける時間（秒）
+        "slow_body_delay": float,  # ヘッダー送信後、ボディ送信までの待機（秒）
+        "content_size": int,  # コンテンツ取得で返すバイト数
+        "content_chunk_size": int,  # コンテンツのチャンクサイズ
+        "content_chunk_delay": float,  # チャンクごとの待機（秒）
+        "max_recorded": int,  # 保持するリクエスト記録の件数
+    }
+
+    def __init__(self, **values: Any):
+        self.latency = "fixed:0"
+        self.content_latency = "fixed:0"
+        self.rate_limit_rps = 0.0
+        self.rate_limit_probability = 0.0
+        self.retry_after = 1
+        self.error_rate = 0.0
+        self.error_status = 500
+        self.error_burst_interval = 0.0
+        self.error_burst_duration = 0.0
+        self.slow_body_delay = 0.0
+        self.content_size = 64 * 1024
+        self.content_chunk_size = 16 * 1024
+        self.content_chunk_delay = 0.0
+        self.max_recorded = 10000
+        self.update(values)
+
+    def update(self, values: Dict[str, Any]) -> None:
+        for name, value in values.items():
+            if name not in self.FIELDS:
+                raise ValueError(f"Unknown mock config: {name}")
+            if value is not None:
+                setattr(self, name, self.FIELDS[name](value))
+        self.latency_sampler = parse_latency(self.latency)
+        self.content_latency_sampler = parse_latency(self.content_latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class MockLineApi:
+    """LINE Messaging API の代替サーバー（障害注入とリクエスト記録付き）"""
+
+    def __init__(self, config: Optional[MockConfig] = None, seed: int = 0):
+        self.config = config or MockConfig()
+        self.rng = random.Random(seed)
+        self.started_at = time.monotonic()
+        self.app = self._build_app()
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """記録と集計をクリア"""
+        self.requests: Deque[Dict[str, Any]] = deque(maxlen=self.config.max_recorded)
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.retry_keys: Dict[str, int] = {}
+        # 受付済みのリトライキー -> リクエストID、使用済みのリプライトークン
+        self.accepted_retry_keys: Dict[str, str] = {}
+        self.used_reply_tokens: set = set()
+        self._bucket_tokens = self.config.rate_limit_rps
+        self._bucket_updated = time.monotonic()
+
+    def _build_app(self) -> web.Application:
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post("/v2/bot/message/reply", self._send_messages)
+        app.router.add_post("/v2/bot/message/push", self._send_messages)
+        app.router.add_post("/v2/bot/message/multicast", self._send_messages)
+        app.router.add_post("/v2/bot/message/broadcast", self._send_messages)
+        app.router.add_post("/v2/bot/message/narrowcast", self._send_messages)
+        app.router.add_post("/v2/bot/chat/loading/start", self._empty)
+        app.router.add_get("/v2/bot/profile/{user_id}", self._profile)
+        app.router.add_get("/v2/bot/group/{group_id}/member/{user_id}", self._profile)
+        app.router.add_get("/v2/bot/room/{room_id}/member/{user_id}", self._profile)
+        app.router.add_get("/v2/bot/message/quota", self._quota)
+        app.router.add_get("/v2/bot/message/quota/consumption", self._quota_consumption)
+        app.router.add_get("/v2/bot/message/{message_id}/content", self._content)
+        app.router.add_get(f"{MOCK_ADMIN_PREFIX}/requests", self._admin_requests)
+        app.router.add_get(f"{MOCK_ADMIN_PREFIX}/stats", self._admin_stats)
+        app.router.add_post(f"{MOCK_ADMIN_PREFIX}/reset", self._admin_reset)
+        app.router.add_get(f"{MOCK_ADMIN_PREFIX}/config", self._admin_config)
+        app.router.add_post(f"{MOCK_ADMIN_PREFIX}/config", self._admin_config)
+        app.middlewares.append(self._fault_middleware)
+        return app
+
+    # 障害注入
+    def _take_rate_limit_token(self) -> bool:
+        rps = self.config.rate_limit_rps
+        if rps <= 0:
+            return True
+        now = time.monotonic()
+        self._bucket_tokens = min(rps, self._bucket_tokens + (now - self._bucket_updated) * rps)
+        self._bucket_updated = now
+        if self._bucket_tokens >= 1:
+            self._bucket_tokens -= 1
+            return True
+        return False
+
+    def _in_error_burst(self) -> bool:
+        interval = self.config.error_burst_interval
+        if interval <= 0:
+            return False
+        return (time.monotonic() - self.started_at) % interval < self.config.error_burst_duration
+
+    @web.middleware
+    async def _fault_middleware(self, request: web.Request, handler: Callable) -> web.StreamResponse:
+        if request.path.startswith(MOCK_ADMIN_PREFIX):
+            return await handler(request)
+
+        body = await request.read()
+        started = time.perf_counter()
+        config = self.config
+        endpoint = api_endpoint_name(request.path)
+        sampler = config.content_latency_sampler if endpoint == "content" else config.latency_sampler
+        await asyncio.sleep(sampler(self.rng))
+
+        if not self._take_rate_limit_token() or self.rng.random() < config.rate_limit_probability:
+            response = web.json_response(
+                {"message": "The API rate limit has been exceeded. Try again later."},
+                status=429,
+                headers={"Retry-After": str(config.retry_after)},
+            )
+        elif self._in_error_burst() or self.rng.random() < config.error_rate:
+            response = web.json_response(
+                {"message": "An error occurred on the mock server."}, status=config.error_status
+            )
+        else:
+            response = await handler(request)
+
+        self._record(request, endpoint, body, response, time.perf_counter() - started)
+        return response
+
+    def _record(
+        self,
+        request: web.Request,
+        endpoint: str,
+        body: bytes,
+        response: web.StreamResponse,
+        elapsed: float,
+    ) -> None:
+        message_count = 0
+        if body and endpoint in ("reply", "push", "multicast", "broadcast", "narrowcast"):
+            try:
+                message_count = len(json.loads(body).get("messages", []))
+            except ValueError:
+                pass
+
+        retry_key = request.headers.get("X-Line-Retry-Key")
+        if retry_key:
+            self.retry_keys[retry_key] = self.retry_keys.get(retry_key, 0) + 1
+
+        self.requests.append(
+            {
+                "time": time.time(),
+                "method": request.method,
+                "path": request.path,
+                "endpoint": endpoint,
+                "status": response.status,
+                "request_bytes": len(body),
+                "message_count": message_count,
+                "retry_key": retry_key,
+                "elapsed_ms": round(elapsed * 1000, 3),
+            }
+        )
+
+        stats = self.stats.get(endpoint)
+        if stats is None:
+            stats = self.stats[endpoint] = {
+                "requests": 0,
+                "statuses": {},
+                "request_bytes_total": 0,
+                "request_bytes_max": 0,
+                "messages_total": 0,
+            }
+        stats["requests"] += 1
+        status = str(response.status)
+        stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+        stats["request_bytes_total"] += len(body)
+        stats["request_bytes_max"] = max(stats["request_bytes_max"], len(body))
+        stats["messages_total"] += message_count
+
+    async def _json(self, payload: Dict[str, Any], request: web.Request) -> web.StreamResponse:
+        if self.config.slow_body_delay <= 0:
+            return web.json_response(payload)
+        # ヘッダーを先に返し、ボディの送信を遅らせる
+        data = json.dumps(payload).encode()
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        response.content_length = len(data)
+        await response.prepare(request)
+        await asyncio.sleep(self.config.slow_body_delay)
+        await response.write(data)
+        await response.write_eof()
+        return response
+
+    # LINE API エンドポイント
+    async def _send_messages(self, request: web.Request) -> web.StreamResponse:
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.json_response({"message": "The request body has 1 error(s)"}, status=400)
+
+        messages = payload.get("messages") or []
+        if not 1 <= len(messages) <= 5:
+            return web.json_response(
+                {"message": "The request body has 1 error(s)",
+                 "details": [{"message": "Size must be between 1 and 5", "property": "messages"}]},
+                status=400,
+            )
+
+        # 同じリトライキーで受付済みのリクエストは 409（LINEと同様に再送分は送信しない）
+        retry_key = request.headers.get("X-Line-Retry-Key")
+        if retry_key and retry_key in self.accepted_retry_keys:
+            return web.json_response(
+                {"message": "The retry key is already accepted"},
+                status=409,
+                headers={"x-line-accepted-request-id": self.accepted_retry_keys[retry_key]},
+            )
+
+        # リプライトークンは1回のみ使用可能
+        if request.path.endswith("/reply"):
+            reply_token = payload.get("replyToken")
+            if not reply_token or reply_token in self.used_reply_tokens:
+                return web.json_response({"message": "Invalid reply token"}, status=400)
+            self.used_reply_tokens.add(reply_token)
+
+        if retry_key:
+            self.accepted_retry_keys[retry_key] = f"req-{next(_message_ids)}"
+        sent = [{"id": str(next(_message_ids)), "quoteToken": f"q{next(_message_ids)}"} for _ in messages]
+        return await self._json({"sentMessages": sent}, request)
+
+    async def _empty(self, request: web.Request) -> web.StreamResponse:
+        return await self._json({}, request)
+
+    async def _profile(self, request: web.Request) -> web.StreamResponse:
+        user_id = request.match_info["user_id"]
+        return await self._json(
+            {
+                "displayName": f"user-{user_id[-6:]}",
+                "userId": user_id,
+                "pictureUrl": "https://profile.line-scdn.net/mock",
+                "statusMessage": "mock",
+                "language": "ja",
+            },
+            request,
+        )
+
+    async def _quota(self, request: web.Request) -> web.StreamResponse:
+        return await self._json({"type": "limited", "value": 1000}, request)
+
+    async def _quota_consumption(self, request: web.Request) -> web.StreamResponse:
+        return await self._json({"totalUsage": len(self.requests)}, request)
+
+    async def _content(self, request: web.Request) -> web.StreamResponse:
+        config = self.config
+        response = web.StreamResponse(headers={"Content-Type": "application/octet-stream"})
+        response.content_length = config.content_size
+        await response.prepare(request)
+
+        remaining = config.content_size
+        chunk = b"\0" * max(1, config.content_chunk_size)
+        while remaining > 0:
+            size = min(remaining, len(chunk))
+            await response.write(chunk[:size])
+            remaining -= size
+            if config.content_chunk_delay > 0 and remaining > 0:
+                await asyncio.sleep(config.content_chunk_delay)
+        await response.write_eof()
+        return response
+
+    # 管理用エンドポイント
+    async def _admin_requests(self, request: web.Request) -> web.StreamResponse:
+        endpoint = request.query.get("endpoint")
+        limit = int(request.query.get("limit", "100"))
+        records = [r for r in self.requests if endpoint is None or r["endpoint"] == endpoint]
+        return web.json_response(records[-limit:])
+
+    async def _admin_stats(self, request: web.Request) -> web.StreamResponse:
+        return web.json_response(self.get_stats())
+
+    async def _admin_reset(self, request: web.Request) -> web.StreamResponse:
+        self.reset()
+        return web.json_response({"reset": True})
+
+    async def _admin_config(self, request: web.Request) -> web.StreamResponse:
+        if request.method == "POST":
+            try:
+                self.config.update(await request.json())
+            except ValueError as e:
+                return web.json_response({"message": str(e)}, status=400)
+        return web.json_response(self.config.to_dict())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """エンドポイントごとの呼び出し回数・ステータス・ペイロードサイズ"""
+        return {
+            "total_requests": sum(stats["requests"] for stats in self.stats.values()),
+            "endpoints": self.stats,
+            "retry_keys": len(self.retry_keys),
+            "retried_requests": sum(count - 1 for count in self.retry_keys.values() if count > 1),
+            "config": self.config.to_dict(),
+        }
+
+    def recorded(self, endpoint: Optional[str] = None) -> List[Dict[str, Any]]:
+        """記録済みのリクエスト（ベンチマークからの検証用）"""
+        return [r for r in self.requests if endpoint is None or r["endpoint"] == endpoint]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """サーバーを起動してベースURLを返す（port=0 で空きポート）"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def add_fault_arguments(arg_parser: argparse.ArgumentParser, prefix: str = "") -> None:
+    """障害注入の設定をコマンドライン引数として追加（loadgen と共用）"""
+    arg_parser.add_argument(f"--{prefix}latency", default="fixed:0", help="遅延分布（ms）例: lognormal:40:0.5")
+    arg_parser.add_argument(f"--{prefix}content-latency", default="fixed:0", help="コンテンツ取得の遅延分布")
+    arg_parser.add_argument(f"--{prefix}rate-limit-rps", type=float, default=0.0, help="秒間上限（超過時 429）")
+    arg_parser.add_argument(f"--{prefix}rate-limit-probability", type=float, default=0.0)
+    arg_parser.add_argument(f"--{prefix}retry-after", type=int, default=1, help="429 の Retry-After（秒）")
+    arg_parser.add_argument(f"--{prefix}error-rate", type=float, default=0.0, help="5xx を返す確率")
+    arg_parser.add_argument(f"--{prefix}error-status", type=int, default=500)
+    arg_parser.add_argument(
+        f"--{prefix}error-burst", default="", help="5xx の連続発生 周期:継続秒 例: 30:2"
+    )
+    arg_parser.add_argument(f"--{prefix}slow-body-delay", type=float, default=0.0)
+    arg_parser.add_argument(f"--{prefix}content-chunk-delay", type=float, default=0.0)
+
+
+def config_from_args(args: argparse.Namespace, prefix: str = "") -> MockConfig:
+    """add_fault_arguments で追加した引数から設定を生成"""
+    attr = prefix.replace("-", "_")
+    value = lambda name: getattr(args, attr + name)  # noqa: E731
+    burst_interval, _, burst_duration = value("error_burst").partition(":")
+    return MockConfig(
+        latency=value("latency"),
+        content_latency=value("content_latency"),
+        rate_limit_rps=value("rate_limit_rps"),
+        rate_limit_probability=value("rate_limit_probability"),
+        retry_after=value("retry_after"),
+        error_rate=value("error_rate"),
+        error_status=value("error_status"),
+        error_burst_interval=float(burst_interval or 0),
+        error_burst_duration=float(burst_duration or 0),
+        slow_body_delay=value("slow_body_delay"),
+        content_chunk_delay=value("content_chunk_delay"),
+    )
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    mock = MockLineApi(config_from_args(args), seed=args.seed)
+    base_url = await mock.start(args.host, args.port)
+    print(f"Mock LINE API listening on {base_url} (admin: {base_url}{MOCK_ADMIN_PREFIX}/stats)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await mock.stop()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8090)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    add_fault_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""ベンチマーク・負荷試験用のWebhookペイロード生成"""
+
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+_counter = itertools.count()
+
+
+def _next_id(prefix: str) -> str:
+    return f"{prefix}{next(_counter):024d}"
+
+
+def _source(source_type: str = "user", index: int = 0) -> Dict[str, Any]:
+    user_id = f"U{index:032x}"
+    if source_type == "group":
+        return {"type": "group", "groupId": f"C{index:032x}", "userId": user_id}
+    if source_type == "room":
+        return {"type": "room", "roomId": f"R{index:032x}", "userId": user_id}
+    return {"type": "user", "userId": user_id}
+
+
+def _base_event(event_type: str, source: Dict[str, Any], redelivery: bool = False) -> Dict[str, Any]:
+    return {
+        "type": event_type,
+        "mode": "active",
+        "timestamp": int(time.time() * 1000),
+        "source": source,
+        "webhookEventId": _next_id("01H"),
+        "deliveryContext": {"isRedelivery": redelivery},
+    }
+
+
+def _with_reply_token(event: Dict[str, Any]) -> Dict[str, Any]:
+    event["replyToken"] = _next_id("rt")
+    return event
+
+
+# メッセージコンテンツ（MessageEventHandler.handlers の各タイプ）
+def text_content(text: str = "/ping") -> Dict[str, Any]:
+    return {"type": "text", "id": _next_id(""), "text": text, "quoteToken": _next_id("q")}
+
+
+def image_content() -> Dict[str, Any]:
+    return {
+        "type": "image",
+        "id": _next_id(""),
+        "contentProvider": {"type": "line"},
+        "quoteToken": _next_id("q"),
+    }
+
+
+def video_content(duration: int = 45000) -> Dict[str, Any]:
+    return {
+        "type": "video",
+        "id": _next_id(""),
+        "duration": duration,
+        "contentProvider": {"type": "line"},
+        "quoteToken": _next_id("q"),
+    }
+
+
+def audio_content(duration: int = 12000) -> Dict[str, Any]:
+    return {
+        "type": "audio",
+        "id": _next_id(""),
+        "duration": duration,
+        "contentProvider": {"type": "line"},
+    }
+
+
+def file_content(file_name: str = "report.pdf", file_size: int = 2_400_000) -> Dict[str, Any]:
+    return {"type": "file", "id": _next_id(""), "fileName": file_name, "fileSize": file_size}
+
+
+def location_content(
+    latitude: float = 35.681236, longitude: float = 139.767125
+) -> Dict[str, Any]:
+    return {
+        "type": "location",
+        "id": _next_id(""),
+        "title": "東京駅",
+        "address": "東京都千代田区丸の内1丁目",
+        "latitude": latitude,
+        "longitude": longitude,
+    }
+
+
+def sticker_content(resource_type: str = "ANIMATION") -> Dict[str, Any]:
+    return {
+        "type": "sticker",
+        "id": _next_id(""),
+        "packageId": "446",
+        "stickerId": "1988",
+        "stickerResourceType": resource_type,
+        "keywords": ["happy", "smile", "joy", "fun", "cheer", "yay"],
+        "quoteToken": _next_id("q"),
+    }
+
+
+MESSAGE_CONTENT_FACTORIES: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "text": text_content,
+    "image": image_content,
+    "video": video_content,
+    "audio": audio_content,
+    "file": file_content,
+    "location": location_content,
+    "sticker": sticker_content,
+}
+
+
+def message_event(source: Dict[str, Any], content_type: str = "text") -> Dict[str, Any]:
+    event = _with_reply_token(_base_event("message", source))
+    event["message"] = MESSAGE_CONTENT_FACTORIES[content_type]()
+    return event
+
+
+# イベント（handlers.events.AVAILABLE_HANDLERS の各タイプ）
+def follow_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _with_reply_token(_base_event("follow", source))
+    event["follow"] = {"isUnblocked": False}
+    return event
+
+
+def unfollow_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    return _base_event("unfollow", source)
+
+
+def join_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    return _with_reply_token(_base_event("join", source))
+
+
+def leave_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    return _base_event("leave", source)
+
+
+def member_joined_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _with_reply_token(_base_event("memberJoined", source))
+    event["joined"] = {"members": [_source("user", i) for i in range(2)]}
+    return event
+
+
+def member_left_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _base_event("memberLeft", source)
+    event["left"] = {"members": [_source("user", 1)]}
+    return event
+
+
+def postback_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _with_reply_token(_base_event("postback", source))
+    event["postback"] = {"data": "action=basic_test&type=simple"}
+    return event
+
+
+def beacon_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _with_reply_token(_base_event("beacon", source))
+    event["beacon"] = {"hwid": "d41d8cd98f", "type": "enter"}
+    return event
+
+
+def unsend_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _base_event("unsend", source)
+    event["unsend"] = {"messageId": _next_id("")}
+    return event
+
+
+def video_play_complete_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _with_reply_token(_base_event("videoPlayComplete", source))
+    event["videoPlayComplete"] = {"trackingId": "track-001"}
+    return event
+
+
+def account_link_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _with_reply_token(_base_event("accountLink", source))
+    event["link"] = {"result": "ok", "nonce": _next_id("n")}
+    return event
+
+
+# ハンドラー未登録のイベント（パーサーのスキップ対象）
+def activated_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _base_event("activated", source)
+    event["chatControl"] = {"expireAt": int(time.time() * 1000) + 3_600_000}
+    return event
+
+
+def membership_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _with_reply_token(_base_event("membership", source))
+    event["membership"] = {"type": "joined", "membershipId": 3189}
+    return event
+
+
+def delivery_event(source: Dict[str, Any]) -> Dict[str, Any]:
+    event = _base_event("delivery", source)
+    event["delivery"] = {"data": "pnp-delivery-" + _next_id("")}
+    return event
+
+
+EVENT_FACTORIES: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "message": message_event,
+    "follow": follow_event,
+    "unfollow": unfollow_event,
+    "join": join_event,
+    "leave": leave_event,
+    "memberJoined": member_joined_event,
+    "memberLeft": member_left_event,
+    "postback": postback_event,
+    "beacon": beacon_event,
+    "unsend": unsend_event,
+    "videoPlayComplete": video_play_complete_event,
+    "accountLink": account_link_event,
+}
+
+UNHANDLED_EVENT_FACTORIES: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "activated": activated_event,
+    "membership": membership_event,
+    "delivery": delivery_event,
+}
+
+# グループ/ルームでのみ発生するイベント
+GROUP_ONLY_EVENTS = {"join", "leave", "memberJoined", "memberLeft"}
+
+
+def build_event(
+    event_type: str,
+    content_type: str = "text",
+    source_type: str = "user",
+    source_index: int = 0,
+) -> Dict[str, Any]:
+    """イベントタイプ（message の場合はコンテンツタイプも）を指定してイベントを生成"""
+    if event_type in GROUP_ONLY_EVENTS and source_type == "user":
+        source_type = "group"
+    source = _source(source_type, source_index)
+
+    if event_type == "message":
+        return message_event(source, content_type)
+    factory = EVENT_FACTORIES.get(event_type) or UNHANDLED_EVENT_FACTORIES[event_type]
+    return factory(source)
+
+
+def build_mixed_events(
+    count: int,
+    mix: Dict[str, float],
+    rng: Optional[random.Random] = None,
+    source_pool: int = 100,
+) -> List[Dict[str, Any]]:
+    """重み付きのイベント構成からイベントを生成
+
+    mix のキーは "message:text" のように message はコンテンツタイプを併記する。
+    """
+    rng = rng or random.Random(0)
+    keys = list(mix.keys())
+    weights = [mix[key] for key in keys]
+
+    events = []
+    for key in rng.choices(keys, weights=weights, k=count):
+        event_type, _, content_type = key.partition(":")
+        source_type = rng.choice(("user", "user", "group", "room"))
+        events.append(
+            build_event(
+                event_type,
+                content_type or "text",
+                source_type=source_type,
+                source_index=rng.randrange(source_pool),
+            )
+        )
+    return events
+
+
+def registered_mix_keys() -> List[str]:
+    """登録済みハンドラーから mix のキー一覧を生成（message はコンテンツタイプ別）
+
+    handlers.events.AVAILABLE_HANDLERS と MessageEventHandler.handlers を参照するため、
+    ハンドラーを追加するとベンチマーク・負荷試験の対象にも自動で含まれる。
+    """
+    from linebot.v3.webhooks import Event, MessageContent, MessageEvent
+
+    from handlers.events import AVAILABLE_HANDLERS
+    from handlers.events.message_event import MessageEventHandler
+
+    event_type_values = {
+        class_name: value
+        for value, class_name in getattr(Event, "_Event__discriminator_value_class_map", {}).items()
+    }
+    content_type_values = {
+        class_name: value
+        for value, class_name in getattr(
+            MessageContent, "_MessageContent__discriminator_value_class_map", {}
+        ).items()
+    }
+
+    keys = []
+    for handler_module in AVAILABLE_HANDLERS:
+        if not hasattr(handler_module, "get_handlers"):
+            continue
+        for event_class in handler_module.get_handlers(None):
+            if event_class is MessageEvent:
+                for content_class in MessageEventHandler(None).handlers:
+                    content_type = content_type_values.get(content_class.__name__)
+                    if content_type in MESSAGE_CONTENT_FACTORIES:
+                        keys.append(f"message:{content_type}")
+            else:
+                event_type = event_type_values.get(event_class.__name__)
+                if event_type in EVENT_FACTORIES:
+                    keys.append(event_type)
+    return keys
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """"message:text=30,postback=5" 形式の文字列を mix に変換（重み省略時は 1）"""
+    mix = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, _, weight = item.partition("=")
+        event_type, _, content_type = key.partition(":")
+        if event_type not in EVENT_FACTORIES and event_type not in UNHANDLED_EVENT_FACTORIES:
+            raise ValueError(f"Unknown event type: {event_type}")
+        if content_type and content_type not in MESSAGE_CONTENT_FACTORIES:
+            raise ValueError(f"Unknown message content type: {content_type}")
+        mix[key] = float(weight) if weight else 1.0
+    return mix
+
+
+def build_body(events: List[Dict[str, Any]], destination: str = "Ubench") -> bytes:
+    """Webhookリクエストボディを生成"""
+    return json.dumps(
+        {"destination": destination, "events": events}, ensure_ascii=False
+    ).encode("utf-8")
+
+
+def sign_body(body: bytes, channel_secret: str) -> str:
+    """X-Line-Signature の値を生成"""
+    digest = hmac.new(channel_secret.encode("utf-8"), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("ascii")
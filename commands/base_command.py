@@ -2,11 +2,12 @@ import logging
 from abc import ABC, abstractmethod
 from linebot.v3.messaging import (
     AsyncMessagingApi,
-    ReplyMessageRequest,
     TextMessage,
 )
 from linebot.v3.webhooks import MessageEvent
 
+from core.outbound import reply_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +25,7 @@ class BaseCommand(ABC):
     async def _reply_text(self, event: MessageEvent, text: str) -> None:
         """シンプルなテキストメッセージで返信"""
         await self.api.reply_message(
-            ReplyMessageRequest(
+            reply_request(
                 reply_token=event.reply_token,
                 messages=[TextMessage(text=text)]
             )
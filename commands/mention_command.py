@@ -1,7 +1,6 @@
 import logging
 from .base_command import BaseCommand
 from linebot.v3.messaging import (
-    ReplyMessageRequest,
     TextMessageV2,
     MentionSubstitutionObject,
     UserMentionTarget,
@@ -9,6 +8,8 @@ from linebot.v3.messaging import (
 )
 from linebot.v3.webhooks import MessageEvent, UserSource, GroupSource, RoomSource
 
+from core.outbound import reply_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,7 +48,7 @@ class MentionCommand(BaseCommand):
     async def _send_user_mention(self, event: MessageEvent, user_id: str) -> None:
         """個人メンションを送信"""
         await self.api.reply_message(
-            ReplyMessageRequest(
+            reply_request(
                 reply_token=event.reply_token,
                 messages=[
                     TextMessageV2(
@@ -66,7 +67,7 @@ class MentionCommand(BaseCommand):
     async def _send_all_mention(self, event: MessageEvent, user_id: str) -> None:
         """全員メンションを送信（注意：全員に通知）"""
         await self.api.reply_message(
-            ReplyMessageRequest(
+            reply_request(
                 reply_token=event.reply_token,
                 messages=[
                     TextMessageV2(
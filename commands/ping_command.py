@@ -1,8 +1,10 @@
 import time
 from .base_command import BaseCommand
-from linebot.v3.messaging import ReplyMessageRequest, TextMessage
+from linebot.v3.messaging import TextMessage
 from linebot.v3.webhooks import MessageEvent
 
+from core.outbound import reply_request
+
 
 class PingCommand(BaseCommand):
     """Pingコマンド"""
@@ -14,7 +16,7 @@ class PingCommand(BaseCommand):
             processing_time = time.time() - start_time
             
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[
                         TextMessage(
@@ -1,8 +1,10 @@
 import logging
 from .base_command import BaseCommand
-from linebot.v3.messaging import ReplyMessageRequest, LocationMessage, TextMessage
+from linebot.v3.messaging import LocationMessage, TextMessage
 from linebot.v3.webhooks import MessageEvent
 
+from core.outbound import reply_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,7 +25,7 @@ class PoliceCommand(BaseCommand):
 
             # 位置情報メッセージを送信
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[
                         LocationMessage(
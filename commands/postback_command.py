@@ -1,7 +1,7 @@
 import logging
 from .base_command import BaseCommand
 from linebot.v3.messaging import (
-    ReplyMessageRequest,
+    AsyncMessagingApi,
     FlexMessage,
     FlexBubble,
     FlexBox,
@@ -12,19 +12,28 @@ from linebot.v3.messaging import (
 )
 from linebot.v3.webhooks import MessageEvent
 
+from core.flex_templates import PrecompiledMessage, static_messages
+from core.outbound import reply_request
+from core.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 
 class PostbackCommand(BaseCommand):
     """Postbackテストコマンド"""
 
+    def __init__(self, api: AsyncMessagingApi):
+        super().__init__(api)
+        # 内容が固定のため起動時に一度だけ生成しておく
+        self._postback_flex_message()
+
     async def execute(self, event: MessageEvent, command: str) -> None:
         """Postback機能のテスト用ボタンメッセージを送信"""
         try:
-            flex_message = self._create_postback_flex_message()
+            flex_message = self._postback_flex_message()
 
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[flex_message],
                 )
@@ -34,6 +43,11 @@ class PostbackCommand(BaseCommand):
             logger.error(f"Postback command error: {e}")
             await self._reply_error(event, "Postback機能のテストに失敗しました")
 
+    def _postback_flex_message(self) -> PrecompiledMessage:
+        """Postbackテスト用のFlexメッセージ（生成・シリアライズ済みのものを使い回す）"""
+        return static_messages.get("postback.menu", self._create_postback_flex_message)
+
+    @traced(stage="flex_build")
     def _create_postback_flex_message(self) -> FlexMessage:
         """Postbackテスト用のFlexメッセージを作成"""
         # ヘッダー部分
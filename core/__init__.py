@@ -0,0 +1,104 @@
+from .dedup import (
+    EventDeduplicator,
+    DedupBackend,
+    MemoryDedupBackend,
+    RedisDedupBackend,
+    create_dedup_backend,
+)
+from .delivery import RetryingMessagingApi, use_event
+from .event_queue import (
+    EventDispatcher,
+    EventQueueFullError,
+    BACKPRESSURE_REJECT,
+    BACKPRESSURE_WAIT,
+)
+from .histogram import LatencyHistograms
+from .flex_templates import (
+    FlexTemplate,
+    FlexTemplateRegistry,
+    PayloadTooLarge,
+    PrecompiledMessage,
+    StaticMessageCache,
+    flex_templates,
+    static_messages,
+)
+from .flight_recorder import FlightRecorder
+from .gazetteer import Gazetteer, Place, get_gazetteer
+from .http_pool import ConnectionPool
+from .instrumented_client import InstrumentedApiClient, API_ENDPOINT_NAMES, track_api_usage
+from .keyed_executor import KeyedExecutor, event_source_key
+from .lazy_parser import HandlerAwareParser
+from .outbound import PreserializedMessagingApi, set_request_validation
+from .profiler import AsyncSamplingProfiler, ProfilerBusyError
+from .rate_limiter import ApiRateLimiter, RateLimitedMessagingApi
+from .reply_buffer import ReplyCoalescingMessagingApi
+from .reply_cache import RenderedReplyCache, reply_cache
+from .metrics import OpenMetricsExporter, HistogramFamily, OPENMETRICS_CONTENT_TYPE
+from .signature import SignatureVerifier
+from .stats import StatsStore
+from .task_registry import TaskRegistry, EventDeadlineExceeded
+from .tracing import (
+    Span,
+    Tracer,
+    create_span_exporter,
+    current_span,
+    start_span,
+    traced,
+    use_span,
+)
+
+__all__ = [
+    "EventDeduplicator",
+    "DedupBackend",
+    "MemoryDedupBackend",
+    "RedisDedupBackend",
+    "create_dedup_backend",
+    "RetryingMessagingApi",
+    "use_event",
+    "EventDispatcher",
+    "EventQueueFullError",
+    "BACKPRESSURE_REJECT",
+    "BACKPRESSURE_WAIT",
+    "LatencyHistograms",
+    "FlexTemplate",
+    "FlexTemplateRegistry",
+    "flex_templates",
+    "PayloadTooLarge",
+    "PrecompiledMessage",
+    "StaticMessageCache",
+    "static_messages",
+    "FlightRecorder",
+    "Gazetteer",
+    "Place",
+    "get_gazetteer",
+    "ConnectionPool",
+    "InstrumentedApiClient",
+    "API_ENDPOINT_NAMES",
+    "track_api_usage",
+    "KeyedExecutor",
+    "event_source_key",
+    "HandlerAwareParser",
+    "PreserializedMessagingApi",
+    "set_request_validation",
+    "OpenMetricsExporter",
+    "AsyncSamplingProfiler",
+    "ProfilerBusyError",
+    "ApiRateLimiter",
+    "RateLimitedMessagingApi",
+    "ReplyCoalescingMessagingApi",
+    "RenderedReplyCache",
+    "reply_cache",
+    "HistogramFamily",
+    "OPENMETRICS_CONTENT_TYPE",
+    "SignatureVerifier",
+    "StatsStore",
+    "TaskRegistry",
+    "EventDeadlineExceeded",
+    "Span",
+    "Tracer",
+    "create_span_exporter",
+    "current_span",
+    "start_span",
+    "traced",
+    "use_span",
+]
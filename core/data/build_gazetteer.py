@@ -0,0 +1,170 @@
+"""同梱の地名辞書 core/data/jp_gazetteer.csv の作成
+
+使い方:
+    python core/data/build_gazetteer.py \
+        --jis data.csv \
+        --cities geoshape-city.csv \
+        --prefectures geoshape-pref.csv \
+        --stations ksj-station-N02-2020.csv
+
+入力（出典・ライセンスは core/data/README.md）:
+    --jis          全国地方公共団体コード（現存する市区町村の一覧、jisx0402 パッケージの data.csv）
+    --cities       GeoNLP 地名辞書「歴史的行政区域データセットβ版」（市区町村の役所の位置）
+    --prefectures  GeoNLP 地名辞書「都道府県」（都道府県庁の位置）
+    --stations     GeoNLP 地名辞書「国土数値情報 鉄道データ（駅）」
+"""
+
+import argparse
+import csv
+import os
+import sys
+from typing import Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from core.gazetteer import (  # noqa: E402
+    CITY_KINDS,
+    DEFAULT_GAZETTEER_PATH,
+    Gazetteer,
+    Place,
+    haversine_km,
+)
+
+# 同じ名前の駅（路線ごとに別の点）をまとめる距離（km）
+STATION_MERGE_DISTANCE_KM = 1.0
+
+
+def _current_office(rows: List[Dict[str, str]], name: str) -> Dict[str, str]:
+    """現存する市区町村の役所の位置（廃止済みの同じコードの市町村を除く）"""
+    candidates = [
+        row for row in rows if not row["valid_to"] and row["body"] + row["suffix"] == name
+    ]
+    # 役所の所在地（国土数値情報 P34）を優先し、無ければ区域の重心
+    candidates.sort(key=lambda row: ("P34" in row["source"], row["valid_from"]), reverse=True)
+    return candidates[0] if candidates else {}
+
+
+def build_cities(jis_path: str, cities_path: str) -> List[Place]:
+    with open(cities_path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    by_code: Dict[str, List[Dict[str, str]]] = {}
+    for row in rows:
+        for code in row["code"].split("/"):
+            by_code.setdefault(code, []).append(row)
+
+    places = []
+    with open(jis_path, encoding="utf-8") as f:
+        municipalities = [row for row in csv.DictReader(f) if row["city"]]
+    for municipality in municipalities:
+        office = _current_office(by_code.get(municipality["code"][:5], []), municipality["city"])
+        if not office:
+            print(f"skipped (no location): {municipality['prefecture']}{municipality['city']}")
+            continue
+        places.append(
+            Place(
+                municipality["city"],
+                "municipality",
+                municipality["prefecture"],
+                municipality["city"],
+                float(office["latitude"]),
+                float(office["longitude"]),
+            )
+        )
+
+    # 政令指定都市の区（全国地方公共団体コードの一覧には含まれない）
+    current_codes = {municipality["code"][:5] for municipality in municipalities}
+    for row in rows:
+        if (
+            row["suffix"] == "区"
+            and not row["valid_to"]
+            and "P34" in row["source"]
+            and row["code"] not in current_codes
+        ):
+            name = f"{row['countyname']}{row['body']}区"
+            places.append(
+                Place(
+                    name,
+                    "ward",
+                    row["prefname"],
+                    name,
+                    float(row["latitude"]),
+                    float(row["longitude"]),
+                )
+            )
+    return places
+
+
+def build_prefecture_offices(prefectures_path: str, cities: Gazetteer) -> List[Place]:
+    places = []
+    with open(prefectures_path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            latitude, longitude = float(row["latitude"]), float(row["longitude"])
+            city, _ = cities.nearest_one(latitude, longitude, CITY_KINDS)
+            name = f"{row['fullname']}庁"
+            places.append(Place(name, "landmark", row["fullname"], city.name, latitude, longitude))
+    return places
+
+
+def build_stations(stations_path: str, cities: Gazetteer) -> List[Place]:
+    # 駅名ごとに、近い点（同じ駅の別路線）をまとめて平均の位置にする
+    clusters: Dict[str, List[List[float]]] = {}
+    with open(stations_path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            latitude, longitude = float(row["latitude"]), float(row["longitude"])
+            name_clusters = clusters.setdefault(row["body"], [])
+            for cluster in name_clusters:
+                if (
+                    haversine_km(cluster[0] / cluster[2], cluster[1] / cluster[2], latitude, longitude)
+                    <= STATION_MERGE_DISTANCE_KM
+                ):
+                    cluster[0] += latitude
+                    cluster[1] += longitude
+                    cluster[2] += 1
+                    break
+            else:
+                name_clusters.append([latitude, longitude, 1])
+
+    places = []
+    for name, name_clusters in clusters.items():
+        for lat_total, lng_total, count in name_clusters:
+            latitude, longitude = lat_total / count, lng_total / count
+            city, _ = cities.nearest_one(latitude, longitude, CITY_KINDS)
+            places.append(
+                Place(f"{name}駅", "station", city.prefecture, city.name, latitude, longitude)
+            )
+    return places
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    arg_parser.add_argument("--jis", required=True)
+    arg_parser.add_argument("--cities", required=True)
+    arg_parser.add_argument("--prefectures", required=True)
+    arg_parser.add_argument("--stations", required=True)
+    arg_parser.add_argument("--output", default=DEFAULT_GAZETTEER_PATH)
+    args = arg_parser.parse_args()
+
+    cities = build_cities(args.jis, args.cities)
+    city_index = Gazetteer(cities)
+    places = (
+        cities
+        + build_prefecture_offices(args.prefectures, city_index)
+        + build_stations(args.stations, city_index)
+    )
+
+    with open(args.output, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(Place._fields)
+        for place in places:
+            writer.writerow([*place[:4], f"{place.latitude:.5f}", f"{place.longitude:.5f}"])
+
+    counts: Dict[str, int] = {}
+    for place in places:
+        counts[place.kind] = counts.get(place.kind, 0) + 1
+    print(f"{args.output}: {len(places)} places {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis は共有バックエンド利用時のみ必要
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+KEY_DIGEST_SIZE = 16  # 重複判定キーのバイト長
+
+
+def compact_event_key(webhook_event_id: str) -> bytes:
+    """webhookEventId を固定長のバイト列に圧縮"""
+    return hashlib.blake2b(
+        webhook_event_id.encode("utf-8"), digest_size=KEY_DIGEST_SIZE
+    ).digest()
+
+
+class DedupBackend(ABC):
+    """重複判定インデックスのバックエンド基底クラス"""
+
+    name = "base"
+
+    @abstractmethod
+    async def add_if_absent(self, key: bytes) -> bool:
+        """キーを登録（新規ならTrue、既に存在すればFalse）"""
+
+    @abstractmethod
+    async def discard(self, key: bytes) -> None:
+        """キーを削除（処理できなかったイベントを再送で受け直すため）"""
+
+    async def close(self) -> None:
+        """バックエンドの後片付け"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class MemoryDedupBackend(DedupBackend):
+    """プロセス内の TTL 付き LRU インデックス"""
+
+    name = "memory"
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 50000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # キー -> 有効期限（登録順 = 期限順）
+        self._entries: "OrderedDict[bytes, float]" = OrderedDict()
+        self.evictions = 0
+
+    def _evict(self, now: float) -> None:
+        """期限切れおよび上限超過のエントリを古い順に削除"""
+        entries = self._entries
+        while entries:
+            expires_at = next(iter(entries.values()))
+            if expires_at > now and len(entries) < self.max_entries:
+                break
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    async def add_if_absent(self, key: bytes) -> bool:
+        now = time.monotonic()
+        self._evict(now)
+
+        expires_at = self._entries.get(key)
+        if expires_at is not None and expires_at > now:
+            return False
+
+        self._entries[key] = now + self.ttl
+        return True
+
+    async def discard(self, key: bytes) -> None:
+        self._entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "evictions": self.evictions,
+            "approx_memory_bytes": len(self._entries) * self._entry_size(),
+        }
+
+    @staticmethod
+    def _entry_size() -> int:
+        """1エントリあたりの概算メモリ（キー + 期限 + 辞書ノード）"""
+        return 33 + KEY_DIGEST_SIZE + 24 + 104
+
+
+class RedisDedupBackend(DedupBackend):
+    """複数プロセスで共有する Redis バックエンド（SET NX EX）"""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float = 3600.0, key_prefix: str = "linebot:dedup:"):
+        if aioredis is None:
+            raise RuntimeError("redis package is required for DEDUP_BACKEND=redis")
+
+        self.ttl = int(ttl)
+        self.key_prefix = key_prefix.encode("utf-8")
+        self._client = aioredis.from_url(url)
+
+    async def add_if_absent(self, key: bytes) -> bool:
+        result = await self._client.set(self.key_prefix + key, b"1", nx=True, ex=self.ttl)
+        return bool(result)
+
+    async def discard(self, key: bytes) -> None:
+        await self._client.delete(self.key_prefix + key)
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "ttl_seconds": self.ttl}
+
+
+def create_dedup_backend(
+    backend: str, ttl: float, max_entries: int, redis_url: Optional[str] = None
+) -> DedupBackend:
+    """設定値からバックエンドを生成"""
+    if backend == "memory":
+        return MemoryDedupBackend(ttl=ttl, max_entries=max_entries)
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("REDIS_URL is required for DEDUP_BACKEND=redis")
+        return RedisDedupBackend(redis_url, ttl=ttl)
+    raise ValueError(f"Unknown dedup backend: {backend}")
+
+
+class EventDeduplicator:
+    """webhookEventId による再送イベントの重複排除"""
+
+    def __init__(self, backend: DedupBackend):
+        self.backend = backend
+        self.hits = 0  # 重複として破棄した数
+        self.misses = 0  # 新規イベントとして通過した数
+        self.redeliveries = 0  # isRedelivery=True のイベント数
+        self.errors = 0  # バックエンドエラー数（フェイルオープン）
+
+    async def filter_events(self, events: Iterable[Any]) -> List[Any]:
+        """既に受信済みのイベントを取り除いたリストを返す"""
+        fresh_events = []
+
+        for event in events:
+            event_id = getattr(event, "webhook_event_id", None)
+            if not event_id:
+                fresh_events.append(event)
+                continue
+
+            delivery_context = getattr(event, "delivery_context", None)
+            if delivery_context is not None and delivery_context.is_redelivery:
+                self.redeliveries += 1
+
+            try:
+                is_new = await self.backend.add_if_absent(compact_event_key(event_id))
+            except Exception as e:
+                # バックエンド障害時は二重処理よりも取りこぼしを避ける
+                self.errors += 1
+                logger.warning(f"Dedup backend error: {type(e).__name__}: {e}")
+                is_new = True
+
+            if is_new:
+                self.misses += 1
+                fresh_events.append(event)
+            else:
+                self.hits += 1
+                logger.info(f"Duplicate event skipped: {event_id}")
+
+        return fresh_events
+
+    async def forget(self, events: Iterable[Any]) -> None:
+        """処理を受け付けられなかったイベントを再送で受け直せるよう登録解除"""
+        for event in events:
+            event_id = getattr(event, "webhook_event_id", None)
+            if not event_id:
+                continue
+            try:
+                await self.backend.discard(compact_event_key(event_id))
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Dedup backend error: {type(e).__name__}: {e}")
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            **self.backend.get_stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate_percent": round(self.hits / lookups * 100, 2) if lookups else 0,
+            "redeliveries": self.redeliveries,
+            "errors": self.errors,
+        }
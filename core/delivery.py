@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import aiohttp
+from linebot.v3.messaging.exceptions import ApiException
+
+from .outbound import push_request
+
+logger = logging.getLogger(__name__)
+
+# 再送・フォールバックの対象とする送信API
+DELIVERY_ENDPOINTS = ("reply", "push", "multicast", "narrowcast", "broadcast")
+# 送信結果の分類
+DELIVERY_OUTCOMES = (
+    "retried",  # 一時的なエラーで再送した
+    "fallback_push",  # リプライトークンが使えずプッシュで送った
+    "deduplicated",  # 再送が 409（同じリトライキーで受付済み）となった
+    "failed",  # 最終的に送れなかった
+)
+
+# X-Line-Retry-Key に対応している送信API（メソッド名 -> エンドポイント名）
+RETRY_KEY_METHODS = {
+    "push_message": "push",
+    "multicast": "multicast",
+    "narrowcast": "narrowcast",
+    "broadcast": "broadcast",
+}
+
+# 処理中のイベント（リプライ失敗時のプッシュ先の特定に使用）
+_current_event: ContextVar[Optional[Any]] = ContextVar("linebot_current_event", default=None)
+
+
+def current_event() -> Optional[Any]:
+    """処理中のイベントを取得"""
+    return _current_event.get()
+
+
+@contextmanager
+def use_event(event: Any) -> Iterator[None]:
+    """イベントを処理中のイベントとして設定"""
+    token = _current_event.set(event)
+    try:
+        yield
+    finally:
+        _current_event.reset(token)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """再送で回復し得るエラーか（5xx・通信エラー・タイムアウト）
+
+    429 は RateLimitedMessagingApi が Retry-After に従って再送するため対象外。
+    """
+    if isinstance(error, ApiException):
+        return not error.status or error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError))
+
+
+# 接続の確立前に失敗した（リクエストがLINEに届いていない）ことが確実な例外
+# ConnectionTimeoutError は接続確立のタイムアウト（aiohttp 3.10 以降）
+UNDELIVERED_ERRORS = (aiohttp.ClientConnectorError, ConnectionRefusedError) + (
+    (aiohttp.ConnectionTimeoutError,) if hasattr(aiohttp, "ConnectionTimeoutError") else ()
+)
+
+
+def is_undelivered_error(error: BaseException) -> bool:
+    """リクエストがLINEに届いていないことが確実なエラーか（接続の失敗）
+
+    5xx・応答待ちのタイムアウト・送信後の切断は、LINE側で受け付け済みの可能性があるため対象外。
+    429 は送信前に拒否されたものだが、RateLimitedMessagingApi が Retry-After に従って再送する。
+    """
+    return isinstance(error, UNDELIVERED_ERRORS)
+
+
+def is_invalid_reply_token(error: BaseException) -> bool:
+    """リプライトークンの期限切れ・使用済みによるエラーか"""
+    if not isinstance(error, ApiException) or error.status != 400:
+        return False
+    body = error.body or b""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    return "Invalid reply token" in body
+
+
+def push_target(event: Any) -> Optional[str]:
+    """イベントの送信元のトーク（グループ・複数人トーク・ユーザー）のID"""
+    source = getattr(event, "source", None)
+    return (
+        getattr(source, "group_id", None)
+        or getattr(source, "room_id", None)
+        or getattr(source, "user_id", None)
+    )
+
+
+class RetryingMessagingApi:
+    """AsyncMessagingApi の再送・フォールバック付きプロキシ
+
+    一時的なエラーは揺らぎ付きの指数バックオフで再送し、プッシュ系の送信には
+    X-Line-Retry-Key を付けて再送による重複を防ぐ。リプライトークンの期限切れ・
+    使用済みの場合は処理中のイベントの送信元へプッシュで送る。
+    リプライはリトライキーに対応していないため、届いていないことが確実な接続の失敗のみ再送する
+    （5xx・タイムアウト後に再送すると、受付済みだった場合に「使用済みのトークン」となり
+    プッシュで同じメッセージを重複して送ってしまうため、再送・フォールバックせずに失敗とする）。
+    それ以外の属性はそのまま元のAPIに委譲する。
+    """
+
+    def __init__(
+        self,
+        api: Any,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        push_fallback: bool = True,
+        reply_token_ttl: float = 60.0,
+    ):
+        self.api = api
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.push_fallback = push_fallback
+        self.reply_token_ttl = reply_token_ttl
+        # (endpoint, outcome) を受け取るコールバック
+        self.on_outcome: Optional[Callable[[str, str], None]] = None
+
+        self.stats: Dict[str, Dict[str, int]] = {
+            endpoint: {"sent": 0, **{outcome: 0 for outcome in DELIVERY_OUTCOMES}}
+            for endpoint in DELIVERY_ENDPOINTS
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.api, name)
+        endpoint = RETRY_KEY_METHODS.get(name)
+        if endpoint is None:
+            return attr
+
+        async def call_with_retry_key(*args, x_line_retry_key: Optional[str] = None, **kwargs):
+            return await self._send_with_retry_key(endpoint, attr, x_line_retry_key, *args, **kwargs)
+
+        setattr(self, name, call_with_retry_key)
+        return call_with_retry_key
+
+    def _record(self, endpoint: str, outcome: str) -> None:
+        self.stats[endpoint][outcome] += 1
+        if self.on_outcome is not None:
+            self.on_outcome(endpoint, outcome)
+
+    def _backoff(self, attempt: int) -> float:
+        """attempt 回目の失敗後の待機時間（full jitter）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def _call(
+        self,
+        endpoint: str,
+        method: Callable,
+        *args,
+        retryable: Callable[[BaseException], bool] = is_transient_error,
+        **kwargs,
+    ) -> Any:
+        """retryable なエラーを max_attempts 回まで再送して呼び出し"""
+        attempt = 0
+        while True:
+            try:
+                result = await method(*args, **kwargs)
+                self.stats[endpoint]["sent"] += 1
+                return result
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.max_attempts or not retryable(e):
+                    raise
+                delay = self._backoff(attempt)
+                self._record(endpoint, "retried")
+                logger.warning(
+                    f"LINE API {endpoint} failed ({type(e).__name__}), "
+                    f"retrying in {delay:.2f}s ({attempt}/{self.max_attempts - 1})"
+                )
+                await asyncio.sleep(delay)
+
+    async def _send_with_retry_key(
+        self,
+        endpoint: str,
+        method: Callable,
+        retry_key: Optional[str],
+        *args,
+        **kwargs,
+    ) -> Any:
+        # 全ての再送で同じリトライキーを使い、LINE側で重複を除外させる
+        retry_key = retry_key or str(uuid.uuid4())
+        try:
+            return await self._call(endpoint, method, *args, x_line_retry_key=retry_key, **kwargs)
+        except ApiException as e:
+            if e.status == 409:
+                # 以前の試行が受け付けられていた（再送分は送信されない）
+                self._record(endpoint, "deduplicated")
+                self.stats[endpoint]["sent"] += 1
+                return None
+            self._record(endpoint, "failed")
+            raise
+        except Exception:
+            self._record(endpoint, "failed")
+            raise
+
+    def _reply_token_expired(self, event: Any) -> bool:
+        timestamp = getattr(event, "timestamp", None)
+        return bool(timestamp) and time.time() - timestamp / 1000 >= self.reply_token_ttl
+
+    async def _fallback_to_push(self, reply_request: Any, event: Any, **kwargs) -> Any:
+        target = push_target(event)
+        self._record("reply", "fallback_push")
+        logger.info(f"Reply token unusable, falling back to push ({type(event).__name__})")
+        request = push_request(
+            to=target,
+            messages=reply_request.messages,
+            notification_disabled=reply_request.notification_disabled,
+        )
+        return await self._send_with_retry_key(
+            "push", self.api.push_message, None, request, **kwargs
+        )
+
+    async def reply_message(self, reply_message_request: Any, **kwargs) -> Any:
+        event = current_event()
+        can_fallback = (
+            self.push_fallback
+            and event is not None
+            and getattr(event, "reply_token", None) == reply_message_request.reply_token
+            and push_target(event) is not None
+        )
+
+        # 期限切れが明らかなトークンはリプライを試さない
+        if can_fallback and self._reply_token_expired(event):
+            return await self._fallback_to_push(reply_message_request, event, **kwargs)
+
+        try:
+            return await self._call(
+                "reply",
+                self.api.reply_message,
+                reply_message_request,
+                retryable=is_undelivered_error,
+                **kwargs,
+            )
+        except Exception as e:
+            # 再送は届いていない場合のみのため、ここでの無効なトークンは以前の試行による使用ではない
+            if can_fallback and is_invalid_reply_token(e):
+                return await self._fallback_to_push(reply_message_request, event, **kwargs)
+            self._record("reply", "failed")
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_attempts": self.max_attempts,
+            "push_fallback": self.push_fallback,
+            "endpoints": self.stats,
+        }
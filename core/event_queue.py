@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# キュー満杯時の振る舞い
+BACKPRESSURE_REJECT = "reject"  # 即座に拒否（LINE側の再送に任せる）
+BACKPRESSURE_WAIT = "wait"  # 空きが出るまで一定時間待機してから拒否
+BACKPRESSURE_MODES = {BACKPRESSURE_REJECT, BACKPRESSURE_WAIT}
+
+
+class EventQueueFullError(Exception):
+    """イベントキューが満杯で受け付けられない場合の例外"""
+
+
+class EventDispatcher:
+    """有界キューと固定数のワーカーでイベントバッチを処理するディスパッチャー"""
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any], float, Any], Awaitable[None]],
+        max_size: int = 1000,
+        worker_count: int = 4,
+        backpressure: str = BACKPRESSURE_REJECT,
+        put_timeout: float = 1.0,
+    ):
+        if backpressure not in BACKPRESSURE_MODES:
+            raise ValueError(f"Unknown backpressure mode: {backpressure}")
+
+        self.handler = handler
+        self.max_size = max_size
+        self.worker_count = max(1, worker_count)
+        self.backpressure = backpressure
+        self.put_timeout = put_timeout
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._workers: List[asyncio.Task] = []
+        self._accepting = False
+
+        # キューの統計情報
+        self.stats = {
+            "enqueued_batches": 0,
+            "processed_batches": 0,
+            "rejected_batches": 0,
+            "active_batches": 0,
+            "max_depth": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0,
+        }
+
+    @property
+    def depth(self) -> int:
+        """現在キューに滞留しているバッチ数"""
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        """ワーカーを起動してキューの受付を開始"""
+        if self._workers:
+            return
+
+        self._accepting = True
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"event-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        logger.info(
+            f"Event dispatcher started: {self.worker_count} workers, "
+            f"queue size {self.max_size}, backpressure={self.backpressure}"
+        )
+
+    async def submit(self, events: List[Any], start_time: float, context: Any = None) -> None:
+        """イベントバッチをキューに投入（満杯時は EventQueueFullError）
+
+        context はそのままハンドラーに渡される（トレースの親スパンなどの引き継ぎ用）
+        """
+        if not self._accepting:
+            raise EventQueueFullError("Event dispatcher is not accepting events")
+
+        item = (events, start_time, context, time.perf_counter())
+
+        try:
+            if self.backpressure == BACKPRESSURE_WAIT:
+                await asyncio.wait_for(self._queue.put(item), self.put_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            self.stats["rejected_batches"] += 1
+            raise EventQueueFullError(
+                f"Event queue is full ({self.max_size} batches)"
+            ) from None
+
+        self.stats["enqueued_batches"] += 1
+        depth = self._queue.qsize()
+        if depth > self.stats["max_depth"]:
+            self.stats["max_depth"] = depth
+
+    async def _worker(self, worker_id: int) -> None:
+        """キューからバッチを取り出して順に処理するワーカー"""
+        while True:
+            events, start_time, context, enqueued_at = await self._queue.get()
+
+            # キュー待機時間の記録
+            wait_time = time.perf_counter() - enqueued_at
+            self.stats["total_wait_time"] += wait_time
+            if wait_time > self.stats["max_wait_time"]:
+                self.stats["max_wait_time"] = wait_time
+
+            self.stats["active_batches"] += 1
+            try:
+                await self.handler(events, start_time, context)
+            except Exception as e:
+                logger.error(
+                    f"Event worker {worker_id} error: {type(e).__name__}: {e}"
+                )
+            finally:
+                self.stats["active_batches"] -= 1
+                self.stats["processed_batches"] += 1
+                self._queue.task_done()
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """新規受付を停止し、滞留中のバッチを処理し終えてからワーカーを停止"""
+        self._accepting = False
+
+        if self._workers:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Event queue drain timed out: {self._queue.qsize()} batches left"
+                )
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """キュー深さ・待機時間などの統計を取得"""
+        processed = self.stats["processed_batches"]
+        avg_wait_time = self.stats["total_wait_time"] / processed if processed else 0
+
+        return {
+            "depth": self._queue.qsize(),
+            "max_size": self.max_size,
+            "worker_count": self.worker_count,
+            "backpressure": self.backpressure,
+            "enqueued_batches": self.stats["enqueued_batches"],
+            "processed_batches": processed,
+            "rejected_batches": self.stats["rejected_batches"],
+            "active_batches": self.stats["active_batches"],
+            "max_depth": self.stats["max_depth"],
+            "avg_wait_time_ms": round(avg_wait_time * 1000, 2),
+            "max_wait_time_ms": round(self.stats["max_wait_time"] * 1000, 2),
+        }
@@ -0,0 +1,508 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from json.encoder import encode_basestring
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from linebot.v3.messaging import FlexBox, Message, TextMessage
+from pydantic.v1 import BaseModel, PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+# LINEのメッセージの上限
+# https://developers.line.biz/ja/reference/messaging-api/#flex-message
+FLEX_MESSAGE_MAX_BYTES = 30 * 1024  # バブル1つのJSON（送信するUTF-8のバイト数で判定）
+FLEX_ALT_TEXT_MAX_CHARS = 1500
+TEXT_MESSAGE_MAX_CHARS = 5000
+
+# 切り詰めた文字列の末尾
+ELLIPSIS = "…"
+
+
+def utf8_size(text: str) -> int:
+    """UTF-8 でのバイト数"""
+    return len(text) if text.isascii() else len(text.encode())
+
+
+class PayloadTooLarge(ValueError):
+    """縮小しても上限に収まらないメッセージ"""
+
+    def __init__(self, name: str, size: int, max_bytes: int):
+        super().__init__(f"Template '{name}' rendered {size} bytes (limit {max_bytes})")
+        self.size = size
+        self.max_bytes = max_bytes
+
+
+class PrecompiledMessage(Message):
+    """生成・検証・シリアライズ済みのメッセージ
+
+    送信時は保持しているJSON表現をそのまま使い、モデルの再構築や検証を行わない。
+    ReplyMessageRequest 等の messages にそのまま渡せる。
+    """
+
+    _payload: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    _json: str = PrivateAttr()
+    _size: Optional[int] = PrivateAttr(default=None)
+
+    @classmethod
+    def from_message(cls, message: Message) -> "PrecompiledMessage":
+        """SDKのメッセージモデルをシリアライズして固定"""
+        return cls.from_payload(message.to_dict())
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "PrecompiledMessage":
+        """シリアライズ済みの表現から作成（内容は検証しない）"""
+        precompiled = cls.from_serialized(json.dumps(payload, ensure_ascii=False), payload["type"])
+        precompiled._payload = payload
+        return precompiled
+
+    @classmethod
+    def from_serialized(
+        cls, json_text: str, message_type: str, size: Optional[int] = None
+    ) -> "PrecompiledMessage":
+        """JSON文字列から作成（内容は検証せず、辞書への変換も必要になるまで行わない）"""
+        precompiled = cls.construct(type=message_type)
+        precompiled._json = json_text
+        precompiled._size = size
+        return precompiled
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        return self.to_dict()
+
+    @property
+    def size(self) -> int:
+        """JSONの UTF-8 でのバイト数"""
+        if self._size is None:
+            self._size = utf8_size(self._json)
+        return self._size
+
+    def to_dict(self) -> Dict[str, Any]:
+        # 共有している表現を返すため、呼び出し側で変更しないこと
+        # （描画したメッセージは通常1回しか送信しないため、変換結果は保持しない）
+        if self._payload is None:
+            return json.loads(self._json)
+        return self._payload
+
+    def to_json(self) -> str:
+        return self._json
+
+
+class StaticMessageCache:
+    """内容が固定のメッセージを一度だけ生成してシリアライズ済みの形で使い回すキャッシュ"""
+
+    def __init__(self):
+        self._messages: Dict[str, PrecompiledMessage] = {}
+
+        self.stats = {"hits": 0, "builds": 0, "build_time_total": 0.0}
+
+    def get(self, name: str, builder: Callable[[], Message]) -> PrecompiledMessage:
+        """name のメッセージを取得（未生成なら builder で生成）"""
+        message = self._messages.get(name)
+        if message is not None:
+            self.stats["hits"] += 1
+            return message
+
+        started = time.perf_counter()
+        message = self._messages[name] = PrecompiledMessage.from_message(builder())
+        self.stats["builds"] += 1
+        self.stats["build_time_total"] += time.perf_counter() - started
+        logger.debug(f"Static message compiled: {name} ({len(message.to_json())} chars)")
+        return message
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "templates": {name: len(message.to_json()) for name, message in self._messages.items()},
+            "hits": self.stats["hits"],
+            "builds": self.stats["builds"],
+            "build_time_ms": round(self.stats["build_time_total"] * 1000, 3),
+        }
+
+
+# スロットの目印（私用領域の文字で囲むため、JSON化してもエスケープされず値とも衝突しない）
+SLOT_START = "\ue000"
+SLOT_END = "\ue001"
+FRAGMENT_MARK = "@"
+
+_SLOT_PATTERN = re.compile(f"{SLOT_START}({FRAGMENT_MARK}?)([^{SLOT_END}]+){SLOT_END}")
+
+
+class Fragment(str):
+    """描画済みのFlexコンポーネント（JSON文字列）。fragment_slot に差し込む
+
+    size は UTF-8 でのバイト数（差し込み先での再計算を避けるため描画時に保持）。
+    """
+
+    size: int
+
+    def __new__(cls, text: str, size: Optional[int] = None) -> "Fragment":
+        fragment = super().__new__(cls, text)
+        fragment.size = utf8_size(text) if size is None else size
+        return fragment
+
+
+def text_slot(name: str) -> str:
+    """文字列の値を差し込む位置（"{slot} 件" のように文字列の一部にも使える）"""
+    return f"{SLOT_START}{name}{SLOT_END}"
+
+
+_placeholder_types: Dict[Type[BaseModel], Type[BaseModel]] = {}
+
+
+def fragment_slot(name: str, model: Type[BaseModel] = FlexBox) -> Any:
+    """描画済みの部品を差し込む位置（リストの要素・モデルのプロパティとして使う）
+
+    差し込む値が None・空リストの場合は、要素・プロパティごと省略される。
+    model はSDKの型検証を通すための型（FlexBubble.footer なら FlexBox）。
+    """
+    placeholder_type = _placeholder_types.get(model)
+    if placeholder_type is None:
+
+        class Placeholder(model):
+            _marker: str = PrivateAttr()
+
+            def to_dict(self):
+                return self._marker
+
+        Placeholder.__name__ = f"{model.__name__}Slot"
+        placeholder_type = _placeholder_types[model] = Placeholder
+
+    placeholder = placeholder_type.construct()
+    placeholder._marker = f"{SLOT_START}{FRAGMENT_MARK}{name}{SLOT_END}"
+    return placeholder
+
+
+class _TextSlot:
+    __slots__ = ("name", "max_chars")
+
+    def __init__(self, name: str):
+        self.name = name
+        # 文字数の上限（altText 内のスロット。超える値は末尾を切り詰めて差し込む）
+        self.max_chars: Optional[int] = None
+
+    def overflows(self, value: Any) -> bool:
+        return self.max_chars is not None and isinstance(value, str) and len(value) > self.max_chars
+
+    def render(self, value: Any) -> Tuple[str, int]:
+        if not isinstance(value, str):
+            raise TypeError(f"Slot '{self.name}' expects str, got {type(value).__name__}")
+        if self.overflows(value):
+            value = value[: self.max_chars - len(ELLIPSIS)] + ELLIPSIS
+        text = encode_basestring(value)[1:-1]
+        return text, utf8_size(text)
+
+
+class _FragmentSlot:
+    """部品の差し込み位置。省略時に消す区切りのカンマ・プロパティ名を含めて置き換える"""
+
+    __slots__ = ("name", "prefix", "comma", "overhead")
+
+    def __init__(self, name: str, prefix: str, comma: str):
+        self.name = name
+        self.prefix = prefix  # プロパティの場合は '"footer":'
+        self.comma = comma  # "before" / "after" / ""（単独の要素）
+        self.overhead = utf8_size(prefix) + (1 if comma else 0)
+
+    def render(self, value: Any) -> Tuple[str, int]:
+        if isinstance(value, (list, tuple)):
+            if not value:
+                return "", 0
+            size = sum(_fragment_size(fragment) for fragment in value) + len(value) - 1
+            value = ",".join(value)
+        elif isinstance(value, Fragment):
+            size = value.size
+        elif value is not None:
+            raise TypeError(f"Slot '{self.name}' expects Fragment, got {type(value).__name__}")
+        if not value:
+            return "", 0
+        size += self.overhead
+        if self.comma == "before":
+            return f",{self.prefix}{value}", size
+        if self.comma == "after":
+            return f"{self.prefix}{value},", size
+        return f"{self.prefix}{value}", size
+
+
+def _fragment_size(fragment: str) -> int:
+    return fragment.size if isinstance(fragment, Fragment) else utf8_size(fragment)
+
+
+_ALT_TEXT_PATTERN = re.compile(r'"altText":"((?:[^"\\]|\\.)*)"')
+
+
+def _limit_alt_text(text: str, slots: List[Any], slot_starts: List[int]) -> None:
+    """altText 内のテキストのスロットに、altText 全体が上限に収まる文字数の上限を設定"""
+    match = _ALT_TEXT_PATTERN.search(text)
+    if match is None:
+        return
+    start, end = match.span(1)
+    alt_slots = [
+        slot
+        for slot, slot_start in zip(slots, slot_starts)
+        if isinstance(slot, _TextSlot) and start <= slot_start < end
+    ]
+    if not alt_slots:
+        return
+    # 固定部分の文字数（エスケープを戻して数える）を除いた残りを各スロットで等分
+    fixed_chars = len(_SLOT_PATTERN.sub("", json.loads(f'"{match.group(1)}"')))
+    max_chars = (FLEX_ALT_TEXT_MAX_CHARS - fixed_chars) // len(alt_slots)
+    if max_chars <= len(ELLIPSIS):
+        raise ValueError(f"altText has no room for slot values ({fixed_chars} fixed chars)")
+    for slot in alt_slots:
+        slot.max_chars = max_chars
+
+
+def _compile(text: str) -> Tuple[List[str], List[Any]]:
+    """スロットの目印を含むJSONを固定部分とスロットに分割"""
+    pieces: List[str] = []
+    slots: List[Any] = []
+    slot_starts: List[int] = []
+    position = 0
+    previous_end = -1
+
+    for match in _SLOT_PATTERN.finditer(text):
+        start, end = match.span()
+        is_fragment, name = match.groups()
+        if not is_fragment:
+            pieces.append(text[position:start])
+            slots.append(_TextSlot(name))
+            slot_starts.append(start)
+            position = end
+            continue
+
+        # 値全体（引用符を含む）を置き換える
+        start, end = start - 1, end + 1
+        if text[start] != '"' or text[end - 1] != '"':
+            raise ValueError(f"Fragment slot '{name}' must be a whole value")
+
+        prefix = ""
+        if text[start - 1] == ":":
+            key_start = text.rfind('"', 0, text.rfind('"', 0, start - 1))
+            prefix = text[key_start:start]
+            start = key_start
+
+        if text[start - 1] == "," and start - 1 >= position:
+            start, comma = start - 1, "before"
+        elif text[end] == ",":
+            end, comma = end + 1, "after"
+        else:
+            comma = ""
+        if start == previous_end and slots and slots[-1].comma == "after":
+            # 省略可能な部品が先頭から連続すると区切りを決められない
+            raise ValueError(f"Fragment slot '{name}' follows another leading fragment slot")
+
+        pieces.append(text[position:start])
+        slots.append(_FragmentSlot(name, prefix, comma))
+        slot_starts.append(start)
+        position = previous_end = end
+
+    pieces.append(text[position:])
+    _limit_alt_text(text, slots, slot_starts)
+    return pieces, slots
+
+
+class FlexTemplate:
+    """Flexのレイアウトを一度だけJSONの骨格にコンパイルし、値を差し込んで描画するテンプレート
+
+    builder は text_slot / fragment_slot を値の代わりに使ってSDKのモデルを組み立てる関数で、
+    コンパイル時に一度だけ呼ばれる（モデルによる構造の検証もこの時のみ）。
+    描画時はエスケープした文字列と描画済みの部品を骨格に連結するだけで、モデルは生成しない。
+    連結と同時に UTF-8 でのバイト数を積算するため、サイズの確認にJSONの再計算は要らない。
+    """
+
+    def __init__(self, name: str, builder: Callable[[], BaseModel]):
+        started = time.perf_counter()
+        model = builder()
+        self.name = name
+        # メッセージ（FlexMessage）なら送信用、それ以外は部品用
+        self.message_type: Optional[str] = model.type if isinstance(model, Message) else None
+        serialized = json.dumps(model.to_dict(), ensure_ascii=False, separators=(",", ":"))
+        self._pieces, self._slots = _compile(serialized)
+        self.slot_names = frozenset(slot.name for slot in self._slots)
+        # スロットの出現回数（同じ値が複数箇所に入る場合の切り詰め量の計算に使用）
+        self.slot_counts = Counter(slot.name for slot in self._slots)
+        # altText の上限（FLEX_ALT_TEXT_MAX_CHARS）に合わせて切り詰めるスロット
+        self._alt_text_slots = [
+            slot for slot in self._slots if isinstance(slot, _TextSlot) and slot.max_chars is not None
+        ]
+        self.skeleton_bytes = sum(utf8_size(piece) for piece in self._pieces)
+        self.compile_time = time.perf_counter() - started
+        self.renders = 0
+        self.max_rendered_bytes = 0
+        self.compactions = 0
+        self.fallbacks = 0
+
+    def _render_parts(self, values: Dict[str, Any]) -> Tuple[List[str], int]:
+        """連結前の断片と、連結後の UTF-8 でのバイト数"""
+        pieces = self._pieces
+        parts = [pieces[0]]
+        size = self.skeleton_bytes
+        try:
+            for slot, piece in zip(self._slots, pieces[1:]):
+                text, slot_size = slot.render(values[slot.name])
+                parts.append(text)
+                parts.append(piece)
+                size += slot_size
+        except KeyError as e:
+            raise KeyError(f"Template '{self.name}' is missing slot value {e}") from None
+        self.renders += 1
+        if size > self.max_rendered_bytes:
+            self.max_rendered_bytes = size
+        return parts, size
+
+    def render(self, **values: Any) -> str:
+        """スロットに値を差し込んだJSON文字列"""
+        parts, _ = self._render_parts(values)
+        return "".join(parts)
+
+    def render_message(self, **values: Any) -> PrecompiledMessage:
+        """送信用のメッセージとして描画"""
+        if self.message_type is None:
+            raise TypeError(f"Template '{self.name}' is not a message template")
+        parts, size = self._render_parts(values)
+        return PrecompiledMessage.from_serialized("".join(parts), self.message_type, size)
+
+    def render_fitted_message(
+        self,
+        values: Dict[str, Any],
+        compactions: Sequence["Compaction"] = (),
+        fallback: Optional[Callable[[], Message]] = None,
+        max_bytes: int = FLEX_MESSAGE_MAX_BYTES,
+    ) -> Message:
+        """max_bytes に収まるように送信用のメッセージとして描画
+
+        超える場合は compactions を先頭から順に、収まるか適用できなくなるまで繰り返し適用する。
+        全て適用しても収まらない場合は fallback() のメッセージ（未指定なら PayloadTooLarge）。
+        altText が FLEX_ALT_TEXT_MAX_CHARS を超える場合は、altText 内の値のみ切り詰めて縮小として数える。
+        上限内であれば通常の描画と同じく1回の連結で済む。
+        """
+        if self.message_type is None:
+            raise TypeError(f"Template '{self.name}' is not a message template")
+        parts, size = self._render_parts(values)
+        alt_text_overflow = any(slot.overflows(values.get(slot.name)) for slot in self._alt_text_slots)
+        if size <= max_bytes and alt_text_overflow:
+            self.compactions += 1
+            logger.info(
+                f"Flex altText truncated: {self.name} (limit {FLEX_ALT_TEXT_MAX_CHARS} chars)"
+            )
+        elif size > max_bytes:
+            original_size = size
+            for compaction in compactions:
+                while size > max_bytes:
+                    compacted = compaction(self, values, size - max_bytes)
+                    if compacted is None:
+                        break
+                    values = compacted
+                    parts, size = self._render_parts(values)
+
+            if size > max_bytes:
+                self.fallbacks += 1
+                logger.warning(
+                    f"Flex message too large: {self.name} ({size} bytes after compaction, "
+                    f"{original_size} before, limit {max_bytes})"
+                )
+                if fallback is None:
+                    raise PayloadTooLarge(self.name, size, max_bytes)
+                return fallback()
+
+            self.compactions += 1
+            logger.info(f"Flex message compacted: {self.name} ({original_size} -> {size} bytes)")
+        return PrecompiledMessage.from_serialized("".join(parts), self.message_type, size)
+
+    def render_fragment(self, **values: Any) -> Fragment:
+        """他のテンプレートに差し込む部品として描画"""
+        parts, size = self._render_parts(values)
+        return Fragment("".join(parts), size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "slots": len(self._slots),
+            "skeleton_chars": sum(len(piece) for piece in self._pieces),
+            "skeleton_bytes": self.skeleton_bytes,
+            "compile_time_ms": round(self.compile_time * 1000, 3),
+            "renders": self.renders,
+            "max_rendered_bytes": self.max_rendered_bytes,
+            "compactions": self.compactions,
+            "fallbacks": self.fallbacks,
+        }
+
+
+# 上限を超えた描画を縮小する処理: (テンプレート, スロットの値, 超過バイト数) -> 縮小後の値
+# （これ以上縮小できない場合は None）
+Compaction = Callable[[FlexTemplate, Dict[str, Any], int], Optional[Dict[str, Any]]]
+
+
+def _escaped_size(char: str) -> int:
+    return utf8_size(encode_basestring(char)[1:-1])
+
+
+def truncate_text(name: str, min_chars: int = 20) -> Compaction:
+    """テキストのスロット name を超過分だけ末尾から切り詰める（min_chars 文字までは残す）"""
+    ellipsis_size = utf8_size(ELLIPSIS)
+
+    def compact(template: FlexTemplate, values: Dict[str, Any], excess: int) -> Optional[Dict[str, Any]]:
+        value = values.get(name)
+        if not isinstance(value, str) or len(value) <= min_chars:
+            return None
+        # 同じ値が複数箇所に入る場合は1箇所あたりの削減量で足りる
+        occurrences = template.slot_counts.get(name, 1)
+        target = -(-excess // occurrences) + ellipsis_size
+        end = len(value)
+        removed = 0
+        while end > min_chars and removed < target:
+            end -= 1
+            removed += _escaped_size(value[end])
+        truncated = value[:end] + ELLIPSIS
+        if truncated == value:
+            # 切り詰め済み（min_chars 文字）
+            return None
+        return {**values, name: truncated}
+
+    return compact
+
+
+def drop_fragment(name: str) -> Compaction:
+    """部品のスロット name を省略する（リストの場合は最も大きい部品から1つずつ）"""
+
+    def compact(template: FlexTemplate, values: Dict[str, Any], excess: int) -> Optional[Dict[str, Any]]:
+        value = values.get(name)
+        if not value:
+            return None
+        if isinstance(value, (list, tuple)):
+            largest = max(range(len(value)), key=lambda index: _fragment_size(value[index]))
+            return {**values, name: [*value[:largest], *value[largest + 1 :]]}
+        return {**values, name: None}
+
+    return compact
+
+
+def text_fallback(text: str) -> TextMessage:
+    """Flexメッセージの代わりに送るテキストメッセージ（文字数の上限で切り詰める）"""
+    if len(text) > TEXT_MESSAGE_MAX_CHARS:
+        text = text[: TEXT_MESSAGE_MAX_CHARS - len(ELLIPSIS)] + ELLIPSIS
+    return TextMessage(text=text)
+
+
+class FlexTemplateRegistry:
+    """名前ごとに一度だけコンパイルしたテンプレートを共有するレジストリ"""
+
+    def __init__(self):
+        self._templates: Dict[str, FlexTemplate] = {}
+
+    def get(self, name: str, builder: Callable[[], BaseModel]) -> FlexTemplate:
+        """name のテンプレートを取得（未コンパイルなら builder からコンパイル）"""
+        template = self._templates.get(name)
+        if template is None:
+            template = self._templates[name] = FlexTemplate(name, builder)
+            logger.debug(f"Flex template compiled: {name} ({len(template.slot_names)} slots)")
+        return template
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {name: template.get_stats() for name, template in self._templates.items()}
+
+
+# プロセス全体で共有するキャッシュ・テンプレート（ハンドラーの初期化時に生成）
+static_messages = StaticMessageCache()
+flex_templates = FlexTemplateRegistry()
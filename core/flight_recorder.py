@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 記録するエラーメッセージの最大長
+MAX_ERROR_MESSAGE_LENGTH = 200
+
+# エラーメッセージから除去する個人情報らしき文字列
+_REDACTION_PATTERNS = (
+    (re.compile(r"\b[UCR][0-9a-f]{32}\b"), "[line-id]"),
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "[email]"),
+    (re.compile(r"\+?\d[\d-]{8,}\d"), "[number]"),
+    (re.compile(r"\b[0-9a-zA-Z]{32,}\b"), "[token]"),
+)
+
+
+def redact_text(text: str) -> str:
+    """LINEのID・メールアドレス・電話番号・トークンらしき文字列を伏せ字にして短縮"""
+    for pattern, replacement in _REDACTION_PATTERNS:
+        text = pattern.sub(replacement, text)
+    if len(text) > MAX_ERROR_MESSAGE_LENGTH:
+        text = text[:MAX_ERROR_MESSAGE_LENGTH] + "..."
+    return text
+
+
+class FlightRecorder:
+    """遅延・失敗したイベントの直近 capacity 件を保持する固定長リングバッファ
+
+    記録するのは許可したフィールドのみで、ユーザーID等はプロセスごとのランダムな鍵で
+    ハッシュ化する（同一プロセス内での突き合わせは可能だが元のIDには戻せない）。
+    """
+
+    def __init__(self, capacity: int = 200, slow_threshold: float = 1.0):
+        self.capacity = max(1, capacity)
+        self.slow_threshold = slow_threshold
+        self._buffer: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self._next = 0
+        self._hash_key = os.urandom(16)
+
+        self.stats = {
+            "recorded": 0,
+            "overwritten": 0,
+            "slow": 0,
+            "failed": 0,
+        }
+
+    def should_record(self, total_time: float, failed: bool) -> bool:
+        return failed or total_time >= self.slow_threshold
+
+    def anonymize(self, value: Optional[str]) -> Optional[str]:
+        """IDをプロセス固有の鍵付きハッシュに置き換え"""
+        if not value:
+            return None
+        digest = hashlib.blake2b(value.encode(), digest_size=6, key=self._hash_key)
+        return digest.hexdigest()
+
+    def record(
+        self,
+        event: Any,
+        handler: Optional[str],
+        timings: Dict[str, float],
+        error: Optional[BaseException] = None,
+        **extra: Any,
+    ) -> None:
+        """イベント1件分の記録を追加（最も古い記録を上書き）"""
+        source = getattr(event, "source", None)
+        message = getattr(event, "message", None)
+        entry = {
+            "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "event_type": type(event).__name__,
+            "message_type": type(message).__name__ if message is not None else None,
+            "source_type": getattr(source, "type", None),
+            "source_hash": self.anonymize(
+                getattr(source, "group_id", None)
+                or getattr(source, "room_id", None)
+                or getattr(source, "user_id", None)
+            ),
+            "handler": handler,
+            "timings_ms": {name: round(value * 1000, 3) for name, value in timings.items()},
+            "error_class": type(error).__name__ if error is not None else None,
+            "error_message": redact_text(str(error)) if error is not None else None,
+            **extra,
+        }
+
+        if self._buffer[self._next] is not None:
+            self.stats["overwritten"] += 1
+        self._buffer[self._next] = entry
+        self._next = (self._next + 1) % self.capacity
+
+        self.stats["recorded"] += 1
+        self.stats["failed" if error is not None else "slow"] += 1
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """新しい順に記録を取得"""
+        ordered = self._buffer[self._next :] + self._buffer[: self._next]
+        result = [entry for entry in reversed(ordered) if entry is not None]
+        return result[:limit] if limit is not None else result
+
+    def dump(self, path: str) -> int:
+        """全記録をJSONファイルに書き出し、書き出した件数を返す"""
+        entries = self.entries()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"pid": os.getpid(), "stats": self.get_stats(), "entries": entries},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        return len(entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "slow_threshold_ms": round(self.slow_threshold * 1000, 1),
+            "size": sum(1 for entry in self._buffer if entry is not None),
+            **self.stats,
+        }
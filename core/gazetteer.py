@@ -0,0 +1,241 @@
+import csv
+import heapq
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+# 同梱の地名辞書（市区町村・政令指定都市の区・鉄道駅・都道府県庁）
+# 作成方法・出典は core/data/README.md を参照
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "jp_gazetteer.csv")
+
+# 地名の種類
+PLACE_KINDS = ("municipality", "ward", "station", "landmark")
+CITY_KINDS = ("municipality", "ward")
+
+Vector = Tuple[float, float, float]
+
+
+class Place(NamedTuple):
+    name: str
+    kind: str
+    prefecture: str
+    municipality: str  # 所在する市区町村（市区町村自身の場合は同じ名前）
+    latitude: float
+    longitude: float
+
+    @property
+    def display_name(self) -> str:
+        """都道府県名を付けた表示名（同名の市町村・駅を区別するため）"""
+        return f"{self.prefecture}{self.name}"
+
+
+def to_unit_vector(latitude: float, longitude: float) -> Vector:
+    """緯度経度を地球中心からの単位ベクトルに変換"""
+    lat = math.radians(latitude)
+    lng = math.radians(longitude)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lng), cos_lat * math.sin(lng), math.sin(lat))
+
+
+def chord_to_km(chord: float) -> float:
+    """単位ベクトル間の距離（弦の長さ）を大円距離（km）に変換"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(distance_km: float) -> float:
+    return 2 * math.sin(min(math.pi / 2, distance_km / (2 * EARTH_RADIUS_KM)))
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """2点間の大円距離（km）"""
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    a = (
+        math.sin(dlat / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class KDTree:
+    """3次元の点（単位ベクトル）の KD-tree
+
+    球面上の距離の大小は弦の長さ（ユークリッド距離）の大小と一致するため、
+    緯度経度のまま扱う場合と違い経度の折り返し・高緯度での歪みを考慮せずに最近傍を探索できる。
+    ノードは配列上に暗黙に配置し（範囲の中央がそのノード）、分割軸は範囲内で最も広がりの大きい軸。
+    各ノードは部分木の点を囲む箱を持ち、箱までの距離が現在の k 番目より遠い部分木は探索しない
+    （地名は球面の一部に偏っているため、日本から遠い地点の検索でも大半の部分木を枝刈りできる）。
+    """
+
+    def __init__(self, points: Sequence[Vector]):
+        self._points = list(points)
+        size = len(self._points)
+        # 配列上の位置 -> 元の点のインデックス・分割軸
+        self._order = list(range(size))
+        self._axes = [0] * size
+        # 配列上の位置 -> 部分木の点を囲む箱 (最小値, 最大値)
+        self._boxes: List[Tuple[Vector, Vector]] = [((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))] * size
+
+        stack = [(0, size)]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= 0:
+                continue
+            indices = self._order[lo:hi]
+            lows = tuple(min(self._points[i][a] for i in indices) for a in range(3))
+            highs = tuple(max(self._points[i][a] for i in indices) for a in range(3))
+            axis = max(range(3), key=lambda a: highs[a] - lows[a])
+            indices.sort(key=lambda i: self._points[i][axis])
+            self._order[lo:hi] = indices
+            mid = (lo + hi) // 2
+            self._axes[mid] = axis
+            self._boxes[mid] = (lows, highs)
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def query(
+        self, point: Vector, k: int = 1, max_distance: Optional[float] = None
+    ) -> List[Tuple[float, int]]:
+        """point に近い k 点の (弦の長さ, 元のインデックス)（近い順）"""
+        if k <= 0 or not self._points:
+            return []
+        points = self._points
+        order = self._order
+        axes = self._axes
+        boxes = self._boxes
+        px, py, pz = point
+        # 見つかった近傍（距離の2乗の符号を反転した最大ヒープ）
+        best: List[Tuple[float, int]] = []
+        bound = math.inf if max_distance is None else max_distance * max_distance
+
+        # 探索する配列上の範囲（近い側の部分木を先に取り出すよう、遠い側から積む）
+        stack = [(0, len(points))]
+        while stack:
+            lo, hi = stack.pop()
+            mid = (lo + hi) // 2
+            (lx, ly, lz), (hx, hy, hz) = boxes[mid]
+            dx = lx - px if px < lx else (px - hx if px > hx else 0.0)
+            dy = ly - py if py < ly else (py - hy if py > hy else 0.0)
+            dz = lz - pz if pz < lz else (pz - hz if pz > hz else 0.0)
+            if dx * dx + dy * dy + dz * dz > bound:
+                continue
+            index = order[mid]
+            x, y, z = points[index]
+            distance = (x - px) ** 2 + (y - py) ** 2 + (z - pz) ** 2
+            if distance <= bound:
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, index))
+                else:
+                    heapq.heappushpop(best, (-distance, index))
+                if len(best) == k:
+                    bound = min(bound, -best[0][0])
+
+            axis = axes[mid]
+            if point[axis] < points[index][axis]:
+                near, far = (lo, mid), (mid + 1, hi)
+            else:
+                near, far = (mid + 1, hi), (lo, mid)
+            if far[0] < far[1]:
+                stack.append(far)
+            if near[0] < near[1]:
+                stack.append(near)
+
+        return sorted((math.sqrt(-negative), index) for negative, index in best)
+
+
+class Gazetteer:
+    """地名辞書と、地名の種類ごとの KD-tree による最近傍検索"""
+
+    def __init__(self, places: Sequence[Place]):
+        started = time.perf_counter()
+        self.places = list(places)
+        self._trees: Dict[str, Tuple[KDTree, List[Place]]] = {}
+        by_kind: Dict[str, List[Place]] = {}
+        for place in self.places:
+            by_kind.setdefault(place.kind, []).append(place)
+        for kind, kind_places in by_kind.items():
+            tree = KDTree([to_unit_vector(p.latitude, p.longitude) for p in kind_places])
+            self._trees[kind] = (tree, kind_places)
+        self.build_time = time.perf_counter() - started
+        self.queries = 0
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_GAZETTEER_PATH) -> "Gazetteer":
+        """CSV（name, kind, prefecture, municipality, latitude, longitude）から読み込み"""
+        with open(path, encoding="utf-8", newline="") as f:
+            places = [
+                Place(
+                    row["name"],
+                    row["kind"],
+                    row["prefecture"],
+                    row["municipality"],
+                    float(row["latitude"]),
+                    float(row["longitude"]),
+                )
+                for row in csv.DictReader(f)
+            ]
+        gazetteer = cls(places)
+        logger.info(
+            f"Gazetteer loaded: {len(places)} places ({gazetteer.build_time * 1000:.1f}ms)"
+        )
+        return gazetteer
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 1,
+        kinds: Optional[Iterable[str]] = None,
+        max_distance_km: Optional[float] = None,
+    ) -> List[Tuple[Place, float]]:
+        """近い k 件の (地名, 距離km)（近い順、kinds で種類を限定）"""
+        self.queries += 1
+        point = to_unit_vector(latitude, longitude)
+        max_chord = None if max_distance_km is None else km_to_chord(max_distance_km)
+        found: List[Tuple[float, Place]] = []
+        for kind in kinds if kinds is not None else self._trees:
+            entry = self._trees.get(kind)
+            if entry is None:
+                continue
+            tree, kind_places = entry
+            found.extend((chord, kind_places[index]) for chord, index in tree.query(point, k, max_chord))
+        found.sort(key=lambda item: item[0])
+        return [(place, chord_to_km(chord)) for chord, place in found[:k]]
+
+    def nearest_one(
+        self,
+        latitude: float,
+        longitude: float,
+        kinds: Optional[Iterable[str]] = None,
+        max_distance_km: Optional[float] = None,
+    ) -> Optional[Tuple[Place, float]]:
+        """最も近い地名と距離（km）。該当が無ければ None"""
+        results = self.nearest(latitude, longitude, 1, kinds, max_distance_km)
+        return results[0] if results else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "places": {kind: len(tree) for kind, (tree, _) in self._trees.items()},
+            "build_time_ms": round(self.build_time * 1000, 3),
+            "queries": self.queries,
+        }
+
+
+_default_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """同梱の地名辞書（初回のみ読み込み、プロセス全体で共有）"""
+    global _default_gazetteer
+    if _default_gazetteer is None:
+        _default_gazetteer = Gazetteer.load()
+    return _default_gazetteer
@@ -0,0 +1,277 @@
+import bisect
+import glob
+import logging
+import mmap
+import os
+import time
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 対数-線形バケット（HDRヒストグラム方式）
+# 2のべき乗ごとに SUB_BUCKETS 個の線形バケットを持ち、相対誤差は 1/SUB_BUCKETS 以下
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_TRACKABLE_US = (1 << 28) - 1  # 約268秒（超過分は最後のバケットに集約）
+BUCKET_COUNT = (MAX_TRACKABLE_US.bit_length() - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+
+# ローリングウィンドウ（SLOT_SECONDS 秒ごとのスロットを SLOT_COUNT 個循環させる）
+SLOT_SECONDS = 5
+SLOT_COUNT = 12
+ROLLING_WINDOWS = {"10s": 2, "1m": SLOT_COUNT}  # ウィンドウ名 -> スロット数
+
+PERCENTILES = (50, 90, 99)
+
+# ラベルごとのレイアウト: 通算ブロック + スロットブロック × SLOT_COUNT
+# 通算ブロック: [count, sum_us, max_us, buckets...]
+# スロットブロック: [epoch, count, sum_us, max_us, buckets...]
+_TOTAL_HEADER = 3
+_SLOT_HEADER = 4
+_TOTAL_SIZE = _TOTAL_HEADER + BUCKET_COUNT
+_SLOT_SIZE = _SLOT_HEADER + BUCKET_COUNT
+_LABEL_SIZE = _TOTAL_SIZE + _SLOT_SIZE * SLOT_COUNT
+
+_FILE_HEADER = 3  # [magic, layout, pid]
+HISTOGRAM_MAGIC = 0x4C42484953  # "LBHIS"
+
+
+def bucket_index(value_us: int) -> int:
+    """値（マイクロ秒）からバケット番号をO(1)で算出"""
+    if value_us < 2 * SUB_BUCKETS:
+        return value_us if value_us > 0 else 0
+    if value_us > MAX_TRACKABLE_US:
+        value_us = MAX_TRACKABLE_US
+    shift = value_us.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + (value_us >> shift) - SUB_BUCKETS
+
+
+def bucket_upper_bound(index: int) -> int:
+    """バケットに入る値の上限（マイクロ秒）"""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+def _summarize(count: int, sum_us: int, max_us: int, buckets: Iterable[int]) -> Dict[str, Any]:
+    """バケット列からパーセンタイル（ミリ秒）を算出"""
+    if not count:
+        return {"count": 0}
+
+    targets = [(p, max(1, -(-count * p // 100))) for p in PERCENTILES]
+    result: Dict[str, Any] = {"count": count}
+    cumulative = 0
+    target_index = 0
+
+    for index, bucket_count in enumerate(buckets):
+        if not bucket_count:
+            continue
+        cumulative += bucket_count
+        while target_index < len(targets) and cumulative >= targets[target_index][1]:
+            percentile = targets[target_index][0]
+            value_us = min(bucket_upper_bound(index), max_us)
+            result[f"p{percentile}_ms"] = round(value_us / 1000, 3)
+            target_index += 1
+        if target_index == len(targets):
+            break
+
+    result["max_ms"] = round(max_us / 1000, 3)
+    result["mean_ms"] = round(sum_us / count / 1000, 3)
+    return result
+
+
+class LatencyHistograms:
+    """ラベル（イベントタイプ・ハンドラー）ごとの固定長レイテンシヒストグラム
+
+    全領域を起動時に確保し、記録はバケット番号の計算と加算のみで行う。
+    stats_dir を指定すると `worker-<pid>.hist` に mmap し、全ワーカー分を合算して参照できる。
+    """
+
+    def __init__(self, labels: Iterable[str], stats_dir: Optional[str] = None):
+        self.labels: List[str] = list(dict.fromkeys(labels))
+        self._offsets = {
+            label: _FILE_HEADER + i * _LABEL_SIZE for i, label in enumerate(self.labels)
+        }
+        self.layout = zlib.crc32(
+            ",".join(self.labels + [str(BUCKET_COUNT), str(SLOT_COUNT)]).encode()
+        )
+        self.stats_dir = stats_dir
+        self.path: Optional[str] = None
+        self._mmap: Optional[mmap.mmap] = None
+
+        size = (_FILE_HEADER + len(self.labels) * _LABEL_SIZE) * 8
+        if stats_dir:
+            os.makedirs(stats_dir, exist_ok=True)
+            self.path = os.path.join(stats_dir, f"worker-{os.getpid()}.hist")
+            with open(self.path, "w+b") as f:
+                f.truncate(size)
+                self._mmap = mmap.mmap(f.fileno(), size)
+            self._values = memoryview(self._mmap).cast("q")
+        else:
+            self._values = memoryview(array("q", bytes(size))).cast("B").cast("q")
+
+        self._values[0] = HISTOGRAM_MAGIC
+        self._values[1] = self.layout
+        self._values[2] = os.getpid()
+        self._zero_slot = memoryview(array("q", bytes(_SLOT_SIZE * 8)))
+        self._export_maps: Dict[Tuple[int, ...], List[int]] = {}
+
+    def record(self, label: str, seconds: float) -> None:
+        """レイテンシを記録（未登録ラベルは無視）"""
+        offset = self._offsets.get(label)
+        if offset is None:
+            return
+
+        values = self._values
+        value_us = int(seconds * 1_000_000)
+        index = bucket_index(value_us)
+
+        # 通算
+        values[offset] += 1
+        values[offset + 1] += value_us
+        if value_us > values[offset + 2]:
+            values[offset + 2] = value_us
+        values[offset + _TOTAL_HEADER + index] += 1
+
+        # 現在のスロット（古いスロットは再利用時にゼロクリア）
+        epoch = int(time.time()) // SLOT_SECONDS
+        slot = offset + _TOTAL_SIZE + (epoch % SLOT_COUNT) * _SLOT_SIZE
+        if values[slot] != epoch:
+            values[slot : slot + _SLOT_SIZE] = self._zero_slot
+            values[slot] = epoch
+        values[slot + 1] += 1
+        values[slot + 2] += value_us
+        if value_us > values[slot + 3]:
+            values[slot + 3] = value_us
+        values[slot + _SLOT_HEADER + index] += 1
+
+    def _read_shards(self) -> List[memoryview]:
+        """全ワーカーのヒストグラム領域を取得"""
+        if not self.path:
+            return [self._values]
+
+        shards = []
+        expected_size = len(self._values) * 8
+        for path in sorted(glob.glob(os.path.join(self.stats_dir, "worker-*.hist"))):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read(expected_size)
+            except OSError:
+                continue
+            if len(data) != expected_size:
+                continue
+            values = memoryview(data).cast("q")
+            if values[0] != HISTOGRAM_MAGIC or values[1] != self.layout:
+                continue
+            shards.append(values)
+        return shards
+
+    def summary(self, labels: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """ラベルごとの通算・ローリングウィンドウのパーセンタイルを取得（記録の無いラベルは省略）"""
+        shards = self._read_shards()
+        current_epoch = int(time.time()) // SLOT_SECONDS
+        result = {}
+
+        for label in labels if labels is not None else self.labels:
+            offset = self._offsets.get(label)
+            if offset is None:
+                continue
+
+            total = self._merge_total(shards, offset)
+            if not total[0]:
+                continue
+
+            entry = {"all_time": _summarize(*total)}
+            for window_name, slot_span in ROLLING_WINDOWS.items():
+                entry[window_name] = _summarize(
+                    *self._merge_slots(shards, offset, current_epoch, slot_span)
+                )
+            result[label] = entry
+
+        return result
+
+    def export_buckets(
+        self, bounds_us: Sequence[int], labels: Optional[Iterable[str]] = None
+    ) -> Dict[str, Tuple[int, int, List[int]]]:
+        """通算ヒストグラムを指定した境界（マイクロ秒）の累積バケットに変換
+
+        返り値はラベルごとの (count, sum_us, 累積件数)。累積件数の末尾は +Inf。
+        内部バケットは上限値が収まる最初の境界に割り当てる。
+        """
+        key = tuple(bounds_us)
+        export_map = self._export_maps.get(key)
+        if export_map is None:
+            export_map = [
+                bisect.bisect_left(key, bucket_upper_bound(i)) for i in range(BUCKET_COUNT)
+            ]
+            self._export_maps[key] = export_map
+
+        shards = self._read_shards()
+        result = {}
+        for label in labels if labels is not None else self.labels:
+            offset = self._offsets.get(label)
+            if offset is None:
+                continue
+
+            count, sum_us, _, buckets = self._merge_total(shards, offset)
+            exported = [0] * (len(key) + 1)
+            if count:
+                for i, bucket_count in enumerate(buckets):
+                    if bucket_count:
+                        exported[export_map[i]] += bucket_count
+                for i in range(1, len(exported)):
+                    exported[i] += exported[i - 1]
+            result[label] = (count, sum_us, exported)
+
+        return result
+
+    @staticmethod
+    def _merge_total(shards: List[memoryview], offset: int):
+        count = sum_us = max_us = 0
+        buckets = [0] * BUCKET_COUNT
+        for values in shards:
+            if not values[offset]:
+                continue
+            count += values[offset]
+            sum_us += values[offset + 1]
+            max_us = max(max_us, values[offset + 2])
+            start = offset + _TOTAL_HEADER
+            for i, bucket_count in enumerate(values[start : start + BUCKET_COUNT]):
+                if bucket_count:
+                    buckets[i] += bucket_count
+        return count, sum_us, max_us, buckets
+
+    @staticmethod
+    def _merge_slots(shards: List[memoryview], offset: int, current_epoch: int, slot_span: int):
+        count = sum_us = max_us = 0
+        buckets = [0] * BUCKET_COUNT
+        oldest_epoch = current_epoch - slot_span + 1
+        for values in shards:
+            for slot_index in range(SLOT_COUNT):
+                slot = offset + _TOTAL_SIZE + slot_index * _SLOT_SIZE
+                if not (oldest_epoch <= values[slot] <= current_epoch) or not values[slot + 1]:
+                    continue
+                count += values[slot + 1]
+                sum_us += values[slot + 2]
+                max_us = max(max_us, values[slot + 3])
+                start = slot + _SLOT_HEADER
+                for i, bucket_count in enumerate(values[start : start + BUCKET_COUNT]):
+                    if bucket_count:
+                        buckets[i] += bucket_count
+        return count, sum_us, max_us, buckets
+
+    def close(self, remove: bool = False) -> None:
+        """mmapを閉じる（remove=True でファイルも削除）"""
+        if self._mmap is None:
+            return
+        self._values.release()
+        self._mmap.close()
+        self._mmap = None
+        if remove and self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
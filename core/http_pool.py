@@ -0,0 +1,205 @@
+import ssl
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import aiohttp
+from linebot.v3.messaging.async_rest import RESTClientObject, RESTResponse
+from linebot.v3.messaging.exceptions import ApiException
+
+# 新規接続数/秒を算出する期間（秒）
+CONNECTION_RATE_WINDOW = 60.0
+
+
+class ConnectionPool:
+    """送信API用の aiohttp 接続プールの設定と利用状況の計測
+
+    接続の新規作成・再利用・空き待ちは aiohttp の TraceConfig で数え、
+    使用中・待機中の接続数は TCPConnector の状態から取得する。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        ttl_dns_cache: Optional[int] = 300,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        total_timeout: Optional[float] = 60.0,
+    ):
+        self.name = name
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        # リクエストごとの既定のタイムアウト（SDKの既定は合計300秒のみ）
+        self.timeout = aiohttp.ClientTimeout(
+            total=total_timeout, connect=connect_timeout, sock_read=read_timeout
+        )
+        self.connector: Optional[aiohttp.TCPConnector] = None
+        self._connection_times: Deque[float] = deque(maxlen=10000)
+
+        self.stats = {
+            "new_connections": 0,
+            "reused_connections": 0,
+            "queued_requests": 0,
+            "queue_wait_time_total": 0.0,
+            "queue_wait_time_max": 0.0,
+            "connect_time_total": 0.0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_queued_start(session, context, params):
+            context.queued_at = time.perf_counter()
+
+        async def on_queued_end(session, context, params):
+            waited = time.perf_counter() - context.queued_at
+            self.stats["queued_requests"] += 1
+            self.stats["queue_wait_time_total"] += waited
+            self.stats["queue_wait_time_max"] = max(self.stats["queue_wait_time_max"], waited)
+
+        async def on_create_start(session, context, params):
+            context.connect_started_at = time.perf_counter()
+
+        async def on_create_end(session, context, params):
+            now = time.perf_counter()
+            self.stats["new_connections"] += 1
+            self.stats["connect_time_total"] += now - context.connect_started_at
+            self._connection_times.append(now)
+
+        async def on_reuse(session, context, params):
+            self.stats["reused_connections"] += 1
+
+        async def on_dns_hit(session, context, params):
+            self.stats["dns_cache_hits"] += 1
+
+        async def on_dns_miss(session, context, params):
+            self.stats["dns_cache_misses"] += 1
+
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_start.append(on_create_start)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        trace_config.on_dns_cache_hit.append(on_dns_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_miss)
+        return trace_config
+
+    def create_session(self, ssl_context: ssl.SSLContext) -> aiohttp.ClientSession:
+        """このプールの設定で ClientSession を作成"""
+        self.connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+            use_dns_cache=self.ttl_dns_cache is not None,
+            ssl=ssl_context,
+        )
+        return aiohttp.ClientSession(
+            connector=self.connector,
+            timeout=self.timeout,
+            trace_configs=[self._trace_config()],
+            trust_env=True,
+        )
+
+    def get_usage(self) -> Dict[str, int]:
+        """使用中・待機中（keep-alive）の接続数と空き待ちのリクエスト数"""
+        connector = self.connector
+        if connector is None or connector.closed:
+            return {"in_use": 0, "idle": 0, "waiters": 0}
+        # aiohttp の公開APIには無いため内部状態から取得（取得できなければ 0）
+        acquired = getattr(connector, "_acquired", ())
+        conns = getattr(connector, "_conns", {})
+        waiters = getattr(connector, "_waiters", {})
+        return {
+            "in_use": len(acquired),
+            "idle": sum(len(idle) for idle in conns.values()),
+            "waiters": sum(len(queue) for queue in waiters.values()),
+        }
+
+    def new_connections_per_second(self) -> float:
+        now = time.perf_counter()
+        recent = sum(1 for created in self._connection_times if now - created <= CONNECTION_RATE_WINDOW)
+        return recent / CONNECTION_RATE_WINDOW
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        queued = stats["queued_requests"]
+        new_connections = stats["new_connections"]
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "keepalive_timeout": self.keepalive_timeout,
+            **self.get_usage(),
+            "new_connections": new_connections,
+            "new_connections_per_sec": round(self.new_connections_per_second(), 3),
+            "reused_connections": stats["reused_connections"],
+            "avg_connect_time_ms": (
+                round(stats["connect_time_total"] / new_connections * 1000, 3) if new_connections else 0
+            ),
+            "queued_requests": queued,
+            "avg_queue_wait_ms": (
+                round(stats["queue_wait_time_total"] / queued * 1000, 3) if queued else 0
+            ),
+            "max_queue_wait_ms": round(stats["queue_wait_time_max"] * 1000, 3),
+            "dns_cache_hits": stats["dns_cache_hits"],
+            "dns_cache_misses": stats["dns_cache_misses"],
+        }
+
+
+class PooledRestClient(RESTClientObject):
+    """ConnectionPool の設定でセッションを作成する SDK の RESTクライアント"""
+
+    def __init__(self, configuration, pool: ConnectionPool):
+        # SDKの RESTClientObject と同じSSL・プロキシ設定
+        ssl_context = ssl.create_default_context(cafile=configuration.ssl_ca_cert)
+        if configuration.cert_file:
+            ssl_context.load_cert_chain(configuration.cert_file, keyfile=configuration.key_file)
+        if not configuration.verify_ssl:
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+
+        self.pool = pool
+        self.proxy = configuration.proxy
+        self.proxy_headers = configuration.proxy_headers
+        self.pool_manager = pool.create_session(ssl_context)
+
+    async def request(self, method, url, *args, _request_timeout=None, **kwargs):
+        timeout = _request_timeout or self.pool.timeout
+        if isinstance(kwargs.get("body"), bytes) and not args:
+            return await self._send_serialized(method, url, timeout=timeout, **kwargs)
+        return await super().request(method, url, *args, _request_timeout=timeout, **kwargs)
+
+    async def _send_serialized(
+        self, method, url, body, timeout, headers=None, _preload_content=True, **kwargs
+    ):
+        """シリアライズ済みのリクエストボディをそのまま送信（SDKは json.dumps し直すため）
+
+        クエリはSDKが URL に付与済みのため、query_params・post_params は使わない。
+        """
+        headers = headers or {}
+        headers.setdefault("Content-Type", "application/json")
+        request_args: Dict[str, Any] = {
+            "method": method.upper(),
+            "url": url,
+            "timeout": timeout,
+            "headers": headers,
+            "data": body,
+        }
+        if self.proxy:
+            request_args["proxy"] = self.proxy
+        if self.proxy_headers:
+            request_args["proxy_headers"] = self.proxy_headers
+
+        r = await self.pool_manager.request(**request_args)
+        if _preload_content:
+            r = RESTResponse(r, await r.read())
+            if not 200 <= r.status <= 299:
+                raise ApiException(http_resp=r)
+        return r
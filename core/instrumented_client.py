@@ -0,0 +1,140 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from linebot.v3.messaging import AsyncApiClient
+from linebot.v3.messaging.exceptions import ApiException
+
+from .http_pool import ConnectionPool, PooledRestClient
+from .tracing import SPAN_KIND_CLIENT, start_span
+
+# 送信APIのエンドポイント名（パスのパターン -> 名前）
+API_ENDPOINT_PATTERNS = (
+    (re.compile(r"^/v2/bot/message/reply$"), "reply"),
+    (re.compile(r"^/v2/bot/message/push$"), "push"),
+    (re.compile(r"^/v2/bot/message/multicast$"), "multicast"),
+    (re.compile(r"^/v2/bot/message/broadcast$"), "broadcast"),
+    (re.compile(r"^/v2/bot/message/narrowcast$"), "narrowcast"),
+    (re.compile(r"^/v2/bot/chat/loading/start$"), "loading"),
+    (re.compile(r"^/v2/bot/profile/[^/]+$"), "profile"),
+    (re.compile(r"^/v2/bot/(group|room)/[^/]+/member/[^/]+$"), "member_profile"),
+    (re.compile(r"^/v2/bot/message/[^/]+/content(/preview|/transcoding)?$"), "content"),
+    (re.compile(r"^/v2/bot/message/quota(/consumption)?$"), "quota"),
+)
+API_ENDPOINT_NAMES = tuple(name for _, name in API_ENDPOINT_PATTERNS) + ("other",)
+
+# 呼び出し結果の分類
+API_OUTCOMES = ("2xx", "4xx", "429", "5xx", "error")
+
+# SDKが固定で使用する送信先ホスト
+LINE_API_BASE_URL = "https://api.line.me"
+LINE_DATA_API_BASE_URL = "https://api-data.line.me"
+
+class ApiUsage:
+    """1イベントの処理中に発生した送信APIの呼び出し回数と所要時間"""
+
+    __slots__ = ("calls", "seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+
+# 処理中のイベントの送信API利用状況（track_api_usage の外では None）
+_api_usage: ContextVar[Optional[ApiUsage]] = ContextVar("linebot_api_usage", default=None)
+
+
+@contextmanager
+def track_api_usage() -> Iterator[ApiUsage]:
+    """ブロック内（そこから作られたタスクを含む）の送信API呼び出しを集計"""
+    usage = ApiUsage()
+    token = _api_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _api_usage.reset(token)
+
+
+_URL_PATH = re.compile(r"^[a-z]+://[^/]+(/[^?]*)")
+
+
+def api_endpoint_name(url: str) -> str:
+    """リクエストURLからエンドポイント名を判定"""
+    match = _URL_PATH.match(url)
+    path = match.group(1) if match else url
+    for pattern, name in API_ENDPOINT_PATTERNS:
+        if pattern.match(path):
+            return name
+    return "other"
+
+
+def api_outcome(status: int) -> str:
+    """HTTPステータスを結果の分類に変換"""
+    if status == 429:
+        return "429"
+    if 200 <= status < 300:
+        return "2xx"
+    if 400 <= status < 500:
+        return "4xx"
+    if status >= 500:
+        return "5xx"
+    return "error"
+
+
+class InstrumentedApiClient(AsyncApiClient):
+    """送信APIの呼び出しごとにエンドポイント・結果・所要時間を通知するAPIクライアント"""
+
+    def __init__(
+        self,
+        *args,
+        host_overrides: Optional[Dict[str, str]] = None,
+        connection_pool: Optional[ConnectionPool] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.connection_pool = connection_pool
+        if connection_pool is not None:
+            # SDKが作成した既定のセッション（未接続）を切り離し、プールの設定で作り直す
+            self.rest_client.pool_manager.detach()
+            self.rest_client = PooledRestClient(self.configuration, connection_pool)
+        # (endpoint, outcome, elapsed_seconds) を受け取るコールバック
+        self.on_request: Optional[Callable[[str, str, float], None]] = None
+        # 送信先ホストの置き換え（SDKはホストを固定で持つため、モックサーバー等への切り替え用）
+        self.host_overrides = {
+            host: override.rstrip("/") for host, override in (host_overrides or {}).items() if override
+        }
+
+    async def request(self, method, url, *args, **kwargs):
+        for host, override in self.host_overrides.items():
+            if url.startswith(host):
+                url = override + url[len(host) :]
+                break
+        endpoint = api_endpoint_name(url)
+        status_code = 0
+        start_time = time.perf_counter()
+
+        with start_span(
+            f"LINE API {endpoint}",
+            kind=SPAN_KIND_CLIENT,
+            **{"http.request.method": method, "linebot.api.endpoint": endpoint},
+        ) as span:
+            try:
+                response = await super().request(method, url, *args, **kwargs)
+                status_code = response.status
+                return response
+            except ApiException as e:
+                status_code = e.status or 0
+                raise
+            finally:
+                if span is not None and status_code:
+                    span.set_attribute("http.response.status_code", status_code)
+                elapsed = time.perf_counter() - start_time
+                usage = _api_usage.get()
+                if usage is not None:
+                    usage.calls += 1
+                    usage.seconds += elapsed
+                if self.on_request is not None:
+                    outcome = api_outcome(status_code) if status_code else "error"
+                    self.on_request(endpoint, outcome, elapsed)
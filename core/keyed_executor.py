@@ -0,0 +1,198 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def event_source_key(event: Any) -> str:
+    """イベントの送信元（グループ/ルーム/ユーザー）からシャードキーを決定"""
+    source = getattr(event, "source", None)
+    if source is not None:
+        for attr in ("group_id", "room_id", "user_id"):
+            source_id = getattr(source, attr, None)
+            if source_id:
+                return source_id
+
+    # 送信元が無いイベントは順序制約が無いため個別に並列処理
+    return getattr(event, "webhook_event_id", None) or f"anonymous-{id(event)}"
+
+
+def _mask_key(key: str) -> str:
+    """統計出力用にシャードキー（ユーザーID等）を短縮"""
+    return key[:6] + "..." if len(key) > 6 else key
+
+
+class _Shard:
+    """1チャット分のジョブキューと処理タスク"""
+
+    __slots__ = ("key", "queue", "task", "processed", "pending_puts", "put_finished")
+
+    def __init__(self, key: str, max_depth: int):
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_depth)
+        self.task: Optional[asyncio.Task] = None
+        self.processed = 0
+        # キューが満杯で投入を待っているジョブの数（その間はシャードを解放しない）
+        self.pending_puts = 0
+        # 待機中の投入が完了（またはキャンセル）するたびにセットされる
+        self.put_finished = asyncio.Event()
+
+
+class KeyedExecutor:
+    """同一チャットのイベントは順番に、異なるチャットのイベントは並列に処理する実行器"""
+
+    def __init__(self, max_active_shards: int = 256, max_shard_depth: int = 100):
+        self.max_active_shards = max_active_shards
+        self.max_shard_depth = max_shard_depth
+
+        self._shards: Dict[str, _Shard] = {}
+        self._active_slots = asyncio.Semaphore(max_active_shards)
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        self.stats = {
+            "submitted_jobs": 0,
+            "completed_jobs": 0,
+            "failed_jobs": 0,
+            "active_shards": 0,
+            "peak_active_shards": 0,
+            "peak_shard_depth": 0,
+            "slot_waits": 0,
+        }
+
+    async def submit(
+        self, key: str, job: Callable[..., Awaitable[None]], *args: Any
+    ) -> None:
+        """キーに対応するシャードにジョブを追加（上限到達時は空きが出るまで待機）"""
+        item = (job, args)
+        shard = self._shards.get(key)
+
+        if shard is None:
+            # シャードを先に登録し、同じキーの後続ジョブが同じ順番待ちに並ぶようにする
+            shard = _Shard(key, self.max_shard_depth)
+            self._shards[key] = shard
+            self._idle.clear()
+            shard.queue.put_nowait(item)
+            self.stats["submitted_jobs"] += 1
+
+            if self._active_slots.locked():
+                self.stats["slot_waits"] += 1
+            try:
+                await self._active_slots.acquire()
+            except BaseException:
+                self._abandon_start(shard)
+                raise
+            shard.task = asyncio.create_task(self._run_shard(shard), name=f"shard-{_mask_key(key)}")
+            return
+
+        shard.pending_puts += 1
+        try:
+            await shard.queue.put(item)
+        finally:
+            shard.pending_puts -= 1
+            shard.put_finished.set()
+        self.stats["submitted_jobs"] += 1
+        depth = shard.queue.qsize()
+        if depth > self.stats["peak_shard_depth"]:
+            self.stats["peak_shard_depth"] = depth
+
+    def _abandon_start(self, shard: _Shard) -> None:
+        """シャード起動前に最初の投入者がキャンセルされた場合の後始末"""
+        # キャンセルされた投入者のジョブ（キューの先頭）は実行しない
+        shard.queue.get_nowait()
+        self.stats["submitted_jobs"] -= 1
+
+        if shard.queue.empty() and not shard.pending_puts:
+            self._discard_shard(shard)
+            return
+
+        # 後続の投入者のジョブが既に受け付け済みのため、空き待ちを引き継いでシャードを起動する
+        shard.task = asyncio.create_task(
+            self._start_when_slot_free(shard), name=f"shard-{_mask_key(shard.key)}"
+        )
+
+    async def _start_when_slot_free(self, shard: _Shard) -> None:
+        """空きスロットを待ってからシャードの処理を開始"""
+        try:
+            await self._active_slots.acquire()
+        except BaseException:
+            self._discard_shard(shard)
+            raise
+        await self._run_shard(shard)
+
+    def _discard_shard(self, shard: _Shard) -> None:
+        """未起動のシャードを破棄"""
+        if self._shards.get(shard.key) is shard:
+            del self._shards[shard.key]
+        if not self._shards:
+            self._idle.set()
+
+    async def _run_shard(self, shard: _Shard) -> None:
+        """シャード内のジョブを投入順に処理し、空になったらシャードを解放"""
+        self.stats["active_shards"] += 1
+        if self.stats["active_shards"] > self.stats["peak_active_shards"]:
+            self.stats["peak_active_shards"] = self.stats["active_shards"]
+
+        try:
+            while True:
+                if shard.queue.empty():
+                    if not shard.pending_puts:
+                        break
+                    # 取り出しで空きを待っていた投入が再開されるが、まだキューに入っていない。
+                    # ここで解放すると解放済みのキューに入り処理されないため、投入の完了を待つ
+                    shard.put_finished.clear()
+                    await shard.put_finished.wait()
+                    continue
+                job, args = shard.queue.get_nowait()
+                try:
+                    await job(*args)
+                    self.stats["completed_jobs"] += 1
+                except Exception as e:
+                    self.stats["failed_jobs"] += 1
+                    logger.error(f"Shard job error: {type(e).__name__}: {e}")
+                shard.processed += 1
+        finally:
+            # キューが空で投入待ちも無くなった時点で（awaitを挟まずに）シャードを解放
+            self._shards.pop(shard.key, None)
+            self.stats["active_shards"] -= 1
+            self._active_slots.release()
+            if not self._shards:
+                self._idle.set()
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """全シャードの処理完了を待ち、時間切れの場合は残りをキャンセル"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pending = [shard.task for shard in self._shards.values() if shard.task]
+            logger.warning(f"Shard drain timed out: cancelling {len(pending)} shards")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def get_stats(self, top: int = 5) -> Dict[str, Any]:
+        """アクティブなシャード数とシャードごとのキュー深さを取得"""
+        depths: List[Dict[str, Any]] = sorted(
+            (
+                {"shard": _mask_key(key), "depth": shard.queue.qsize(), "processed": shard.processed}
+                for key, shard in self._shards.items()
+            ),
+            key=lambda item: item["depth"],
+            reverse=True,
+        )
+
+        return {
+            "active_shards": self.stats["active_shards"],
+            "waiting_shards": len(self._shards) - self.stats["active_shards"],
+            "max_active_shards": self.max_active_shards,
+            "max_shard_depth": self.max_shard_depth,
+            "queued_jobs": sum(item["depth"] for item in depths),
+            "submitted_jobs": self.stats["submitted_jobs"],
+            "completed_jobs": self.stats["completed_jobs"],
+            "failed_jobs": self.stats["failed_jobs"],
+            "peak_active_shards": self.stats["peak_active_shards"],
+            "peak_shard_depth": self.stats["peak_shard_depth"],
+            "slot_waits": self.stats["slot_waits"],
+            "deepest_shards": depths[:top],
+        }
@@ -0,0 +1,106 @@
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Type
+
+from linebot.v3.webhooks import Event
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson が無い環境では標準の json を使用
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# webhookの type 値 -> イベントモデルのクラス名
+# https://developers.line.biz/ja/reference/messaging-api/#webhook-event-objects
+EVENT_TYPE_CLASS_NAMES: Dict[str, str] = {
+    "accountLink": "AccountLinkEvent",
+    "activated": "ActivatedEvent",
+    "beacon": "BeaconEvent",
+    "botResumed": "BotResumedEvent",
+    "botSuspended": "BotSuspendedEvent",
+    "deactivated": "DeactivatedEvent",
+    "delivery": "PnpDeliveryCompletionEvent",
+    "follow": "FollowEvent",
+    "join": "JoinEvent",
+    "leave": "LeaveEvent",
+    "memberJoined": "MemberJoinedEvent",
+    "memberLeft": "MemberLeftEvent",
+    "membership": "MembershipEvent",
+    "message": "MessageEvent",
+    "messageEdited": "MessageEditedEvent",
+    "module": "ModuleEvent",
+    "postback": "PostbackEvent",
+    "unfollow": "UnfollowEvent",
+    "unsend": "UnsendEvent",
+    "videoPlayComplete": "VideoPlayCompleteEvent",
+}
+
+
+class HandlerAwareParser:
+    """ハンドラー登録済みのイベントだけをモデル化する遅延パーサー
+
+    署名検証は済んでいる前提で、生のbytesを高速なデコーダで読み込み、
+    各イベントの type を見てディスパッチ対象のものだけ pydantic モデルを構築する。
+    """
+
+    def __init__(self, registered_event_types: Iterable[Type[Event]]):
+        self.model_classes: Dict[str, Type[Event]] = {}
+        self.unhandled_counts: Dict[str, int] = {}
+        self.parsed_events = 0
+        self.invalid_events = 0
+        self.update_registry(registered_event_types)
+
+    def update_registry(self, registered_event_types: Iterable[Type[Event]]) -> None:
+        """登録済みイベントクラスから type 値 -> モデルクラスの対応表を作成
+
+        type 値が分からないイベントクラスは、そのイベントが全て未対応として
+        捨てられてしまうため ValueError とする。
+        """
+        registered_names = {event_type.__name__: event_type for event_type in registered_event_types}
+        unknown = set(registered_names) - set(EVENT_TYPE_CLASS_NAMES.values())
+        if unknown:
+            raise ValueError(f"No webhook type value for event classes: {sorted(unknown)}")
+
+        self.model_classes = {
+            type_value: registered_names[class_name]
+            for type_value, class_name in EVENT_TYPE_CLASS_NAMES.items()
+            if class_name in registered_names
+        }
+
+    def parse(self, body: bytes) -> List[Event]:
+        """署名検証済みのボディからディスパッチ対象のイベントを生成"""
+        payload = _json_loads(body)
+        events = []
+
+        for event_dict in payload.get("events", ()):
+            event_type = event_dict.get("type")
+            model_class = self.model_classes.get(event_type)
+
+            if model_class is None:
+                # ハンドラーが無いイベントはモデルを作らずに件数だけ記録
+                key = event_type if isinstance(event_type, str) else "unknown"
+                self.unhandled_counts[key] = self.unhandled_counts.get(key, 0) + 1
+                continue
+
+            try:
+                events.append(model_class.from_dict(event_dict))
+            except ValueError as e:
+                self.invalid_events += 1
+                logger.warning(f"Invalid {event_type} event skipped: {e}")
+
+        self.parsed_events += len(events)
+        return events
+
+    def get_stats(self) -> Dict[str, Any]:
+        """パース件数と未対応イベントの統計を取得"""
+        return {
+            "decoder": _json_loads.__module__,
+            "handled_types": sorted(self.model_classes.keys()),
+            "parsed_events": self.parsed_events,
+            "invalid_events": self.invalid_events,
+            "unhandled_events": sum(self.unhandled_counts.values()),
+            "unhandled_event_types": dict(self.unhandled_counts),
+        }
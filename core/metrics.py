@@ -0,0 +1,209 @@
+import logging
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .delivery import DELIVERY_ENDPOINTS, DELIVERY_OUTCOMES
+from .histogram import LatencyHistograms
+from .instrumented_client import API_ENDPOINT_NAMES, API_OUTCOMES
+from .stats import (
+    COUNTER_NAMES,
+    LABELED_COUNTERS,
+    StatsStore,
+    counter_index,
+    labeled_counter_index,
+)
+
+logger = logging.getLogger(__name__)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+METRIC_PREFIX = "linebot"
+
+# エクスポート用のヒストグラム境界（マイクロ秒）
+EXPORT_BUCKET_BOUNDS_US = (
+    1_000,
+    2_500,
+    5_000,
+    10_000,
+    25_000,
+    50_000,
+    100_000,
+    250_000,
+    500_000,
+    1_000_000,
+    2_500_000,
+    5_000_000,
+    10_000_000,
+    30_000_000,
+    60_000_000,
+)
+
+# 単純カウンタ（カウンタ名 -> (メトリクス名, 説明)）
+SIMPLE_COUNTERS = {
+    "total_requests": ("webhook_requests", "Webhook requests received"),
+    "successful_requests": ("webhook_requests_succeeded", "Webhook requests fully processed"),
+    "failed_requests": ("webhook_requests_failed", "Webhook requests rejected or failed"),
+    "total_events": ("events_received", "Webhook events accepted for processing"),
+    "processed_events": ("events_processed", "Events processed successfully"),
+    "failed_events": ("events_failed", "Events whose processing failed"),
+}
+
+# ラベル付きカウンタ（グループ -> (メトリクス名, ラベル名, 説明)）
+LABELED_COUNTER_FAMILIES = {
+    "event_type": ("events_by_type", "type", "Events received by event type"),
+    "error_class": ("event_errors", "error_class", "Event processing failures by error class"),
+}
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Mapping[str, str]) -> str:
+    if not pairs:
+        return ""
+    inner = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs.items())
+    return "{" + inner + "}"
+
+
+def _format_seconds_us(value_us: int) -> str:
+    return repr(value_us / 1_000_000)
+
+
+class HistogramFamily:
+    """ヒストグラムのメトリクスファミリー（内部ラベル -> エクスポート時のラベル）"""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_name: Optional[str],
+        series: Mapping[str, str],
+    ):
+        self.name = f"{METRIC_PREFIX}_{name}"
+        self.help_text = help_text
+        self.histogram_labels = list(series)
+        # 系列ごとの出力行の接頭辞を事前に組み立てる
+        self._series_prefixes: Dict[str, Tuple[List[str], str, str]] = {}
+        for histogram_label, exported_value in series.items():
+            base = {label_name: exported_value} if label_name else {}
+            bucket_prefixes = [
+                f"{self.name}_bucket{_labels({**base, 'le': _format_seconds_us(bound)})} "
+                for bound in EXPORT_BUCKET_BOUNDS_US
+            ]
+            bucket_prefixes.append(f"{self.name}_bucket{_labels({**base, 'le': '+Inf'})} ")
+            self._series_prefixes[histogram_label] = (
+                bucket_prefixes,
+                f"{self.name}_count{_labels(base)} ",
+                f"{self.name}_sum{_labels(base)} ",
+            )
+
+    def render(self, histograms: LatencyHistograms, lines: List[str]) -> None:
+        lines.append(f"# TYPE {self.name} histogram")
+        lines.append(f"# UNIT {self.name} seconds")
+        lines.append(f"# HELP {self.name} {self.help_text}")
+
+        exported = histograms.export_buckets(EXPORT_BUCKET_BOUNDS_US, self.histogram_labels)
+        for histogram_label, (count, sum_us, cumulative) in exported.items():
+            if not count:
+                continue
+            bucket_prefixes, count_prefix, sum_prefix = self._series_prefixes[histogram_label]
+            for prefix, value in zip(bucket_prefixes, cumulative):
+                lines.append(f"{prefix}{value}")
+            lines.append(f"{count_prefix}{count}")
+            lines.append(f"{sum_prefix}{sum_us / 1_000_000}")
+
+
+class OpenMetricsExporter:
+    """StatsStore と LatencyHistograms を OpenMetrics テキスト形式で出力
+
+    カウンタは共有領域上の位置と出力行の接頭辞を起動時に組み立てておき、
+    スクレイプ時は全ワーカー分の合算と文字列連結のみを行う。
+    """
+
+    def __init__(
+        self,
+        stats: StatsStore,
+        histograms: LatencyHistograms,
+        histogram_families: Iterable[HistogramFamily],
+    ):
+        self.stats = stats
+        self.histograms = histograms
+        self.histogram_families = list(histogram_families)
+
+        # (ヘッダー行, [(接頭辞, 位置)]) の一覧
+        self._counter_families: List[Tuple[List[str], List[Tuple[str, int]]]] = []
+
+        for counter_name in COUNTER_NAMES:
+            if counter_name not in SIMPLE_COUNTERS:
+                continue
+            name, help_text = SIMPLE_COUNTERS[counter_name]
+            self._add_counter_family(name, help_text, [({}, counter_index(counter_name))])
+
+        for group, (name, label_name, help_text) in LABELED_COUNTER_FAMILIES.items():
+            self._add_counter_family(
+                name,
+                help_text,
+                [
+                    ({label_name: label}, labeled_counter_index(group, label))
+                    for label in LABELED_COUNTERS[group]
+                ],
+            )
+
+        self._add_counter_family(
+            "api_requests",
+            "Outbound LINE API requests by endpoint and outcome",
+            [
+                (
+                    {"endpoint": endpoint, "outcome": outcome},
+                    labeled_counter_index("api_call", f"{endpoint}:{outcome}"),
+                )
+                for endpoint in API_ENDPOINT_NAMES
+                for outcome in API_OUTCOMES
+            ],
+        )
+
+        self._add_counter_family(
+            "api_deliveries",
+            "Outbound message retries, reply-to-push fallbacks and final failures by endpoint",
+            [
+                (
+                    {"endpoint": endpoint, "outcome": outcome},
+                    labeled_counter_index("delivery", f"{endpoint}:{outcome}"),
+                )
+                for endpoint in DELIVERY_ENDPOINTS
+                for outcome in DELIVERY_OUTCOMES
+            ],
+        )
+
+    def _add_counter_family(
+        self, name: str, help_text: str, series: List[Tuple[Dict[str, str], int]]
+    ) -> None:
+        full_name = f"{METRIC_PREFIX}_{name}"
+        header = [
+            f"# TYPE {full_name} counter",
+            f"# HELP {full_name} {help_text}",
+        ]
+        prefixes = [(f"{full_name}_total{_labels(labels)} ", index) for labels, index in series]
+        self._counter_families.append((header, prefixes))
+
+    def render(self, gauges: Optional[Mapping[str, Tuple[str, float]]] = None) -> str:
+        """全ワーカー分を合算して出力（gauges: メトリクス名 -> (説明, 値) はこのワーカーの値）"""
+        merged = self.stats.merged_values()
+        lines: List[str] = []
+
+        for header, prefixes in self._counter_families:
+            lines.extend(header)
+            for prefix, index in prefixes:
+                # 全系列を常に出力（0 でも系列が途切れないように）
+                lines.append(f"{prefix}{merged[index]}")
+
+        for family in self.histogram_families:
+            family.render(self.histograms, lines)
+
+        for name, (help_text, value) in (gauges or {}).items():
+            full_name = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {full_name} gauge")
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"{full_name} {value}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,155 @@
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from linebot.v3.messaging import Message, PushMessageRequest, ReplyMessageRequest
+
+from .flex_templates import PrecompiledMessage
+
+logger = logging.getLogger(__name__)
+
+# シリアライズ済みのJSONで送信するメソッド（メソッド名 -> (パス, 成功時のレスポンスの型)）
+PRESERIALIZED_METHODS = {
+    "reply_message": ("/v2/bot/message/reply", "ReplyMessageResponse"),
+    "push_message": ("/v2/bot/message/push", "PushMessageResponse"),
+    "multicast": ("/v2/bot/message/multicast", "object"),
+}
+
+
+# 送信リクエストのモデルを検証して生成するか（起動時に app.py から OUTBOUND_VALIDATION で設定）
+_validate_requests = True
+
+
+def set_request_validation(validate: bool) -> None:
+    """reply_request / push_request でのモデルの検証の有無を設定"""
+    global _validate_requests
+    _validate_requests = validate
+
+
+def _request_fields(notification_disabled: Optional[bool], **fields: Any) -> Dict[str, Any]:
+    # 未指定の notification_disabled はモデルの既定値（false）のままにする
+    if notification_disabled is not None:
+        fields["notification_disabled"] = notification_disabled
+    return fields
+
+
+def reply_request(
+    reply_token: str, messages: List[Message], notification_disabled: Optional[bool] = None
+) -> ReplyMessageRequest:
+    """リプライのリクエスト（検証無効時は pydantic の検証を省いて生成）"""
+    fields = _request_fields(notification_disabled, reply_token=reply_token, messages=messages)
+    if _validate_requests:
+        return ReplyMessageRequest(**fields)
+    return ReplyMessageRequest.construct(**fields)
+
+
+def push_request(
+    to: str, messages: List[Message], notification_disabled: Optional[bool] = None
+) -> PushMessageRequest:
+    """プッシュのリクエスト（検証無効時は pydantic の検証を省いて生成）"""
+    fields = _request_fields(notification_disabled, to=to, messages=messages)
+    if _validate_requests:
+        return PushMessageRequest(**fields)
+    return PushMessageRequest.construct(**fields)
+
+
+def encode_messages(messages: Iterable[Any]) -> str:
+    """メッセージの配列をJSON化（生成済みのメッセージは保持しているJSONをそのまま使う）"""
+    return ",".join(
+        message.to_json() if isinstance(message, PrecompiledMessage) else json.dumps(message.to_dict())
+        for message in messages
+    )
+
+
+def encode_request(request: Any) -> bytes:
+    """送信リクエストのモデルをリクエストボディに変換（モデルの検証は行わない）"""
+    fields = request.dict(by_alias=True, exclude_none=True, exclude={"messages"})
+    parts = [f"{json.dumps(key)}:{json.dumps(value)}" for key, value in fields.items()]
+    parts.append(f'"messages":[{encode_messages(request.messages)}]')
+    return ("{" + ",".join(parts) + "}").encode()
+
+
+def validate_messages(request: Any) -> Any:
+    """生成済みのメッセージをSDKのモデルに戻して検証したリクエスト（デバッグ用）"""
+    if not any(isinstance(message, PrecompiledMessage) for message in request.messages):
+        return request
+    messages = [
+        Message.from_dict(message.to_dict()) if isinstance(message, PrecompiledMessage) else message
+        for message in request.messages
+    ]
+    return request.copy(update={"messages": messages})
+
+
+class PreserializedMessagingApi:
+    """AsyncMessagingApi の送信APIをシリアライズ済みのJSONで直接送るプロキシ
+
+    validate=False（本番用）では reply / push / multicast のリクエストを、SDKによる
+    引数の検証・モデルの変換を経ずにJSONのバイト列にして接続プール経由で送信する。
+    validate=True（開発・テスト用）では生成済みのメッセージもSDKのモデルに戻して
+    全て検証した上で、SDKのメソッドで送信する。
+    それ以外の属性はそのまま元のAPIに委譲する。
+    """
+
+    def __init__(self, api: Any, validate: bool = False):
+        self.api = api
+        self.validate = validate
+
+        self.stats = {"preserialized": 0, "validated": 0, "request_bytes": 0}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.api, name)
+
+    async def _send(
+        self,
+        method: str,
+        request: Any,
+        x_line_retry_key: Optional[str] = None,
+        **kwargs,
+    ) -> Any:
+        if self.validate or kwargs:
+            # 検証モード・SDK固有のオプション指定時は SDK のメソッドで送信
+            if self.validate:
+                request = validate_messages(request)
+                self.stats["validated"] += 1
+            if x_line_retry_key is not None:
+                kwargs["x_line_retry_key"] = x_line_retry_key
+            return await getattr(self.api, method)(request, **kwargs)
+
+        path, response_type = PRESERIALIZED_METHODS[method]
+        body = encode_request(request)
+        self.stats["preserialized"] += 1
+        self.stats["request_bytes"] += len(body)
+
+        api_client = self.api.api_client
+        headers: Dict[str, str] = {"Accept": "application/json", "Content-Type": "application/json"}
+        if x_line_retry_key is not None:
+            headers["X-Line-Retry-Key"] = x_line_retry_key
+        return await api_client.call_api(
+            path,
+            "POST",
+            header_params=headers,
+            body=body,
+            response_types_map={"200": response_type},
+            auth_settings=["Bearer"],
+            _return_http_data_only=True,
+            _host=self.api.line_base_path,
+        )
+
+    async def reply_message(self, reply_message_request: Any, **kwargs) -> Any:
+        return await self._send("reply_message", reply_message_request, **kwargs)
+
+    async def push_message(self, push_message_request: Any, **kwargs) -> Any:
+        return await self._send("push_message", push_message_request, **kwargs)
+
+    async def multicast(self, multicast_request: Any, **kwargs) -> Any:
+        return await self._send("multicast", multicast_request, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        preserialized = self.stats["preserialized"]
+        return {
+            "mode": "validate" if self.validate else "preserialized",
+            **self.stats,
+            "avg_request_bytes": (
+                round(self.stats["request_bytes"] / preserialized, 1) if preserialized else 0
+            ),
+        }
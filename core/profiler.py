@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# プロファイルのモード
+PROFILE_MODE_CPU = "cpu"  # イベントループのスレッドで実行中のスタックのみ
+PROFILE_MODE_WALL = "wall"  # 実行中に加え、await で待機中のタスクのスタックも記録
+PROFILE_MODES = {PROFILE_MODE_CPU, PROFILE_MODE_WALL}
+
+IDLE_STACK = "(idle)"
+
+# イベントループ内部のフレーム（この下から各タスクのコルーチンが始まる）
+_LOOP_RUNNER_FRAMES = {("events.py", "_run"), ("events.py", "Handle._run")}
+# スタックに含めないフレーム（トレース用デコレーターのラッパー）
+_TRANSPARENT_FRAMES = {("tracing.py", "async_wrapper"), ("tracing.py", "wrapper")}
+_IDLE_FRAMES = {"select", "poll", "epoll", "kqueue", "control"}
+_TASK_NUMBER_SUFFIX = re.compile(r"-\d+$")
+
+
+class ProfilerBusyError(Exception):
+    """別のプロファイルが実行中の場合の例外"""
+
+
+def _task_group(task: asyncio.Task) -> str:
+    """タスク名から連番やシャードキーを除いたグループ名を取得"""
+    name = task.get_name()
+    if name.startswith("shard-"):
+        return "shard"
+    return _TASK_NUMBER_SUFFIX.sub("", name)
+
+
+class AsyncSamplingProfiler:
+    """コルーチンを考慮したサンプリングプロファイラー
+
+    別スレッドから一定間隔でイベントループのスレッドのスタックを取得し、
+    イベントループ内部のフレームを除いて実行中のタスク名を先頭に付けて集計する。
+    wall モードでは await で待機中のタスクも cr_await を辿って記録する。
+    結果は flamegraph.pl / speedscope で読み込める collapsed stack 形式で出力する。
+    """
+
+    def __init__(self, max_duration: float = 60.0, min_interval: float = 0.001):
+        self.max_duration = max_duration
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._labels: Dict[Any, str] = {}
+
+        self.stats = {
+            "profiles": 0,
+            "last_profile_at": None,
+            "last_duration": 0.0,
+            "last_samples": 0,
+            "last_overhead_percent": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def _frame_label(self, frame) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            filename = os.path.basename(code.co_filename)
+            if (filename, code.co_name) in _TRANSPARENT_FRAMES:
+                label = ""
+            else:
+                label = (
+                    f"{getattr(code, 'co_qualname', code.co_name)} "
+                    f"({filename}:{code.co_firstlineno})"
+                )
+            self._labels[code] = label
+        return label
+
+    def _thread_stack(self, frame) -> Optional[List[str]]:
+        """実行中スレッドのスタックからイベントループ内部を除いたフレーム列を取得"""
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            key = (os.path.basename(code.co_filename), getattr(code, "co_qualname", code.co_name))
+            if key in _LOOP_RUNNER_FRAMES:
+                break
+            frames.append(frame)
+            frame = frame.f_back
+        else:
+            # ループのコールバック外（セレクタで待機中など）
+            return None
+        return [label for label in map(self._frame_label, reversed(frames)) if label]
+
+    def _await_stack(self, task: asyncio.Task) -> List[str]:
+        """待機中タスクの await の連鎖をフレーム列に変換"""
+        labels = []
+        coro = task.get_coro()
+        while coro is not None:
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+            if frame is None:
+                if isinstance(coro, asyncio.Future):
+                    labels.append(f"<await {type(coro).__name__}>")
+                break
+            label = self._frame_label(frame)
+            if label:
+                labels.append(label)
+            coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        return labels
+
+    def _sample(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        loop_thread_id: int,
+        mode: str,
+        counts: Dict[str, int],
+    ) -> None:
+        frame = sys._current_frames().get(loop_thread_id)
+        if frame is None:
+            return
+
+        current = asyncio.current_task(loop)
+        stack = self._thread_stack(frame)
+        if stack is None:
+            if frame.f_code.co_name in _IDLE_FRAMES or current is None:
+                key = IDLE_STACK
+            else:
+                key = f"[{_task_group(current)}]"
+        else:
+            prefix = f"[{_task_group(current)}]" if current is not None else "[callback]"
+            key = ";".join([prefix, *stack])
+        counts[key] = counts.get(key, 0) + 1
+
+        if mode != PROFILE_MODE_WALL:
+            return
+        try:
+            tasks = list(asyncio.all_tasks(loop))
+        except RuntimeError:
+            return
+        for task in tasks:
+            if task is current:
+                continue
+            stack = self._await_stack(task)
+            if stack:
+                key = ";".join([f"[{_task_group(task)}] (awaiting)", *stack])
+                counts[key] = counts.get(key, 0) + 1
+
+    def _sampler(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        loop_thread_id: int,
+        interval: float,
+        mode: str,
+        stop: threading.Event,
+        counts: Dict[str, int],
+        timing: Dict[str, float],
+    ) -> None:
+        while not stop.wait(interval):
+            started = time.perf_counter()
+            try:
+                self._sample(loop, loop_thread_id, mode, counts)
+            except Exception as e:  # サンプリングの失敗でプロファイル全体を止めない
+                logger.debug(f"Profiler sample failed: {type(e).__name__}: {e}")
+            timing["sampling_time"] += time.perf_counter() - started
+            timing["samples"] += 1
+
+    async def profile(
+        self, duration: float, interval: float = 0.005, mode: str = PROFILE_MODE_CPU
+    ) -> Tuple[Dict[str, int], Dict[str, Any]]:
+        """duration 秒間サンプリングし、(collapsed stack -> 件数, 概要) を返す"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        if self.running:
+            raise ProfilerBusyError("Another profile is already running")
+
+        duration = max(0.1, min(duration, self.max_duration))
+        interval = max(self.min_interval, interval)
+
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            counts: Dict[str, int] = {}
+            timing = {"sampling_time": 0.0, "samples": 0}
+            stop = threading.Event()
+            sampler = threading.Thread(
+                target=self._sampler,
+                args=(loop, threading.get_ident(), interval, mode, stop, counts, timing),
+                name="async-profiler",
+                daemon=True,
+            )
+
+            started = time.perf_counter()
+            sampler.start()
+            try:
+                await asyncio.sleep(duration)
+            finally:
+                stop.set()
+                await asyncio.to_thread(sampler.join)
+            elapsed = time.perf_counter() - started
+
+            summary = {
+                "mode": mode,
+                "duration": round(elapsed, 3),
+                "interval_ms": round(interval * 1000, 3),
+                "samples": timing["samples"],
+                "stacks": len(counts),
+                # サンプリングスレッドがGILを保持していた時間の割合（おおよその負荷）
+                "overhead_percent": round(timing["sampling_time"] / elapsed * 100, 3),
+            }
+            self.stats["profiles"] += 1
+            self.stats["last_profile_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            self.stats["last_duration"] = summary["duration"]
+            self.stats["last_samples"] = summary["samples"]
+            self.stats["last_overhead_percent"] = summary["overhead_percent"]
+            logger.info(
+                f"Profile completed: {summary['samples']} samples in {summary['duration']}s "
+                f"(mode={mode}, overhead {summary['overhead_percent']}%)"
+            )
+            return counts, summary
+
+    @staticmethod
+    def to_collapsed(counts: Dict[str, int]) -> str:
+        """collapsed stack 形式（"frame;frame;frame 件数" の行）に変換"""
+        lines = [
+            f"{stack} {count}"
+            for stack, count in sorted(counts.items(), key=lambda item: -item[1])
+        ]
+        return "\n".join(lines) + "\n"
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"running": self.running, "max_duration": self.max_duration, **self.stats}
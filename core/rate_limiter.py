@@ -0,0 +1,230 @@
+import asyncio
+import functools
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from linebot.v3.messaging.exceptions import ApiException
+
+logger = logging.getLogger(__name__)
+
+# LINEが公開しているチャネルごとのレート制限（リクエスト数/秒）
+# https://developers.line.biz/ja/reference/messaging-api/#rate-limits
+DEFAULT_API_RATE_LIMIT = 2000.0
+API_RATE_LIMITS = {
+    "multicast": 200.0,
+    "broadcast": 60 / 3600,  # 60回/時
+    "narrowcast": 60 / 3600,  # 60回/時
+}
+
+# AsyncMessagingApi / AsyncMessagingApiBlob のメソッド名 -> エンドポイント名
+API_METHOD_ENDPOINTS = {
+    "reply_message": "reply",
+    "push_message": "push",
+    "multicast": "multicast",
+    "broadcast": "broadcast",
+    "narrowcast": "narrowcast",
+    "show_loading_animation": "loading",
+    "get_profile": "profile",
+    "get_group_member_profile": "member_profile",
+    "get_room_member_profile": "member_profile",
+    "get_message_content": "content",
+    "get_message_content_preview": "content",
+    "get_message_content_transcoding_by_message_id": "content",
+    "get_message_quota": "quota",
+    "get_message_quota_consumption": "quota",
+}
+
+# Retry-After が無い429の待機時間（秒）
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def parse_retry_after(value: Optional[str], default: float = DEFAULT_RETRY_AFTER) -> float:
+    """Retry-After ヘッダー（秒数）を待機時間に変換"""
+    try:
+        return max(0.0, float(value)) if value else default
+    except ValueError:
+        return default
+
+
+class TokenBucket:
+    """送信APIのエンドポイントごとのトークンバケット
+
+    トークンを先に予約して（残数は負にもなる）不足分だけ待つため、
+    待機中のリクエストは到着順に送信される。
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        # 1秒分（少なくとも1回分）までのバースト
+        self.capacity = max(1.0, rate * burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """トークンを1つ予約し、送信可能になるまでの待機時間を返す"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def refund(self) -> None:
+        """予約を取り消し（待機中にキャンセルされた場合）"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def block(self, seconds: float) -> None:
+        """429 を受けて seconds 秒間は送信を止める"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class ApiRateLimiter:
+    """エンドポイントごとのトークンバケットで送信APIの呼び出しを待たせるレート制限"""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, float]] = None,
+        default_limit: float = DEFAULT_API_RATE_LIMIT,
+        scale: float = 1.0,
+        max_rate_limited_retries: int = 2,
+    ):
+        # scale: 複数ワーカーでチャネルの上限を分け合う場合の割合
+        limits = {**API_RATE_LIMITS, **(limits or {})}
+        self.default_limit = default_limit * scale
+        self.max_rate_limited_retries = max_rate_limited_retries
+        self.buckets = {
+            endpoint: TokenBucket(limit * scale) for endpoint, limit in limits.items()
+        }
+        # (endpoint, waited_seconds) を受け取るコールバック
+        self.on_wait: Optional[Callable[[str, float], None]] = None
+
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def _bucket(self, endpoint: str) -> TokenBucket:
+        bucket = self.buckets.get(endpoint)
+        if bucket is None:
+            bucket = self.buckets[endpoint] = TokenBucket(self.default_limit)
+        return bucket
+
+    def _endpoint_stats(self, endpoint: str) -> Dict[str, Any]:
+        stats = self.stats.get(endpoint)
+        if stats is None:
+            stats = self.stats[endpoint] = {
+                "acquired": 0,
+                "waited": 0,
+                "waiting": 0,
+                "wait_time_total": 0.0,
+                "wait_time_max": 0.0,
+                "rate_limited": 0,
+                "retried": 0,
+            }
+        return stats
+
+    async def acquire(self, endpoint: str) -> float:
+        """送信可能になるまで待ち、待機時間を返す"""
+        bucket = self._bucket(endpoint)
+        stats = self._endpoint_stats(endpoint)
+        wait = bucket.reserve()
+        waited = 0.0
+
+        if wait > 0:
+            started = time.monotonic()
+            stats["waiting"] += 1
+            try:
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    # 待機中に429で止められた場合は延長
+                    wait = bucket.blocked_until - time.monotonic()
+            except asyncio.CancelledError:
+                bucket.refund()
+                raise
+            finally:
+                stats["waiting"] -= 1
+            waited = time.monotonic() - started
+            stats["waited"] += 1
+            stats["wait_time_total"] += waited
+            stats["wait_time_max"] = max(stats["wait_time_max"], waited)
+
+        stats["acquired"] += 1
+        if self.on_wait is not None:
+            self.on_wait(endpoint, waited)
+        return waited
+
+    def rate_limited(self, endpoint: str, retry_after: float) -> None:
+        """429 を受けたエンドポイントを retry_after 秒間止める"""
+        self._bucket(endpoint).block(retry_after)
+        self._endpoint_stats(endpoint)["rate_limited"] += 1
+        logger.warning(f"LINE API rate limited: {endpoint} (retry after {retry_after:.1f}s)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, stats in self.stats.items():
+            bucket = self._bucket(endpoint)
+            endpoints[endpoint] = {
+                "limit_per_sec": round(bucket.rate, 4),
+                "acquired": stats["acquired"],
+                "waited": stats["waited"],
+                "waiting": stats["waiting"],
+                "avg_wait_ms": (
+                    round(stats["wait_time_total"] / stats["waited"] * 1000, 3)
+                    if stats["waited"]
+                    else 0
+                ),
+                "max_wait_ms": round(stats["wait_time_max"] * 1000, 3),
+                "rate_limited": stats["rate_limited"],
+                "retried": stats["retried"],
+                "blocked_for_ms": round(
+                    max(0.0, bucket.blocked_until - time.monotonic()) * 1000, 1
+                ),
+            }
+        return {"default_limit_per_sec": round(self.default_limit, 4), "endpoints": endpoints}
+
+
+class RateLimitedMessagingApi:
+    """AsyncMessagingApi のレート制限付きプロキシ
+
+    送信APIのメソッドはトークンを取得してから呼び出し、429 の場合は
+    Retry-After の間そのエンドポイントを止めてから再送する（失敗にはしない）。
+    それ以外の属性はそのまま元のAPIに委譲する。
+    """
+
+    def __init__(self, api: Any, limiter: ApiRateLimiter):
+        self.api = api
+        self.limiter = limiter
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.api, name)
+        endpoint = API_METHOD_ENDPOINTS.get(name.removesuffix("_with_http_info"))
+        if endpoint is None or not callable(attr):
+            return attr
+
+        wrapped = self._wrap(attr, endpoint)
+        # 次回以降は __getattr__ を経由しない
+        setattr(self, name, wrapped)
+        return wrapped
+
+    def _wrap(self, method: Callable, endpoint: str) -> Callable:
+        limiter = self.limiter
+
+        @functools.wraps(method)
+        async def rate_limited_call(*args, **kwargs):
+            attempt = 0
+            while True:
+                await limiter.acquire(endpoint)
+                try:
+                    return await method(*args, **kwargs)
+                except ApiException as e:
+                    if e.status != 429:
+                        raise
+                    retry_after = parse_retry_after((e.headers or {}).get("Retry-After"))
+                    limiter.rate_limited(endpoint, retry_after)
+                    if attempt >= limiter.max_rate_limited_retries:
+                        raise
+                    limiter.stats[endpoint]["retried"] += 1
+                    attempt += 1
+
+        return rate_limited_call
@@ -0,0 +1,153 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from .delivery import push_target
+from .outbound import push_request, reply_request
+
+logger = logging.getLogger(__name__)
+
+# 1回のリプライ・プッシュで送れるメッセージ数の上限
+MAX_MESSAGES_PER_REQUEST = 5
+
+
+class ReplyBuffer:
+    """1イベント分の返信メッセージ（ディスパッチ終了時にまとめて送信）"""
+
+    __slots__ = ("event", "reply_token", "messages", "notification_disabled", "calls", "flushed")
+
+    def __init__(self, event: Any):
+        self.event = event
+        self.reply_token = getattr(event, "reply_token", None)
+        self.messages: List[Any] = []
+        self.notification_disabled: Optional[bool] = None
+        self.calls = 0
+        self.flushed = False
+
+    def add(self, messages: List[Any], notification_disabled: Optional[bool] = None) -> None:
+        self.messages.extend(messages)
+        self.calls += 1
+        if notification_disabled is not None:
+            self.notification_disabled = notification_disabled
+
+
+# 処理中のイベントの返信バッファ
+_current_buffer: ContextVar[Optional[ReplyBuffer]] = ContextVar(
+    "linebot_reply_buffer", default=None
+)
+
+
+def current_reply_buffer() -> Optional[ReplyBuffer]:
+    """処理中のイベントの返信バッファを取得（無効時は None）"""
+    return _current_buffer.get()
+
+
+class ReplyCoalescingMessagingApi:
+    """同じリプライトークンへの返信を1回のリプライにまとめる AsyncMessagingApi のプロキシ
+
+    ディスパッチ中の reply_message はバッファに追加するだけで送信せず、
+    flush() で先頭5件をリプライ、残りを5件ずつのプッシュで送信する。
+    それ以外の属性はそのまま元のAPIに委譲する。
+    """
+
+    def __init__(self, api: Any, enabled: bool = True):
+        self.api = api
+        self.enabled = enabled
+
+        self.stats = {
+            "buffered_calls": 0,
+            "flushes": 0,
+            "reply_requests": 0,
+            "overflow_push_requests": 0,
+            "messages": 0,
+            "dropped_messages": 0,
+            "flush_errors": 0,
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.api, name)
+
+    @contextmanager
+    def buffer(self, event: Any) -> Iterator[Optional[ReplyBuffer]]:
+        """イベントの処理中の返信をバッファに溜める（無効時・リプライトークンが無ければ何もしない）"""
+        if not self.enabled or not getattr(event, "reply_token", None):
+            yield None
+            return
+
+        token = _current_buffer.set(ReplyBuffer(event))
+        try:
+            yield _current_buffer.get()
+        finally:
+            _current_buffer.reset(token)
+
+    async def reply_message(self, reply_message_request: Any, **kwargs) -> Any:
+        buffer = _current_buffer.get()
+        if (
+            buffer is None
+            or buffer.flushed
+            or kwargs
+            or reply_message_request.reply_token != buffer.reply_token
+        ):
+            return await self.api.reply_message(reply_message_request, **kwargs)
+
+        buffer.add(reply_message_request.messages, reply_message_request.notification_disabled)
+        self.stats["buffered_calls"] += 1
+        return None
+
+    async def flush(self, buffer: Optional[ReplyBuffer]) -> None:
+        """溜まった返信を送信（先頭5件をリプライ、残りはプッシュ）
+
+        送信失敗はハンドラー内で返信に失敗した場合と同様にログに残すのみで、
+        イベントの処理自体は失敗にしない（再送・フォールバックは下位のAPIで実施済み）。
+        """
+        if buffer is None or buffer.flushed:
+            return
+        buffer.flushed = True
+        if not buffer.messages:
+            return
+
+        messages = buffer.messages
+        self.stats["flushes"] += 1
+        self.stats["messages"] += len(messages)
+
+        try:
+            await self.api.reply_message(
+                reply_request(
+                    reply_token=buffer.reply_token,
+                    messages=messages[:MAX_MESSAGES_PER_REQUEST],
+                    notification_disabled=buffer.notification_disabled,
+                )
+            )
+            self.stats["reply_requests"] += 1
+
+            overflow = messages[MAX_MESSAGES_PER_REQUEST:]
+            if not overflow:
+                return
+            target = push_target(buffer.event)
+            if target is None:
+                self.stats["dropped_messages"] += len(overflow)
+                logger.warning(f"Reply overflow dropped: {len(overflow)} messages (no push target)")
+                return
+            for start in range(0, len(overflow), MAX_MESSAGES_PER_REQUEST):
+                await self.api.push_message(
+                    push_request(
+                        to=target,
+                        messages=overflow[start : start + MAX_MESSAGES_PER_REQUEST],
+                        notification_disabled=buffer.notification_disabled,
+                    )
+                )
+                self.stats["overflow_push_requests"] += 1
+        except Exception as e:
+            self.stats["flush_errors"] += 1
+            logger.error(f"Failed to send buffered reply: {type(e).__name__} - {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        requests = stats["reply_requests"] + stats["overflow_push_requests"]
+        return {
+            "enabled": self.enabled,
+            **stats,
+            # まとめずに送っていた場合との差
+            "requests_saved": max(0, stats["buffered_calls"] - requests),
+        }
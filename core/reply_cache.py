@@ -0,0 +1,159 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from linebot.v3.messaging import Message
+
+from .flex_templates import PrecompiledMessage, utf8_size
+
+logger = logging.getLogger(__name__)
+
+
+def message_size(message: Message) -> int:
+    """メッセージのJSONの UTF-8 でのバイト数"""
+    if isinstance(message, PrecompiledMessage):
+        return message.size
+    return utf8_size(message.to_json())
+
+
+class RenderedReplyCache:
+    """正規化したハンドラーの入力をキーに、描画済みの返信メッセージを保持する LRU キャッシュ
+
+    入力だけで内容が決まる返信（同じスタンプ・同じファイル名とサイズ等）は、
+    2回目以降は分析・描画を行わずに保持しているメッセージをそのまま返す。
+    件数・合計バイト数の上限を超えると最も古く使われたものから破棄し、
+    ttl 秒を過ぎたものは再描画する（ハンドラーの表示内容の変更を反映するため）。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl: float = 3600.0,
+        enabled: bool = True,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        # (namespace, key) -> (期限, メッセージ, バイト数)
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Message, int]]" = OrderedDict()
+        self._bytes = 0
+
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def configure(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ) -> None:
+        """起動時の設定の反映（ハンドラーは起動前に共有インスタンスを参照するため）"""
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if ttl is not None:
+            self.ttl = ttl
+        if enabled is not None:
+            self.enabled = enabled
+        if not self.enabled:
+            self.clear()
+        self._evict()
+
+    def _namespace_stats(self, namespace: str) -> Dict[str, int]:
+        stats = self.stats.get(namespace)
+        if stats is None:
+            stats = self.stats[namespace] = {
+                "hits": 0,
+                "misses": 0,
+                "expired": 0,
+                "evicted": 0,
+                "uncacheable": 0,
+            }
+        return stats
+
+    def get_or_render(
+        self, namespace: str, key: Hashable, render: Callable[[], Message]
+    ) -> Message:
+        """キャッシュ済みの返信を取得（無い・期限切れの場合は render() で描画して保持）"""
+        if not self.enabled:
+            return render()
+
+        stats = self._namespace_stats(namespace)
+        cache_key = (namespace, key)
+        now = time.monotonic()
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            expires_at, message, _ = entry
+            if expires_at > now:
+                self._entries.move_to_end(cache_key)
+                stats["hits"] += 1
+                return message
+            self._remove(cache_key)
+            stats["expired"] += 1
+
+        stats["misses"] += 1
+        message = render()
+        size = message_size(message)
+        if size > self.max_bytes:
+            stats["uncacheable"] += 1
+            return message
+
+        self._entries[cache_key] = (now + self.ttl, message, size)
+        self._bytes += size
+        self._evict()
+        return message
+
+    def _remove(self, cache_key: Tuple[str, Hashable]) -> None:
+        _, _, size = self._entries.pop(cache_key)
+        self._bytes -= size
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            cache_key, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._namespace_stats(cache_key[0])["evicted"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        namespaces = {}
+        entries: Dict[str, int] = {}
+        payload_bytes: Dict[str, int] = {}
+        for (namespace, _), (_, _, size) in self._entries.items():
+            entries[namespace] = entries.get(namespace, 0) + 1
+            payload_bytes[namespace] = payload_bytes.get(namespace, 0) + size
+
+        total_hits = total_lookups = 0
+        for namespace, stats in self.stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            total_hits += stats["hits"]
+            total_lookups += lookups
+            namespaces[namespace] = {
+                **stats,
+                "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else 0,
+                "entries": entries.get(namespace, 0),
+                "payload_bytes": payload_bytes.get(namespace, 0),
+            }
+
+        return {
+            "enabled": self.enabled,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "entries": len(self._entries),
+            "payload_bytes": self._bytes,
+            "hit_ratio": round(total_hits / total_lookups, 4) if total_lookups else 0,
+            "namespaces": namespaces,
+        }
+
+
+# プロセス全体で共有するキャッシュ（設定は起動時に app.py から configure で反映）
+reply_cache = RenderedReplyCache()
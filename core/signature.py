@@ -0,0 +1,64 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import time
+from typing import Any, Dict, Optional
+
+SIGNATURE_DIGEST_SIZE = hashlib.sha256().digest_size
+
+
+class SignatureVerifier:
+    """生のリクエストボディ（bytes）に対して X-Line-Signature を検証"""
+
+    def __init__(self, channel_secret: str):
+        # チャネルシークレットで鍵付けしたHMACを使い回す（リクエスト毎にcopy）
+        self._keyed_hmac = hmac.new(channel_secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+        self.stats = {
+            "verified": 0,
+            "rejected": 0,
+            "total_time": 0.0,
+            "max_time": 0.0,
+        }
+
+    def verify(self, body: bytes, signature: Optional[str]) -> bool:
+        """署名が正しければTrue（デコードやJSON解析の前に呼び出す）"""
+        start_time = time.perf_counter()
+        is_valid = self._verify(body, signature)
+        elapsed = time.perf_counter() - start_time
+
+        self.stats["total_time"] += elapsed
+        if elapsed > self.stats["max_time"]:
+            self.stats["max_time"] = elapsed
+        self.stats["verified" if is_valid else "rejected"] += 1
+
+        return is_valid
+
+    def _verify(self, body: bytes, signature: Optional[str]) -> bool:
+        if not signature:
+            return False
+
+        # 署名ヘッダーの形式が不正ならHMACを計算せずに拒否
+        try:
+            expected = base64.b64decode(signature, validate=True)
+        except (binascii.Error, ValueError):
+            return False
+        if len(expected) != SIGNATURE_DIGEST_SIZE:
+            return False
+
+        mac = self._keyed_hmac.copy()
+        mac.update(body)
+        return hmac.compare_digest(mac.digest(), expected)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """署名検証の件数と所要時間の統計を取得"""
+        total = self.stats["verified"] + self.stats["rejected"]
+        avg_time = self.stats["total_time"] / total if total else 0
+
+        return {
+            "verified": self.stats["verified"],
+            "rejected": self.stats["rejected"],
+            "avg_verification_time_us": round(avg_time * 1_000_000, 2),
+            "max_verification_time_us": round(self.stats["max_time"] * 1_000_000, 2),
+        }
@@ -0,0 +1,280 @@
+import glob
+import logging
+import mmap
+import os
+import time
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional
+
+from .delivery import DELIVERY_ENDPOINTS, DELIVERY_OUTCOMES
+from .instrumented_client import API_ENDPOINT_NAMES, API_OUTCOMES
+from .lazy_parser import EVENT_TYPE_CLASS_NAMES
+
+logger = logging.getLogger(__name__)
+
+# ワーカー単位で集計するカウンタ（順序がそのまま共有領域のレイアウトになる）
+COUNTER_NAMES = (
+    "total_requests",
+    "successful_requests",
+    "failed_requests",
+    "total_events",
+    "processed_events",
+    "failed_events",
+    "processing_time_total_us",
+    "processing_time_count",
+    "last_event_timestamp",
+)
+# 集計時に合計ではなく最大値を取るカウンタ
+MAX_COUNTERS = {"last_event_timestamp"}
+
+# ラベル付きカウンタ（全ラベルを事前に確保し、未知のラベルは Other に集約）
+OTHER_LABEL = "Other"
+OTHER_EVENT_TYPE = OTHER_LABEL
+EVENT_TYPE_NAMES = tuple(sorted(set(EVENT_TYPE_CLASS_NAMES.values()))) + (OTHER_LABEL,)
+ERROR_CLASS_NAMES = (
+    "EventDeadlineExceeded",
+    "ApiException",
+    "ClientError",
+    "TimeoutError",
+    "ValidationError",
+    "ValueError",
+    "KeyError",
+    "AttributeError",
+    "TypeError",
+    OTHER_LABEL,
+)
+API_CALL_NAMES = tuple(
+    f"{endpoint}:{outcome}" for endpoint in API_ENDPOINT_NAMES for outcome in API_OUTCOMES
+)
+DELIVERY_NAMES = tuple(
+    f"{endpoint}:{outcome}" for endpoint in DELIVERY_ENDPOINTS for outcome in DELIVERY_OUTCOMES
+)
+LABELED_COUNTERS = {
+    "event_type": EVENT_TYPE_NAMES,
+    "error_class": ERROR_CLASS_NAMES,
+    "api_call": API_CALL_NAMES,
+    "delivery": DELIVERY_NAMES,
+}
+
+HEADER_NAMES = ("magic", "layout", "pid", "started_at")
+SHARD_MAGIC = 0x4C424F5453  # "LBOTS"
+
+_COUNTER_OFFSET = len(HEADER_NAMES)
+_COUNTER_INDEX = {name: _COUNTER_OFFSET + i for i, name in enumerate(COUNTER_NAMES)}
+_LABEL_INDEX: Dict[str, Dict[str, int]] = {}
+_next_offset = _COUNTER_OFFSET + len(COUNTER_NAMES)
+for _group, _labels in LABELED_COUNTERS.items():
+    _LABEL_INDEX[_group] = {label: _next_offset + i for i, label in enumerate(_labels)}
+    _next_offset += len(_labels)
+_EVENT_TYPE_INDEX = _LABEL_INDEX["event_type"]
+_ERROR_CLASS_SET = frozenset(ERROR_CLASS_NAMES)
+
+SHARD_SLOTS = _next_offset
+_MAX_INDEXES = tuple(_COUNTER_INDEX[name] for name in MAX_COUNTERS)
+_SUM_INDEXES = tuple(i for i in range(_COUNTER_OFFSET, SHARD_SLOTS) if i not in _MAX_INDEXES)
+SHARD_SIZE = SHARD_SLOTS * 8
+SHARD_LAYOUT = zlib.crc32(
+    ",".join(
+        HEADER_NAMES
+        + COUNTER_NAMES
+        + tuple(f"{group}={label}" for group, labels in LABELED_COUNTERS.items() for label in labels)
+    ).encode()
+)
+
+
+def counter_index(name: str) -> int:
+    """カウンタの共有領域上の位置"""
+    return _COUNTER_INDEX[name]
+
+
+def labeled_counter_index(group: str, label: str) -> int:
+    """ラベル付きカウンタの共有領域上の位置（未知のラベルは Other）"""
+    indexes = _LABEL_INDEX[group]
+    return indexes.get(label, indexes.get(OTHER_LABEL, -1))
+
+
+def error_class_name(error: BaseException) -> str:
+    """例外を集計用のエラー分類名に変換（継承元も考慮）"""
+    for cls in type(error).__mro__:
+        if cls.__name__ in _ERROR_CLASS_SET:
+            return cls.__name__
+    return OTHER_LABEL
+
+
+def _format_timestamp(timestamp: int) -> Optional[str]:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)) if timestamp else None
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class StatsStore:
+    """ワーカーごとの固定長カウンタ領域と、全ワーカー分の集計
+
+    stats_dir を指定するとカウンタを `worker-<pid>.stats` ファイルに mmap し、
+    同じディレクトリを共有する他のワーカーのシャードと合算して参照できる。
+    各シャードの書き込みは所有ワーカーのみが行うためロックは不要。
+    """
+
+    def __init__(self, stats_dir: Optional[str] = None):
+        self.stats_dir = stats_dir
+        self.pid = os.getpid()
+        self._mmap: Optional[mmap.mmap] = None
+
+        if stats_dir:
+            os.makedirs(stats_dir, exist_ok=True)
+            self.path = os.path.join(stats_dir, f"worker-{self.pid}.stats")
+            with open(self.path, "w+b") as f:
+                f.truncate(SHARD_SIZE)
+                self._mmap = mmap.mmap(f.fileno(), SHARD_SIZE)
+            self._values = memoryview(self._mmap).cast("q")
+        else:
+            self.path = None
+            self._values = memoryview(array("q", bytes(SHARD_SIZE))).cast("B").cast("q")
+
+        self._values[0] = SHARD_MAGIC
+        self._values[1] = SHARD_LAYOUT
+        self._values[2] = self.pid
+        self._values[3] = int(time.time())
+
+    @property
+    def multi_process(self) -> bool:
+        return self.path is not None
+
+    def incr(self, name: str, value: int = 1) -> None:
+        self._values[_COUNTER_INDEX[name]] += value
+
+    def set(self, name: str, value: int) -> None:
+        self._values[_COUNTER_INDEX[name]] = value
+
+    def get(self, name: str) -> int:
+        return self._values[_COUNTER_INDEX[name]]
+
+    def incr_event_type(self, event_type_name: str, value: int = 1) -> None:
+        index = _EVENT_TYPE_INDEX.get(event_type_name, _EVENT_TYPE_INDEX[OTHER_EVENT_TYPE])
+        self._values[index] += value
+
+    def incr_labeled(self, group: str, label: str, value: int = 1) -> None:
+        index = labeled_counter_index(group, label)
+        if index >= 0:
+            self._values[index] += value
+
+    def incr_error_class(self, error: BaseException) -> None:
+        self.incr_labeled("error_class", error_class_name(error))
+
+    def event_type_counts(self) -> Dict[str, int]:
+        return _event_type_counts(self._values)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """このワーカーのカウンタを取得"""
+        return _shard_to_dict(self._values)
+
+    def _read_shards(self) -> List[memoryview]:
+        """共有ディレクトリ内の全ワーカーのシャードを読み込み"""
+        if not self.multi_process:
+            return [self._values]
+
+        shards = []
+        for path in sorted(glob.glob(os.path.join(self.stats_dir, "worker-*.stats"))):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read(SHARD_SIZE)
+            except OSError:
+                continue
+            if len(data) != SHARD_SIZE:
+                continue
+            values = memoryview(data).cast("q")
+            if values[0] != SHARD_MAGIC or values[1] != SHARD_LAYOUT:
+                continue
+            shards.append(values)
+        return shards
+
+    def merged_values(self) -> List[int]:
+        """全ワーカーのカウンタ領域を位置ごとに合算（最大値カウンタは最大値）"""
+        merged = [0] * SHARD_SLOTS
+        for values in self._read_shards():
+            for i in _SUM_INDEXES:
+                merged[i] += values[i]
+            for i in _MAX_INDEXES:
+                if values[i] > merged[i]:
+                    merged[i] = values[i]
+        return merged
+
+    def labeled_counts(self, group: str, merged: Optional[List[int]] = None) -> Dict[str, int]:
+        """ラベル付きカウンタのうち 0 以外のものを取得"""
+        values = merged if merged is not None else self._values
+        return {
+            label: values[index]
+            for label, index in _LABEL_INDEX[group].items()
+            if values[index]
+        }
+
+    def aggregate(self) -> Dict[str, Any]:
+        """全ワーカーの合計とワーカー別の内訳を取得"""
+        totals = {name: 0 for name in COUNTER_NAMES}
+        event_type_totals: Dict[str, int] = {}
+        workers = []
+
+        for values in self._read_shards():
+            worker = _shard_to_dict(values)
+            for name in COUNTER_NAMES:
+                if name in MAX_COUNTERS:
+                    totals[name] = max(totals[name], values[_COUNTER_INDEX[name]])
+                else:
+                    totals[name] += values[_COUNTER_INDEX[name]]
+            for name, count in worker["event_type_counts"].items():
+                event_type_totals[name] = event_type_totals.get(name, 0) + count
+            workers.append(worker)
+
+        totals["event_type_counts"] = event_type_totals
+        totals["last_event_time"] = _format_timestamp(totals.pop("last_event_timestamp"))
+
+        return {
+            "worker_count": len(workers),
+            "alive_workers": sum(1 for worker in workers if worker["alive"]),
+            "totals": totals,
+            "workers": workers,
+        }
+
+    def close(self, remove: bool = False) -> None:
+        """mmapを閉じる（remove=True でシャードファイルも削除）"""
+        if self._mmap is None:
+            return
+        self._values.release()
+        self._mmap.close()
+        self._mmap = None
+        if remove and self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def _event_type_counts(values: memoryview) -> Dict[str, int]:
+    counts = {}
+    for name, index in _EVENT_TYPE_INDEX.items():
+        if values[index]:
+            counts[name] = values[index]
+    return counts
+
+
+def _shard_to_dict(values: memoryview) -> Dict[str, Any]:
+    pid = values[2]
+    counters = {name: values[_COUNTER_INDEX[name]] for name in COUNTER_NAMES}
+    counters["last_event_time"] = _format_timestamp(counters.pop("last_event_timestamp"))
+
+    return {
+        "pid": pid,
+        "alive": _is_process_alive(pid),
+        "started_at": _format_timestamp(values[3]),
+        **counters,
+        "event_type_counts": _event_type_counts(values),
+    }
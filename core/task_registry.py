@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+
+class EventDeadlineExceeded(Exception):
+    """イベント処理が期限内に完了しなかった場合の例外"""
+
+
+class TaskRegistry:
+    """処理中のイベントタスクを保持し、イベントごとの期限とキャンセルを管理
+
+    リプライトークンを持つイベントは、トークンの有効期間（イベント発生時刻から
+    reply_token_ttl 秒）を期限とする。リプライトークンの無いイベントは
+    default_timeout 秒を期限とする。
+    """
+
+    def __init__(
+        self,
+        reply_token_ttl: float = 60.0,
+        default_timeout: float = 30.0,
+        min_timeout: float = 1.0,
+    ):
+        self.reply_token_ttl = reply_token_ttl
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+
+        # 強参照で保持（GCによるタスク消失を防ぐ）
+        self._tasks: Set[asyncio.Task] = set()
+        # イベントクラス -> リプライトークンの有無
+        self._reply_token_types: Dict[type, bool] = {}
+
+        self.completed = 0
+        self.cancelled = 0
+        self.timeouts: Dict[str, int] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """処理中のタスク数"""
+        return len(self._tasks)
+
+    def deadline_for(self, event: Any) -> float:
+        """イベントに許される残り処理時間（秒）を算出"""
+        event_type = type(event)
+        has_reply_token = self._reply_token_types.get(event_type)
+        if has_reply_token is None:
+            fields = getattr(event_type, "__fields__", {})
+            has_reply_token = "reply_token" in fields
+            self._reply_token_types[event_type] = has_reply_token
+
+        if not has_reply_token or not getattr(event, "reply_token", None):
+            return self.default_timeout
+
+        # リプライトークンの有効期間のうち、まだ残っている時間
+        timestamp = getattr(event, "timestamp", None)
+        if not timestamp:
+            return self.reply_token_ttl
+        elapsed = time.time() - timestamp / 1000
+        return max(self.min_timeout, self.reply_token_ttl - elapsed)
+
+    async def run(self, coro: Awaitable[Any], label: str, timeout: float) -> Any:
+        """コルーチンをタスクとして登録し、期限付きで実行"""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if not done:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                self.timeouts[label] = self.timeouts.get(label, 0) + 1
+                raise EventDeadlineExceeded(f"{label} timeout after {timeout:.1f}s")
+
+            self.completed += 1
+            return task.result()
+
+        except asyncio.CancelledError:
+            # 呼び出し元がキャンセルされた場合は処理中のタスクも止める
+            task.cancel()
+            self.cancelled += 1
+            raise
+
+        finally:
+            self._tasks.discard(task)
+
+    async def cancel_all(self) -> int:
+        """残っている全タスクをキャンセル（終了時用）"""
+        pending = list(self._tasks)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        if pending:
+            logger.warning(f"Cancelled {len(pending)} in-flight event tasks")
+        return len(pending)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """処理中タスク数とハンドラー別のタイムアウト件数を取得"""
+        return {
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "timeouts_total": sum(self.timeouts.values()),
+            "timeouts_by_handler": dict(self.timeouts),
+            "reply_token_ttl_seconds": self.reply_token_ttl,
+            "default_timeout_seconds": self.default_timeout,
+        }
@@ -0,0 +1,388 @@
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# スパンの種別（OTLPの SpanKind）
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# スパンのステータス（OTLPの StatusCode）
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# 実行中のスパン（未サンプリング時は None のまま）
+_current_span: ContextVar[Optional["Span"]] = ContextVar("linebot_current_span", default=None)
+
+
+class Span:
+    """トレース内の1区間（終了時にトレーサーのエクスポート待ちに追加）"""
+
+    __slots__ = (
+        "tracer",
+        "trace",
+        "parent",
+        "name",
+        "kind",
+        "span_id",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+        "status_message",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        trace: "Trace",
+        parent: Optional["Span"],
+        name: str,
+        kind: int,
+        start_ns: int,
+        attributes: Optional[Dict[str, Any]],
+    ):
+        self.tracer = tracer
+        self.trace = trace
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.span_id = random.getrandbits(64) or 1
+        self.start_ns = start_ns
+        self.end_ns = 0
+        self.attributes = attributes or {}
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000 if self.end_ns else 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+        self.attributes["exception.type"] = type(error).__name__
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns:
+            return
+        self.end_ns = end_ns or time.time_ns()
+        self.trace.spans.append(self)
+        self.tracer._on_end(self)
+
+    def child(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        start_ns: Optional[int] = None,
+        **attributes: Any,
+    ) -> "Span":
+        """このスパンの子スパンを開始"""
+        return Span(
+            self.tracer, self.trace, self, name, kind, start_ns or time.time_ns(), attributes
+        )
+
+
+class Trace:
+    """1回のWebhook受信から始まるスパンの集まり"""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = random.getrandbits(128) or 1
+        self.spans: List[Span] = []
+
+    @property
+    def trace_id_hex(self) -> str:
+        return f"{self.trace_id:032x}"
+
+    def breakdown(self) -> Dict[str, float]:
+        """スパン名ごとの合計時間（ミリ秒）を所要時間の長い順に取得"""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return {
+            name: round(duration, 3)
+            for name, duration in sorted(totals.items(), key=lambda item: -item[1])
+        }
+
+
+def current_span() -> Optional[Span]:
+    """実行中のスパンを取得（トレース対象外なら None）"""
+    return _current_span.get()
+
+
+@contextmanager
+def use_span(span: Optional[Span], end: bool = False) -> Iterator[Optional[Span]]:
+    """既存のスパンを実行中のスパンとして設定（別タスクへの引き継ぎ用）"""
+    if span is None:
+        yield None
+        return
+
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        if end:
+            span.end()
+
+
+@contextmanager
+def start_span(
+    name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any
+) -> Iterator[Optional[Span]]:
+    """実行中のスパンの子スパンを開始（トレース対象外なら何もしない）"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    with use_span(parent.child(name, kind, **attributes), end=True) as span:
+        yield span
+
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable:
+    """関数・コルーチン関数の実行をスパンとして記録するデコレーター"""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with start_span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with start_span(span_name, **attributes):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def encode_otlp_json(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """スパンを OTLP/JSON（ExportTraceServiceRequest）形式に変換"""
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace.trace_id_hex,
+            "spanId": f"{span.span_id:016x}",
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _otlp_attributes(span.attributes),
+            "status": {"code": span.status},
+        }
+        if span.parent is not None:
+            item["parentSpanId"] = f"{span.parent.span_id:016x}"
+        if span.status_message:
+            item["status"]["message"] = span.status_message
+        encoded.append(item)
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes(
+                        {"service.name": service_name, "process.pid": os.getpid()}
+                    )
+                },
+                "scopeSpans": [{"scope": {"name": "linebot-template"}, "spans": encoded}],
+            }
+        ]
+    }
+
+
+class SpanExporter(ABC):
+    """スパンの出力先の基底クラス"""
+
+    @abstractmethod
+    async def export(self, payload: Dict[str, Any]) -> None:
+        """OTLP/JSON の ExportTraceServiceRequest を出力"""
+
+    async def close(self) -> None:
+        """出力先の後片付け"""
+
+
+class FileSpanExporter(SpanExporter):
+    """OTLP/JSON を1行1リクエストでファイルに追記（collector の filelog 等で取り込み可能）"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, line: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def export(self, payload: Dict[str, Any]) -> None:
+        line = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        await asyncio.to_thread(self._write, line)
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """OTLP/HTTP（JSON）で collector に送信"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self._session = None
+
+    async def export(self, payload: Dict[str, Any]) -> None:
+        import aiohttp
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        async with self._session.post(self.endpoint, json=payload) as response:
+            if response.status >= 300:
+                raise RuntimeError(f"OTLP export failed: HTTP {response.status}")
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def create_span_exporter(exporter: str, path: str, endpoint: str) -> Optional[SpanExporter]:
+    """設定値からスパンの出力先を生成（none の場合は None）"""
+    if exporter == "none":
+        return None
+    if exporter == "file":
+        return FileSpanExporter(path)
+    if exporter == "otlp":
+        return OtlpHttpSpanExporter(endpoint)
+    raise ValueError(f"Unknown trace exporter: {exporter}")
+
+
+class Tracer:
+    """Webhook単位のヘッドサンプリングとスパンのバッチエクスポート
+
+    サンプリングされなかったリクエストでは実行中のスパンが None のままとなり、
+    各計測点は contextvar を1回参照するだけで素通りする。
+    """
+
+    def __init__(
+        self,
+        service_name: str = "linebot",
+        sample_rate: float = 0.0,
+        exporter: Optional[SpanExporter] = None,
+        max_queue_size: int = 2048,
+        export_interval: float = 5.0,
+    ):
+        self.service_name = service_name
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.exporter = exporter
+        self.export_interval = export_interval
+        self._pending: Deque[Span] = deque(maxlen=max_queue_size)
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "started_traces": 0,
+            "exported_spans": 0,
+            "dropped_spans": 0,
+            "export_errors": 0,
+        }
+
+    def start_trace(
+        self, name: str, kind: int = SPAN_KIND_SERVER, **attributes: Any
+    ) -> Optional[Span]:
+        """サンプリング判定の上でルートスパンを開始（対象外なら None）"""
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return None
+        self.stats["started_traces"] += 1
+        return Span(self, Trace(), None, name, kind, time.time_ns(), attributes)
+
+    def _on_end(self, span: Span) -> None:
+        if self.exporter is None:
+            return
+        if len(self._pending) == self._pending.maxlen:
+            self.stats["dropped_spans"] += 1
+        self._pending.append(span)
+
+    async def start(self) -> None:
+        """定期エクスポートを開始"""
+        if self.exporter is not None and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop(), name="trace-exporter")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.export_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """溜まっているスパンをエクスポート"""
+        if self.exporter is None or not self._pending:
+            return
+
+        spans = list(self._pending)
+        self._pending.clear()
+        try:
+            await self.exporter.export(encode_otlp_json(spans, self.service_name))
+            self.stats["exported_spans"] += len(spans)
+        except Exception as e:
+            self.stats["export_errors"] += 1
+            logger.warning(f"Trace export failed ({len(spans)} spans): {type(e).__name__}: {e}")
+
+    async def shutdown(self) -> None:
+        """定期エクスポートを停止し、残りのスパンを出力"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+        if self.exporter is not None:
+            await self.exporter.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "exporter": type(self.exporter).__name__ if self.exporter else None,
+            "pending_spans": len(self._pending),
+            **self.stats,
+        }
@@ -1,8 +1,10 @@
 # handlers/events/account_link_event.py
 import logging
-from linebot.v3.messaging import AsyncMessagingApi, ReplyMessageRequest, TextMessage
+from linebot.v3.messaging import AsyncMessagingApi, TextMessage
 from linebot.v3.webhooks import AccountLinkEvent
 
+from core.outbound import reply_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,7 +32,7 @@ class AccountLinkEventHandler:
                 )
 
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[TextMessage(text=response_text)],
                 )
@@ -1,7 +1,9 @@
 import logging
-from linebot.v3.messaging import AsyncMessagingApi, ReplyMessageRequest, TextMessage
+from linebot.v3.messaging import AsyncMessagingApi, TextMessage
 from linebot.v3.webhooks import JoinEvent
 
+from core.outbound import reply_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,7 +24,7 @@ class JoinEventHandler:
             )
 
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[TextMessage(text=greeting_message)],
                 )
@@ -1,7 +1,9 @@
 import logging
-from linebot.v3.messaging import AsyncMessagingApi, ReplyMessageRequest, TextMessage
+from linebot.v3.messaging import AsyncMessagingApi, TextMessage
 from linebot.v3.webhooks import MemberJoinedEvent
 
+from core.outbound import reply_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +26,7 @@ class MemberJoinedEventHandler:
                 welcome_message = f"{member_count}名の新しいメンバーが参加しました！\nよろしくお願いします。"
 
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[TextMessage(text=welcome_message)],
                 )
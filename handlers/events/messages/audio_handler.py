@@ -1,7 +1,6 @@
 import logging
 from linebot.v3.messaging import (
     AsyncMessagingApi, 
-    ReplyMessageRequest, 
     TextMessage,
     FlexMessage,
     FlexBubble,
@@ -11,6 +10,10 @@ from linebot.v3.messaging import (
 )
 from linebot.v3.webhooks import MessageEvent
 
+from core.flex_templates import PrecompiledMessage, flex_templates, text_slot
+from core.outbound import reply_request
+from core.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,7 +22,10 @@ class AudioHandler:
     
     def __init__(self, api: AsyncMessagingApi):
         self.api = api
+        # Flexメッセージのテンプレート（起動時に一度だけコンパイル）
+        self.message_template = flex_templates.get("audio.message", self._build_message_template)
 
+    @traced()
     async def handle(self, event: MessageEvent) -> None:
         """音声メッセージの処理"""
         try:
@@ -36,7 +42,7 @@ class AudioHandler:
             flex_message = self._create_audio_flex_message(audio_id, duration, formatted_duration)
 
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[flex_message],
                 )
@@ -56,8 +62,18 @@ class AudioHandler:
             remaining_seconds = int(seconds % 60)
             return f"{minutes}分{remaining_seconds}秒"
 
-    def _create_audio_flex_message(self, audio_id: str, duration: int, formatted_duration: str) -> FlexMessage:
+    @traced(stage="flex_build")
+    def _create_audio_flex_message(
+        self, audio_id: str, duration: int, formatted_duration: str
+    ) -> PrecompiledMessage:
         """音声受信用のFlexメッセージを作成"""
+        return self.message_template.render_message(
+            audio_id=audio_id[:20] + "...",  # IDが長いので短縮
+            duration=formatted_duration,
+        )
+
+    def _build_message_template(self) -> FlexMessage:
+        """音声受信用のFlexメッセージのテンプレート"""
         # ヘッダー（音声テーマの緑色）
         header_box = FlexBox(
             layout="vertical",
@@ -86,7 +102,7 @@ class AudioHandler:
                     contents=[
                         FlexText(text="音声ID", size="sm", color="#666666", flex=2),
                         FlexText(
-                            text=audio_id[:20] + "...",  # IDが長いので短縮
+                            text=text_slot("audio_id"),
                             size="xs",
                             wrap=True,
                             flex=3,
@@ -98,7 +114,7 @@ class AudioHandler:
                     layout="baseline",
                     contents=[
                         FlexText(text="再生時間", size="sm", color="#666666", flex=2),
-                        FlexText(text=formatted_duration, size="sm", flex=3, weight="bold"),
+                        FlexText(text=text_slot("duration"), size="sm", flex=3, weight="bold"),
                     ],
                     margin="md",
                 ),
@@ -158,6 +174,6 @@ class AudioHandler:
         bubble = FlexBubble(hero=header_box, body=body_box, footer=footer_box)
 
         return FlexMessage(
-            alt_text=f"音声受信: {formatted_duration}",
+            alt_text=f"音声受信: {text_slot('duration')}",
             contents=bubble
         )
\ No newline at end of file
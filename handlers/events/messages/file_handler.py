@@ -1,8 +1,8 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from linebot.v3.messaging import (
     AsyncMessagingApi,
-    ReplyMessageRequest,
+    Message,
     FlexMessage,
     FlexBubble,
     FlexBox,
@@ -11,30 +11,67 @@ from linebot.v3.messaging import (
 )
 from linebot.v3.webhooks import MessageEvent
 
+from core.flex_templates import (
+    Fragment,
+    drop_fragment,
+    flex_templates,
+    fragment_slot,
+    text_fallback,
+    text_slot,
+    truncate_text,
+)
+from core.outbound import reply_request
+from core.reply_cache import reply_cache
+from core.tracing import traced
+
 logger = logging.getLogger(__name__)
 
+# サイズの上限を超える場合の縮小の順序（ファイル名 → 説明 → 拡張子の行 → 警告フッター）
+FILE_MESSAGE_COMPACTIONS = (
+    truncate_text("file_name"),
+    drop_fragment("description"),
+    drop_fragment("extension_row"),
+    drop_fragment("footer"),
+)
+
 
 class FileHandler:
     """ファイルメッセージを処理するハンドラー"""
 
     def __init__(self, api: AsyncMessagingApi):
         self.api = api
+        # Flexメッセージのテンプレート（起動時に一度だけコンパイル）
+        self.message_template = flex_templates.get("file.message", self._build_message_template)
+        self.info_row_template = flex_templates.get(
+            "file.info_row",
+            lambda: self._create_file_info_row(text_slot("label"), text_slot("value")),
+        )
+        self.description_template = flex_templates.get(
+            "file.description", self._build_description_template
+        )
+        self.warning_footer_template = flex_templates.get(
+            "file.warning_footer", self._build_warning_footer_template
+        )
 
+    @traced()
     async def handle(self, event: MessageEvent) -> None:
         """ファイルメッセージの処理"""
         try:
             user_id = event.source.user_id
             logger.info(f"Received file from user: {user_id}")
 
-            # ファイル情報を取得・分析
+            # ファイル情報を取得
             file_info = self._get_file_info(event)
-            analysis = self._analyze_file(file_info)
 
-            # Flexメッセージで応答
-            flex_message = self._create_file_flex_message(file_info, analysis)
+            # Flexメッセージで応答（同じファイル名・サイズ表示なら分析・描画済みのものを使用）
+            flex_message = reply_cache.get_or_render(
+                "file",
+                self._reply_cache_key(file_info),
+                lambda: self._create_file_flex_message(file_info, self._analyze_file(file_info)),
+            )
 
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[flex_message],
                 )
@@ -43,10 +80,20 @@ class FileHandler:
         except Exception as e:
             logger.error(f"FileHandler error: {e}")
 
+    def _reply_cache_key(self, file_info: Dict[str, Any]) -> tuple:
+        """返信の内容を決める入力（ファイル名と、サイズの表示・区分）"""
+        file_size = file_info.get("file_size", 0)
+        return (
+            file_info.get("file_name", ""),
+            self._format_file_size(file_size),
+            self._determine_size_category(file_size),
+        )
+
+    @traced(stage="flex_build")
     def _create_file_flex_message(
         self, file_info: Dict[str, Any], analysis: Dict[str, Any]
-    ) -> FlexMessage:
-        """ファイル受信用のFlexメッセージを作成"""
+    ) -> Message:
+        """ファイル受信用のFlexメッセージを作成（上限に収まらない場合はテキスト）"""
         file_name = file_info.get("file_name", "不明なファイル")
         file_type = analysis.get("type", "不明")
         formatted_size = analysis.get("formatted_size", "不明")
@@ -58,6 +105,56 @@ class FileHandler:
         # セキュリティレベルに応じた色テーマを選択
         color_theme = self._get_security_color_theme(security_level)
 
+        extension_row = None
+        if extension:
+            extension_row = self.info_row_template.render_fragment(label="拡張子", value=f".{extension}")
+
+        # セキュリティ警告フッター
+        footer = None
+        if security_level in ["危険", "注意"]:
+            footer = self._create_security_warning_footer(security_level)
+
+        security_colors = {
+            "安全": "#00B894",
+            "不明": "#74B9FF",
+            "注意": "#FDCB6E",
+            "危険": "#E84393"
+        }
+        executable_text = " (実行可能)" if is_executable else ""
+
+        return self.message_template.render_fitted_message(
+            {
+                "file_name": file_name,
+                "primary_color": color_theme["primary"],
+                "file_type": file_type,
+                "size": f"{formatted_size} ({size_category}サイズ)",
+                "extension_row": extension_row,
+                "security_level": f"{security_level}{executable_text}",
+                "security_color": security_colors.get(security_level, "#74B9FF"),
+                "description": self._create_file_description_box(file_type),
+                "footer": footer,
+            },
+            compactions=FILE_MESSAGE_COMPACTIONS,
+            fallback=lambda: text_fallback(self._format_file_response(file_info, analysis)),
+        )
+
+    def _format_file_response(self, file_info: Dict[str, Any], analysis: Dict[str, Any]) -> str:
+        """ファイル受信のテキスト応答"""
+        executable_text = " (実行可能)" if analysis.get("is_executable", False) else ""
+        return "\n".join(
+            [
+                "ファイルを受信しました！",
+                f"ファイル名: {file_info.get('file_name', '不明なファイル')}",
+                f"タイプ: {analysis.get('type', '不明')}",
+                f"サイズ: {analysis.get('formatted_size', '不明')}",
+                f"セキュリティ: {analysis.get('security_level', '不明')}{executable_text}",
+            ]
+        )
+
+    def _build_message_template(self) -> FlexMessage:
+        """ファイル受信用のFlexメッセージのテンプレート"""
+        primary_color = text_slot("primary_color")
+
         # ヘッダー部分
         header_box = FlexBox(
             layout="vertical",
@@ -69,34 +166,32 @@ class FileHandler:
                     color="#ffffff"
                 ),
                 FlexText(
-                    text=file_name,
+                    text=text_slot("file_name"),
                     size="md",
                     color="#ffffff",
                     wrap=True,
                     max_lines=2
                 ),
             ],
-            background_color=color_theme["primary"],
+            background_color=primary_color,
             padding_all="20px",
             spacing="md"
         )
 
-        # ファイル基本情報
+        # ファイル基本情報（拡張子の行は拡張子がある場合のみ）
         file_info_contents = [
             FlexText(
                 text="ファイル情報",
                 weight="bold",
                 size="md",
-                color=color_theme["primary"]
+                color=primary_color
             ),
             FlexSeparator(margin="sm"),
-            self._create_file_info_row("タイプ", file_type),
-            self._create_file_info_row("サイズ", f"{formatted_size} ({size_category}サイズ)"),
+            self._create_file_info_row("タイプ", text_slot("file_type")),
+            self._create_file_info_row("サイズ", text_slot("size")),
+            fragment_slot("extension_row"),
         ]
 
-        if extension:
-            file_info_contents.append(self._create_file_info_row("拡張子", f".{extension}"))
-
         file_info_box = FlexBox(
             layout="vertical",
             contents=file_info_contents,
@@ -109,10 +204,10 @@ class FileHandler:
                 text="セキュリティ情報",
                 weight="bold",
                 size="md",
-                color=color_theme["primary"]
+                color=primary_color
             ),
             FlexSeparator(margin="sm"),
-            self._create_security_info_row(security_level, is_executable),
+            self._create_security_info_row(text_slot("security_level"), text_slot("security_color")),
         ]
 
         security_info_box = FlexBox(
@@ -121,13 +216,8 @@ class FileHandler:
             margin="xl"
         )
 
-        # ファイル説明セクション
-        description_box = self._create_file_description_box(file_type)
-
-        # メインボディの構成
-        body_contents = [file_info_box, security_info_box]
-        if description_box:
-            body_contents.append(description_box)
+        # メインボディの構成（説明セクションは説明がある場合のみ）
+        body_contents = [file_info_box, security_info_box, fragment_slot("description")]
 
         body_box = FlexBox(
             layout="vertical",
@@ -136,19 +226,14 @@ class FileHandler:
             padding_all="20px"
         )
 
-        # セキュリティ警告フッター
-        footer_box = None
-        if security_level in ["危険", "注意"]:
-            footer_box = self._create_security_warning_footer(security_level)
-
         bubble = FlexBubble(
             hero=header_box,
             body=body_box,
-            footer=footer_box
+            footer=fragment_slot("footer")
         )
 
         return FlexMessage(
-            alt_text=f"ファイル受信: {file_name}",
+            alt_text=f"ファイル受信: {text_slot('file_name')}",
             contents=bubble
         )
 
@@ -174,18 +259,8 @@ class FileHandler:
             margin="md"
         )
 
-    def _create_security_info_row(self, security_level: str, is_executable: bool) -> FlexBox:
+    def _create_security_info_row(self, security_text: str, color: str) -> FlexBox:
         """セキュリティ情報の行を作成"""
-        security_colors = {
-            "安全": "#00B894",
-            "不明": "#74B9FF",
-            "注意": "#FDCB6E",
-            "危険": "#E84393"
-        }
-
-        color = security_colors.get(security_level, "#74B9FF")
-        executable_text = " (実行可能)" if is_executable else ""
-
         return FlexBox(
             layout="baseline",
             contents=[
@@ -196,7 +271,7 @@ class FileHandler:
                     flex=2
                 ),
                 FlexText(
-                    text=f"{security_level}{executable_text}",
+                    text=security_text,
                     size="sm",
                     color=color,
                     weight="bold",
@@ -206,7 +281,7 @@ class FileHandler:
             margin="md"
         )
 
-    def _create_file_description_box(self, file_type: str) -> FlexBox:
+    def _create_file_description_box(self, file_type: str) -> Optional[Fragment]:
         """ファイルタイプの説明ボックスを作成"""
         descriptions = {
             "画像": "写真や図表などの画像データです。",
@@ -223,6 +298,10 @@ class FileHandler:
         if not description:
             return None
 
+        return self.description_template.render_fragment(description=description)
+
+    def _build_description_template(self) -> FlexBox:
+        """ファイルタイプの説明ボックスのテンプレート"""
         return FlexBox(
             layout="vertical",
             contents=[
@@ -233,7 +312,7 @@ class FileHandler:
                     color="#6C5CE7"
                 ),
                 FlexText(
-                    text=description,
+                    text=text_slot("description"),
                     size="sm",
                     wrap=True,
                     color="#666666",
@@ -246,7 +325,7 @@ class FileHandler:
             corner_radius="8px"
         )
 
-    def _create_security_warning_footer(self, security_level: str) -> FlexBox:
+    def _create_security_warning_footer(self, security_level: str) -> Fragment:
         """セキュリティ警告フッターを作成"""
         if security_level == "危険":
             warning_text = "実行可能ファイルです。開く際は十分注意してください。"
@@ -255,18 +334,22 @@ class FileHandler:
             warning_text = "圧縮ファイルです。中身を確認してから展開してください。"
             color = "#FDCB6E"
 
+        return self.warning_footer_template.render_fragment(warning_text=warning_text, color=color)
+
+    def _build_warning_footer_template(self) -> FlexBox:
+        """セキュリティ警告フッターのテンプレート"""
         return FlexBox(
             layout="vertical",
             contents=[
                 FlexText(
-                    text=warning_text,
+                    text=text_slot("warning_text"),
                     size="sm",
                     color="#ffffff",
                     wrap=True,
                     weight="bold"
                 )
             ],
-            background_color=color,
+            background_color=text_slot("color"),
             padding_all="16px"
         )
 
@@ -296,6 +379,7 @@ class FileHandler:
 
         return file_info
 
+    @traced()
     def _analyze_file(self, file_info: Dict[str, Any]) -> Dict[str, Any]:
         """ファイル情報を分析"""
         file_name = file_info.get("file_name", "")
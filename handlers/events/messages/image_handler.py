@@ -1,7 +1,6 @@
 import logging
 from linebot.v3.messaging import (
     AsyncMessagingApi,
-    ReplyMessageRequest,
     FlexMessage,
     FlexBubble,
     FlexBox,
@@ -10,6 +9,10 @@ from linebot.v3.messaging import (
 )
 from linebot.v3.webhooks import MessageEvent
 
+from core.flex_templates import PrecompiledMessage, flex_templates, text_slot
+from core.outbound import reply_request
+from core.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,7 +21,10 @@ class ImageHandler:
 
     def __init__(self, api: AsyncMessagingApi):
         self.api = api
+        # Flexメッセージのテンプレート（起動時に一度だけコンパイル）
+        self.message_template = flex_templates.get("image.message", self._build_message_template)
 
+    @traced()
     async def handle(self, event: MessageEvent) -> None:
         """画像メッセージの処理"""
         try:
@@ -29,7 +35,7 @@ class ImageHandler:
             flex_message = self._create_image_flex_message(image_id)
 
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[flex_message],
                 )
@@ -38,8 +44,13 @@ class ImageHandler:
         except Exception as e:
             logger.error(f"ImageHandler error: {e}")
 
-    def _create_image_flex_message(self, image_id: str) -> FlexMessage:
+    @traced(stage="flex_build")
+    def _create_image_flex_message(self, image_id: str) -> PrecompiledMessage:
         """画像受信用のFlexメッセージを作成"""
+        return self.message_template.render_message(image_id=image_id, image_id_short=image_id[:10])
+
+    def _build_message_template(self) -> FlexMessage:
+        """画像受信用のFlexメッセージのテンプレート"""
         # ヘッダー部分（紫色のテーマ）
         header_box = FlexBox(
             layout="vertical",
@@ -69,7 +80,7 @@ class ImageHandler:
                     contents=[
                         FlexText(text="画像ID", size="sm", color="#666666", flex=2),
                         FlexText(
-                            text=image_id,
+                            text=text_slot("image_id"),
                             size="xs",
                             wrap=True,
                             flex=3,
@@ -149,4 +160,4 @@ class ImageHandler:
         # Flexバブルを組み立て
         bubble = FlexBubble(hero=header_box, body=body_box, footer=footer_box)
 
-        return FlexMessage(alt_text=f"画像受信: ID {image_id[:10]}...", contents=bubble)
+        return FlexMessage(alt_text=f"画像受信: ID {text_slot('image_id_short')}...", contents=bubble)
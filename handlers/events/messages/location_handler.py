@@ -1,9 +1,8 @@
 import logging
-import math
 from typing import Dict, Any, List
 from linebot.v3.messaging import (
     AsyncMessagingApi,
-    ReplyMessageRequest,
+    Message,
     TextMessage,
     FlexMessage,
     FlexBubble,
@@ -15,14 +14,49 @@ from linebot.v3.messaging import (
 )
 from linebot.v3.webhooks import MessageEvent
 
+from core.flex_templates import (
+    drop_fragment,
+    flex_templates,
+    fragment_slot,
+    text_fallback,
+    text_slot,
+    truncate_text,
+)
+from core.gazetteer import CITY_KINDS, get_gazetteer
+from core.outbound import reply_request
+from core.tracing import traced
+
 logger = logging.getLogger(__name__)
 
+# 最寄り駅として表示する距離の上限（km）
+NEAREST_STATION_MAX_KM = 3.0
+
+# サイズの上限を超える場合の縮小の順序（住所 → タイトル → 地域情報の行 → 地図ボタン）
+LOCATION_MESSAGE_COMPACTIONS = (
+    truncate_text("address"),
+    truncate_text("title"),
+    drop_fragment("region_rows"),
+    drop_fragment("map_button"),
+)
+
 
 class LocationHandler:
 
     def __init__(self, api: AsyncMessagingApi):
         self.api = api
+        # 最寄りの市区町村・駅の検索用の地名辞書（起動時に一度だけ読み込み）
+        self.gazetteer = get_gazetteer()
+        # Flexメッセージのテンプレート（起動時に一度だけコンパイル）
+        self.message_template = flex_templates.get("location.message", self._build_message_template)
+        self.info_row_template = flex_templates.get(
+            "location.info_row",
+            lambda: self._create_info_row(text_slot("label"), text_slot("value")),
+        )
+        self.map_button_template = flex_templates.get(
+            "location.map_button", self._build_map_button_template
+        )
 
+    @traced()
     async def handle(self, event: MessageEvent) -> None:
         try:
             user_id = event.source.user_id
@@ -34,21 +68,21 @@ class LocationHandler:
             if not location_info:
                 response_text = "位置情報を受信しましたが、詳細を取得できませんでした。"
                 await self.api.reply_message(
-                    ReplyMessageRequest(
+                    reply_request(
                         reply_token=event.reply_token,
                         messages=[TextMessage(text=response_text)],
                     )
                 )
                 return
 
-            # 位置情報の分析
+            # 位置情報の分析・Flexメッセージの作成
+            # （座標とタイトル・住所の組み合わせはほぼ毎回異なり、利用者の入力を保持することに
+            # なるため描画済みの返信のキャッシュは使わない）
             analysis = self._analyze_location(location_info)
-
-            # Flexメッセージで応答
             flex_message = self._create_location_flex_message(location_info, analysis)
 
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[flex_message],
                 )
@@ -57,10 +91,11 @@ class LocationHandler:
         except Exception as e:
             logger.error(f"LocationHandler error: {e}")
 
+    @traced(stage="flex_build")
     def _create_location_flex_message(
         self, location_info: Dict[str, Any], analysis: Dict[str, Any]
-    ) -> FlexMessage:
-
+    ) -> Message:
+        """位置情報用のFlexメッセージを作成（上限に収まらない場合はテキスト）"""
         title = location_info.get("title", "位置情報")
         address = location_info.get("address", "住所不明")
         lat = location_info.get("latitude", "不明")
@@ -72,10 +107,64 @@ class LocationHandler:
         location_type = analysis.get("location_type", "一般位置")
         nearest_city = analysis.get("nearest_city")
         nearest_distance = analysis.get("nearest_distance")
+        nearest_station = analysis.get("nearest_station")
+        nearest_station_distance = analysis.get("nearest_station_distance")
 
         # 地域に応じた色テーマ
         color_theme = self._get_location_color_theme(region, location_type)
 
+        # 地域情報のうち該当するものがある場合のみ表示する行
+        region_rows = []
+
+        if area:
+            region_rows.append(self.info_row_template.render_fragment(label="エリア", value=area))
+
+        if location_type != "一般位置":
+            region_rows.append(
+                self.info_row_template.render_fragment(label="場所タイプ", value=location_type)
+            )
+
+        if nearest_city and nearest_distance is not None:
+            region_rows.append(
+                self.info_row_template.render_fragment(
+                    label="最寄り都市",
+                    value=f"{nearest_city} ({self._format_distance(nearest_distance)})",
+                )
+            )
+
+        if nearest_station and nearest_station_distance is not None:
+            region_rows.append(
+                self.info_row_template.render_fragment(
+                    label="最寄り駅",
+                    value=f"{nearest_station} ({self._format_distance(nearest_station_distance)})",
+                )
+            )
+
+        # フッターボタン（地図リンク）
+        map_button = None
+        if lat != "不明" and lng != "不明":
+            map_button = self.map_button_template.render_fragment(
+                coordinates=f"{lat},{lng}", primary_color=color_theme["primary"]
+            )
+
+        return self.message_template.render_fitted_message(
+            {
+                "primary_color": color_theme["primary"],
+                "title": title,
+                "address": address,
+                "coordinates": f"{lat}, {lng}",
+                "precision": precision,
+                "region": region,
+                "region_rows": region_rows,
+                "map_button": map_button,
+            },
+            compactions=LOCATION_MESSAGE_COMPACTIONS,
+            fallback=lambda: text_fallback(self._format_location_response(location_info, analysis)),
+        )
+
+    def _build_message_template(self) -> FlexMessage:
+        primary_color = text_slot("primary_color")
+
         # ヘッダーボックス
         header_box = FlexBox(
             layout="vertical",
@@ -87,13 +176,13 @@ class LocationHandler:
                     color="#ffffff"
                 ),
                 FlexText(
-                    text=title,
+                    text=text_slot("title"),
                     size="md",
                     color="#ffffff",
                     wrap=True
                 ),
             ],
-            background_color=color_theme["primary"],
+            background_color=primary_color,
             padding_all="20px",
             spacing="md"
         )
@@ -104,12 +193,12 @@ class LocationHandler:
                 text="基本情報",
                 weight="bold",
                 size="md",
-                color=color_theme["primary"]
+                color=primary_color
             ),
             FlexSeparator(margin="sm"),
-            self._create_info_row("住所", address),
-            self._create_info_row("座標", f"{lat}, {lng}"),
-            self._create_info_row("精度", precision),
+            self._create_info_row("住所", text_slot("address")),
+            self._create_info_row("座標", text_slot("coordinates")),
+            self._create_info_row("精度", text_slot("precision")),
         ]
 
         basic_info_box = FlexBox(
@@ -118,33 +207,19 @@ class LocationHandler:
             margin="lg"
         )
 
-        # 地域情報セクション
+        # 地域情報セクション（エリア・場所タイプ・最寄り都市の行が続く）
         region_info_contents = [
             FlexText(
                 text="地域情報",
                 weight="bold",
                 size="md",
-                color=color_theme["primary"]
+                color=primary_color
             ),
             FlexSeparator(margin="sm"),
-            self._create_info_row("地域", region),
+            self._create_info_row("地域", text_slot("region")),
+            fragment_slot("region_rows"),
         ]
 
-        if area:
-            region_info_contents.append(self._create_info_row("エリア", area))
-
-        if location_type != "一般位置":
-            region_info_contents.append(self._create_info_row("場所タイプ", location_type))
-
-        if nearest_city and nearest_distance is not None:
-            distance_text = (
-                f"約{nearest_distance*1000:.0f}m" if nearest_distance < 1
-                else f"約{nearest_distance:.1f}km"
-            )
-            region_info_contents.append(
-                self._create_info_row("最寄り都市", f"{nearest_city} ({distance_text})")
-            )
-
         region_info_box = FlexBox(
             layout="vertical",
             contents=region_info_contents,
@@ -161,37 +236,26 @@ class LocationHandler:
             padding_all="20px"
         )
 
-        # フッターボタン（地図リンク）
-        footer_contents = []
-        if lat != "不明" and lng != "不明":
-            map_button = FlexButton(
-                style="primary",
-                action=URIAction(
-                    label="地図で確認",
-                    uri=f"https://maps.google.com/?q={lat},{lng}"
-                ),
-                color=color_theme["primary"]
-            )
-            footer_contents.append(map_button)
-
-        footer_contents.append(
+        # フッター（地図リンクのボタンは座標がある場合のみ）
+        footer_contents = [
+            fragment_slot("map_button", FlexButton),
             FlexText(
                 text="位置情報をありがとうございます",
                 size="sm",
-                color=color_theme["primary"],
+                color=primary_color,
                 align="center",
                 weight="bold",
                 wrap=True,
                 margin="md"
-            )
-        )
+            ),
+        ]
 
         footer_box = FlexBox(
             layout="vertical",
             contents=footer_contents,
             spacing="sm",
             padding_all="20px"
-        ) if footer_contents else None
+        )
 
         # バブル作成
         bubble = FlexBubble(
@@ -201,10 +265,20 @@ class LocationHandler:
         )
 
         return FlexMessage(
-            alt_text=f"位置情報: {title}",
+            alt_text=f"位置情報: {text_slot('title')}",
             contents=bubble
         )
 
+    def _build_map_button_template(self) -> FlexButton:
+        return FlexButton(
+            style="primary",
+            action=URIAction(
+                label="地図で確認",
+                uri=f"https://maps.google.com/?q={text_slot('coordinates')}"
+            ),
+            color=text_slot("primary_color")
+        )
+
     def _create_info_row(self, label: str, value: str) -> FlexBox:
         return FlexBox(
             layout="baseline",
@@ -288,6 +362,7 @@ class LocationHandler:
 
         return location_info
 
+    @traced()
     def _analyze_location(self, location_info: Dict[str, Any]) -> Dict[str, Any]:
         lat = location_info.get("latitude")
         lng = location_info.get("longitude")
@@ -300,6 +375,8 @@ class LocationHandler:
             "location_type": "一般位置",
             "nearest_city": None,
             "nearest_distance": None,
+            "nearest_station": None,
+            "nearest_station_distance": None,
         }
 
         if lat is not None and lng is not None:
@@ -310,11 +387,18 @@ class LocationHandler:
             region_info = self._determine_japanese_region(lat, lng)
             analysis.update(region_info)
 
-            # 最寄り都市からの距離計算
-            distances = self._calculate_distance_from_major_cities(lat, lng)
-            nearest_city, nearest_distance = self._get_nearest_city(distances)
-            analysis["nearest_city"] = nearest_city
-            analysis["nearest_distance"] = nearest_distance
+            # 最寄りの市区町村（役所の位置）・駅
+            nearest = self.gazetteer.nearest_one(lat, lng, CITY_KINDS)
+            if nearest is not None:
+                city, distance = nearest
+                analysis["nearest_city"] = city.display_name
+                analysis["nearest_distance"] = distance
+            station = self.gazetteer.nearest_one(
+                lat, lng, ("station",), max_distance_km=NEAREST_STATION_MAX_KM
+            )
+            if station is not None:
+                analysis["nearest_station"] = station[0].name
+                analysis["nearest_station_distance"] = station[1]
 
         # 場所のタイプを判定
         analysis["location_type"] = self._determine_location_type(location_info)
@@ -369,45 +453,6 @@ class LocationHandler:
         else:
             return {"region": "海外", "timezone": "unknown", "area": "海外"}
 
-    def _calculate_distance_from_major_cities(self, lat: float, lng: float) -> Dict[str, float]:
-        """主要都市からの距離を計算"""
-        major_cities = {
-            "東京": (35.6762, 139.6503),
-            "大阪": (34.6937, 135.5023),
-            "名古屋": (35.1815, 136.9066),
-            "福岡": (33.5904, 130.4017),
-            "札幌": (43.0642, 141.3469),
-            "仙台": (38.2682, 140.8694),
-            "広島": (34.3853, 132.4553),
-            "京都": (35.0116, 135.7681),
-            "神戸": (34.6901, 135.1956),
-            "熊本": (32.7898, 130.7417),
-        }
-
-        distances = {}
-
-        for city_name, (city_lat, city_lng) in major_cities.items():
-            # ハバーサイン公式で距離計算
-            dlat = math.radians(lat - city_lat)
-            dlng = math.radians(lng - city_lng)
-            a = (math.sin(dlat / 2) ** 2 +
-                 math.cos(math.radians(city_lat)) * math.cos(math.radians(lat)) *
-                 math.sin(dlng / 2) ** 2)
-            c = 2 * math.asin(math.sqrt(a))
-            distance_km = 6371 * c  # 地球の半径 6371km
-            distances[city_name] = distance_km
-
-        return distances
-
-    def _get_nearest_city(self, distances: Dict[str, float]) -> tuple:
-        if not distances:
-            return None, None
-
-        nearest_city = min(distances.keys(), key=lambda city: distances[city])
-        nearest_distance = distances[nearest_city]
-
-        return nearest_city, nearest_distance
-
     def _determine_location_type(self, location_info: Dict[str, Any]) -> str:
         title = location_info.get("title", "").lower()
         address = location_info.get("address", "").lower()
@@ -466,6 +511,12 @@ class LocationHandler:
         else:
             return "一般位置"
 
+    def _format_distance(self, distance: float) -> str:
+        """距離（km）の表示用の文字列"""
+        if distance < 1:
+            return f"約{distance*1000:.0f}m"
+        return f"約{distance:.1f}km"
+
     def _format_location_response(
         self, location_info: Dict[str, Any], analysis: Dict[str, Any]
     ) -> str:
@@ -480,6 +531,8 @@ class LocationHandler:
         location_type = analysis.get("location_type", "一般位置")
         nearest_city = analysis.get("nearest_city")
         nearest_distance = analysis.get("nearest_distance")
+        nearest_station = analysis.get("nearest_station")
+        nearest_station_distance = analysis.get("nearest_station_distance")
 
         response_parts = [
             "位置情報を受信しました！",
@@ -499,12 +552,16 @@ class LocationHandler:
         if location_type != "一般位置":
             response_parts.append(f"場所タイプ: {location_type}")
 
-        # 最寄り都市情報
+        # 最寄り都市・駅の情報
         if nearest_city and nearest_distance is not None:
-            if nearest_distance < 1:
-                response_parts.append(f"最寄り都市: {nearest_city} (約{nearest_distance*1000:.0f}m)")
-            else:
-                response_parts.append(f"最寄り都市: {nearest_city} (約{nearest_distance:.1f}km)")
+            response_parts.append(
+                f"最寄り都市: {nearest_city} ({self._format_distance(nearest_distance)})"
+            )
+
+        if nearest_station and nearest_station_distance is not None:
+            response_parts.append(
+                f"最寄り駅: {nearest_station} ({self._format_distance(nearest_station_distance)})"
+            )
 
         response_parts.append("")  # 空行
 
@@ -549,7 +606,7 @@ class LocationHandler:
         # 距離による追加コメント
         if nearest_city and nearest_distance is not None:
             if nearest_distance < 5:
-                response_parts.append(f"{nearest_city}市内の位置ですね！")
+                response_parts.append(f"{nearest_city}内の位置ですね！")
             elif nearest_distance < 50:
                 response_parts.append(f"{nearest_city}近郊の位置情報ですね")
 
@@ -2,7 +2,7 @@ import logging
 from typing import Dict, Any
 from linebot.v3.messaging import (
     AsyncMessagingApi,
-    ReplyMessageRequest,
+    Message,
     TextMessage,
     FlexMessage,
     FlexBubble,
@@ -12,14 +12,40 @@ from linebot.v3.messaging import (
 )
 from linebot.v3.webhooks import MessageEvent
 
+from core.flex_templates import (
+    drop_fragment,
+    flex_templates,
+    fragment_slot,
+    text_fallback,
+    text_slot,
+)
+from core.outbound import reply_request
+from core.reply_cache import reply_cache
+from core.tracing import traced
+
 logger = logging.getLogger(__name__)
 
+# サイズの上限を超える場合は、テキスト・キーワード等のセクションを大きいものから省略
+STICKER_MESSAGE_COMPACTIONS = (drop_fragment("sections"),)
+
 
 class StickerHandler:
 
     def __init__(self, api: AsyncMessagingApi):
         self.api = api
+        # Flexメッセージのテンプレート（起動時に一度だけコンパイル）
+        self.message_template = flex_templates.get("sticker.message", self._build_message_template)
+        self.text_info_template = flex_templates.get(
+            "sticker.text_info", self._build_text_info_template
+        )
+        self.keyword_info_template = flex_templates.get(
+            "sticker.keyword_info", self._build_keyword_info_template
+        )
+        self.special_feature_template = flex_templates.get(
+            "sticker.special_feature", self._build_special_feature_template
+        )
 
+    @traced()
     async def handle(self, event: MessageEvent) -> None:
         try:
             user_id = event.source.user_id
@@ -32,18 +58,22 @@ class StickerHandler:
                 # 基本応答（Flexではない）
                 response_text = "スタンプを受信しましたが、情報が取得できませんでした。"
                 await self.api.reply_message(
-                    ReplyMessageRequest(
+                    reply_request(
                         reply_token=event.reply_token,
                         messages=[TextMessage(text=response_text)],
                     )
                 )
                 return
 
-            # Flexメッセージで応答
-            flex_message = self._create_sticker_flex_message(sticker_info)
+            # Flexメッセージで応答（同じステッカーなら作成済みのものを使用）
+            flex_message = reply_cache.get_or_render(
+                "sticker",
+                self._reply_cache_key(sticker_info),
+                lambda: self._create_sticker_flex_message(sticker_info),
+            )
 
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[flex_message],
                 )
@@ -52,8 +82,19 @@ class StickerHandler:
         except Exception as e:
             logger.error(f"StickerHandler error: {e}")
 
-    def _create_sticker_flex_message(self, sticker_info: Dict[str, Any]) -> FlexMessage:
+    def _reply_cache_key(self, sticker_info: Dict[str, Any]) -> tuple:
+        """返信の内容を決める入力"""
+        return (
+            sticker_info.get("package_id"),
+            sticker_info.get("sticker_id"),
+            sticker_info.get("sticker_resource_type"),
+            tuple(sticker_info.get("keywords") or ()),
+            sticker_info.get("text"),
+        )
 
+    @traced(stage="flex_build")
+    def _create_sticker_flex_message(self, sticker_info: Dict[str, Any]) -> Message:
+        """ステッカー用のFlexメッセージを作成（上限に収まらない場合はテキスト）"""
         package_id = sticker_info.get("package_id", "不明")
         sticker_id = sticker_info.get("sticker_id", "不明")
         resource_type = sticker_info.get("sticker_resource_type", "static")
@@ -63,6 +104,55 @@ class StickerHandler:
         # リソースタイプに応じた色テーマ
         theme = self._get_sticker_theme(resource_type)
 
+        # 情報がある場合のみ表示するセクション
+        sections = []
+
+        # テキスト情報がある場合
+        if text:
+            sections.append(
+                self.text_info_template.render_fragment(
+                    primary_color=theme["primary"], secondary_color=theme["secondary"], text=text
+                )
+            )
+
+        # キーワード情報がある場合
+        if keywords:
+            keyword_text = ", ".join(keywords[:5])  # 最大5個まで
+            if len(keywords) > 5:
+                keyword_text += f" (他{len(keywords)-5}個)"
+
+            sections.append(
+                self.keyword_info_template.render_fragment(
+                    primary_color=theme["primary"], keywords=keyword_text
+                )
+            )
+
+        # 動的ステッカーの場合は特別表示
+        if resource_type in ["ANIMATION", "SOUND", "ANIMATION_SOUND", "POPUP", "POPUP_SOUND"]:
+            sections.append(
+                self.special_feature_template.render_fragment(
+                    primary_color=theme["primary"],
+                    accent_color=theme["accent"],
+                    description=self._get_special_feature_description(resource_type),
+                )
+            )
+
+        return self.message_template.render_fitted_message(
+            {
+                "primary_color": theme["primary"],
+                "resource_type": resource_type,
+                "type_label": resource_type.upper(),
+                "package_id": package_id,
+                "sticker_id": sticker_id,
+                "sections": sections,
+            },
+            compactions=STICKER_MESSAGE_COMPACTIONS,
+            fallback=lambda: text_fallback(self._format_sticker_info(sticker_info)),
+        )
+
+    def _build_message_template(self) -> FlexMessage:
+        primary_color = text_slot("primary_color")
+
         # ヘッダーボックス
         header_box = FlexBox(
             layout="vertical",
@@ -74,13 +164,13 @@ class StickerHandler:
                     color="#ffffff"
                 ),
                 FlexText(
-                    text=f"{resource_type.upper()} ステッカー",
+                    text=f"{text_slot('type_label')} ステッカー",
                     size="md",
                     color="#ffffff",
                     wrap=True
                 ),
             ],
-            background_color=theme["primary"],
+            background_color=primary_color,
             padding_all="20px",
             spacing="md"
         )
@@ -91,12 +181,12 @@ class StickerHandler:
                 text="ステッカー情報",
                 weight="bold",
                 size="md",
-                color=theme["primary"]
+                color=primary_color
             ),
             FlexSeparator(margin="sm"),
-            self._create_sticker_info_row("パッケージID", package_id),
-            self._create_sticker_info_row("ステッカーID", sticker_id),
-            self._create_sticker_info_row("タイプ", resource_type.upper()),
+            self._create_sticker_info_row("パッケージID", text_slot("package_id")),
+            self._create_sticker_info_row("ステッカーID", text_slot("sticker_id")),
+            self._create_sticker_info_row("タイプ", text_slot("type_label")),
         ]
 
         basic_info_box = FlexBox(
@@ -105,90 +195,8 @@ class StickerHandler:
             margin="lg"
         )
 
-        # メインボディ
-        body_contents = [basic_info_box]
-
-        # テキスト情報がある場合
-        if text:
-            text_info_box = FlexBox(
-                layout="vertical",
-                contents=[
-                    FlexText(
-                        text="テキスト情報",
-                        weight="bold",
-                        size="md",
-                        color=theme["primary"]
-                    ),
-                    FlexSeparator(margin="sm"),
-                    FlexText(
-                        text=text,
-                        size="sm",
-                        wrap=True,
-                        margin="md",
-                        background_color=theme["secondary"],
-                        padding_all="12px",
-                        corner_radius="8px"
-                    )
-                ],
-                margin="xl"
-            )
-            body_contents.append(text_info_box)
-
-        # キーワード情報がある場合
-        if keywords:
-            keyword_text = ", ".join(keywords[:5])  # 最大5個まで
-            if len(keywords) > 5:
-                keyword_text += f" (他{len(keywords)-5}個)"
-
-            keyword_info_box = FlexBox(
-                layout="vertical",
-                contents=[
-                    FlexText(
-                        text="キーワード",
-                        weight="bold",
-                        size="md",
-                        color=theme["primary"]
-                    ),
-                    FlexSeparator(margin="sm"),
-                    FlexText(
-                        text=keyword_text,
-                        size="sm",
-                        wrap=True,
-                        margin="md",
-                        background_color="#F8F9FA",
-                        padding_all="12px",
-                        corner_radius="8px"
-                    )
-                ],
-                margin="xl"
-            )
-            body_contents.append(keyword_info_box)
-
-        # 動的ステッカーの場合は特別表示
-        if resource_type in ["ANIMATION", "SOUND", "ANIMATION_SOUND", "POPUP", "POPUP_SOUND"]:
-            special_feature_box = FlexBox(
-                layout="vertical",
-                contents=[
-                    FlexText(
-                        text="特別機能",
-                        weight="bold",
-                        size="md",
-                        color=theme["primary"]
-                    ),
-                    FlexText(
-                        text=self._get_special_feature_description(resource_type),
-                        size="sm",
-                        wrap=True,
-                        color="#666666",
-                        margin="sm"
-                    )
-                ],
-                margin="xl",
-                background_color=theme["accent"],
-                padding_all="12px",
-                corner_radius="8px"
-            )
-            body_contents.append(special_feature_box)
+        # メインボディ（テキスト・キーワード・特別機能のセクションが続く）
+        body_contents = [basic_info_box, fragment_slot("sections")]
 
         body_box = FlexBox(
             layout="vertical",
@@ -204,7 +212,7 @@ class StickerHandler:
                 FlexText(
                     text="素敵なステッカーをありがとうございます",
                     size="sm",
-                    color=theme["primary"],
+                    color=primary_color,
                     align="center",
                     weight="bold",
                     wrap=True
@@ -221,10 +229,82 @@ class StickerHandler:
         )
 
         return FlexMessage(
-            alt_text=f"ステッカー受信: {resource_type}",
+            alt_text=f"ステッカー受信: {text_slot('resource_type')}",
             contents=bubble
         )
 
+    def _build_text_info_template(self) -> FlexBox:
+        return FlexBox(
+            layout="vertical",
+            contents=[
+                FlexText(
+                    text="テキスト情報",
+                    weight="bold",
+                    size="md",
+                    color=text_slot("primary_color")
+                ),
+                FlexSeparator(margin="sm"),
+                FlexText(
+                    text=text_slot("text"),
+                    size="sm",
+                    wrap=True,
+                    margin="md",
+                    background_color=text_slot("secondary_color"),
+                    padding_all="12px",
+                    corner_radius="8px"
+                )
+            ],
+            margin="xl"
+        )
+
+    def _build_keyword_info_template(self) -> FlexBox:
+        return FlexBox(
+            layout="vertical",
+            contents=[
+                FlexText(
+                    text="キーワード",
+                    weight="bold",
+                    size="md",
+                    color=text_slot("primary_color")
+                ),
+                FlexSeparator(margin="sm"),
+                FlexText(
+                    text=text_slot("keywords"),
+                    size="sm",
+                    wrap=True,
+                    margin="md",
+                    background_color="#F8F9FA",
+                    padding_all="12px",
+                    corner_radius="8px"
+                )
+            ],
+            margin="xl"
+        )
+
+    def _build_special_feature_template(self) -> FlexBox:
+        return FlexBox(
+            layout="vertical",
+            contents=[
+                FlexText(
+                    text="特別機能",
+                    weight="bold",
+                    size="md",
+                    color=text_slot("primary_color")
+                ),
+                FlexText(
+                    text=text_slot("description"),
+                    size="sm",
+                    wrap=True,
+                    color="#666666",
+                    margin="sm"
+                )
+            ],
+            margin="xl",
+            background_color=text_slot("accent_color"),
+            padding_all="12px",
+            corner_radius="8px"
+        )
+
     def _create_sticker_info_row(self, label: str, value: str) -> FlexBox:
         return FlexBox(
             layout="baseline",
@@ -1,11 +1,12 @@
 import logging
 from linebot.v3.messaging import (
     AsyncMessagingApi,
-    ReplyMessageRequest,
     TextMessage,
 )
 from linebot.v3.webhooks import MessageEvent
 from commands import AVAILABLE_COMMANDS
+from core.outbound import reply_request
+from core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,7 @@ class TextHandler:
             cmd: command_class(api) for cmd, command_class in AVAILABLE_COMMANDS.items()
         }
 
+    @traced()
     async def handle(self, event: MessageEvent) -> None:
         """テキストメッセージの処理"""
         try:
@@ -59,7 +61,7 @@ class TextHandler:
     async def _reply_text(self, event: MessageEvent, text: str) -> None:
         """シンプルなテキストメッセージで返信"""
         await self.api.reply_message(
-            ReplyMessageRequest(
+            reply_request(
                 reply_token=event.reply_token, 
                 messages=[TextMessage(text=text)]
             )
@@ -1,7 +1,6 @@
 import logging
 from linebot.v3.messaging import (
     AsyncMessagingApi,
-    ReplyMessageRequest,
     FlexMessage,
     FlexBubble,
     FlexBox,
@@ -10,13 +9,20 @@ from linebot.v3.messaging import (
 )
 from linebot.v3.webhooks import MessageEvent
 
+from core.flex_templates import PrecompiledMessage, flex_templates, text_slot
+from core.outbound import reply_request
+from core.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 
 class VideoHandler:
     def __init__(self, api: AsyncMessagingApi):
         self.api = api
+        # Flexメッセージのテンプレート（起動時に一度だけコンパイル）
+        self.message_template = flex_templates.get("video.message", self._build_message_template)
 
+    @traced()
     async def handle(self, event: MessageEvent) -> None:
         try:
             video = event.message
@@ -29,7 +35,7 @@ class VideoHandler:
             flex_message = self._create_video_flex_message(video_id, duration)
 
             await self.api.reply_message(
-                ReplyMessageRequest(
+                reply_request(
                     reply_token=event.reply_token,
                     messages=[flex_message],
                 )
@@ -38,11 +44,17 @@ class VideoHandler:
         except Exception as e:
             logger.error(f"VideoHandler error: {e}")
 
-    def _create_video_flex_message(self, video_id: str, duration: int) -> FlexMessage:
-
+    @traced(stage="flex_build")
+    def _create_video_flex_message(self, video_id: str, duration: int) -> PrecompiledMessage:
         # 再生時間を読みやすい形式に変換
-        duration_formatted = self._format_duration(duration)
-        duration_category = self._categorize_duration(duration)
+        return self.message_template.render_message(
+            video_id=video_id,
+            duration=self._format_duration(duration),
+            category=self._categorize_duration(duration),
+        )
+
+    def _build_message_template(self) -> FlexMessage:
+        duration_formatted = text_slot("duration")
 
         # ヘッダーボックス
         header_box = FlexBox(
@@ -62,9 +74,9 @@ class VideoHandler:
         video_info_contents = [
             FlexText(text="動画情報", weight="bold", size="md", color="#E74C3C"),
             FlexSeparator(margin="sm"),
-            self._create_video_info_row("動画ID", video_id),
+            self._create_video_info_row("動画ID", text_slot("video_id")),
             self._create_video_info_row("再生時間", duration_formatted),
-            self._create_video_info_row("カテゴリ", duration_category),
+            self._create_video_info_row("カテゴリ", text_slot("category")),
         ]
 
         video_info_box = FlexBox(
@@ -4,7 +4,6 @@ from urllib.parse import parse_qs
 
 from linebot.v3.messaging import (
     AsyncMessagingApi,
-    ReplyMessageRequest,
     TextMessage,
     FlexMessage,
     FlexBubble,
@@ -14,6 +13,8 @@ from linebot.v3.messaging import (
 )
 from linebot.v3.webhooks import PostbackEvent
 
+from core.outbound import reply_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -212,7 +213,7 @@ class PostbackEventHandler:
         )
 
         await self.api.reply_message(
-            ReplyMessageRequest(
+            reply_request(
                 reply_token=event.reply_token,
                 messages=[flex_message],
             )
@@ -223,7 +224,7 @@ class PostbackEventHandler:
         response_text = f"未知のアクション: {action}\nサポートされていない操作です。"
 
         await self.api.reply_message(
-            ReplyMessageRequest(
+            reply_request(
                 reply_token=event.reply_token,
                 messages=[TextMessage(text=response_text)],
             )
@@ -241,7 +242,7 @@ class PostbackEventHandler:
             response_text = base_message
 
         await self.api.reply_message(
-            ReplyMessageRequest(
+            reply_request(
                 reply_token=event.reply_token,
                 messages=[TextMessage(text=response_text)],
             )
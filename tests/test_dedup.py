@@ -0,0 +1,108 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from core.dedup import EventDeduplicator, MemoryDedupBackend, compact_event_key
+
+dedup_module = sys.modules["core.dedup"]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dedup_module, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def add(backend, event_id):
+    return asyncio.run(backend.add_if_absent(compact_event_key(event_id)))
+
+
+def make_event(event_id, redelivery=False):
+    return SimpleNamespace(
+        webhook_event_id=event_id,
+        delivery_context=SimpleNamespace(is_redelivery=redelivery),
+    )
+
+
+def test_compact_event_key_is_fixed_length():
+    assert len(compact_event_key("01H" + "x" * 100)) == 16
+    assert compact_event_key("a") != compact_event_key("b")
+
+
+def test_duplicate_within_ttl_is_rejected(clock):
+    backend = MemoryDedupBackend(ttl=60)
+    assert add(backend, "e1") is True
+    clock.now += 59
+    assert add(backend, "e1") is False
+
+
+def test_entry_expires_after_ttl(clock):
+    backend = MemoryDedupBackend(ttl=60)
+    add(backend, "e1")
+    clock.now += 60
+    assert add(backend, "e1") is True
+    assert backend.evictions == 1
+    assert backend.get_stats()["entries"] == 1
+
+
+def test_oldest_entry_is_evicted_over_max_entries(clock):
+    backend = MemoryDedupBackend(ttl=60, max_entries=2)
+    for event_id in ("e1", "e2", "e3"):
+        clock.now += 1
+        add(backend, event_id)
+
+    assert backend.get_stats()["entries"] == 2
+    assert add(backend, "e3") is False
+    assert add(backend, "e1") is True  # 上限超過で破棄済み
+
+
+def test_discard_allows_event_again(clock):
+    backend = MemoryDedupBackend()
+    add(backend, "e1")
+    asyncio.run(backend.discard(compact_event_key("e1")))
+    assert add(backend, "e1") is True
+
+
+def test_deduplicator_filters_seen_events(clock):
+    deduplicator = EventDeduplicator(MemoryDedupBackend())
+    no_id = SimpleNamespace(webhook_event_id=None)
+
+    first = asyncio.run(deduplicator.filter_events([make_event("e1"), make_event("e2"), no_id]))
+    second = asyncio.run(deduplicator.filter_events([make_event("e1", redelivery=True), no_id]))
+
+    assert [getattr(event, "webhook_event_id") for event in first] == ["e1", "e2", None]
+    assert second == [no_id]
+    stats = deduplicator.get_stats()
+    assert (stats["hits"], stats["misses"], stats["redeliveries"]) == (1, 2, 1)
+
+
+def test_forget_lets_redelivery_through(clock):
+    deduplicator = EventDeduplicator(MemoryDedupBackend())
+    event = make_event("e1")
+    asyncio.run(deduplicator.filter_events([event]))
+    asyncio.run(deduplicator.forget([event]))
+
+    assert asyncio.run(deduplicator.filter_events([make_event("e1", redelivery=True)]))
+
+
+def test_backend_error_fails_open():
+    class BrokenBackend(MemoryDedupBackend):
+        async def add_if_absent(self, key):
+            raise ConnectionError("down")
+
+    deduplicator = EventDeduplicator(BrokenBackend())
+    events = [make_event("e1")]
+
+    assert asyncio.run(deduplicator.filter_events(events)) == events
+    assert deduplicator.errors == 1
@@ -0,0 +1,144 @@
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+from linebot.v3.messaging import ReplyMessageRequest, TextMessage
+from linebot.v3.messaging.exceptions import ApiException
+
+from core.delivery import RetryingMessagingApi, use_event
+
+
+def api_error(status, body=b""):
+    error = ApiException(status=status, reason="error")
+    error.body = body
+    return error
+
+
+def connect_error():
+    return aiohttp.ClientConnectorError(None, OSError(111, "Connection refused"))
+
+
+INVALID_REPLY_TOKEN = api_error(400, b'{"message":"Invalid reply token"}')
+
+
+class FakeApi:
+    """呼び出しごとに results の先頭を返す（例外なら送出）送信API"""
+
+    def __init__(self, reply_results=(), push_results=()):
+        self.reply_results = list(reply_results)
+        self.push_results = list(push_results)
+        self.replies = []
+        self.pushes = []
+
+    async def _next(self, results):
+        result = results.pop(0) if results else None
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def reply_message(self, request, **kwargs):
+        self.replies.append(request)
+        return await self._next(self.reply_results)
+
+    async def push_message(self, request, x_line_retry_key=None, **kwargs):
+        self.pushes.append((request, x_line_retry_key))
+        return await self._next(self.push_results)
+
+
+def make_event(timestamp_ms=None):
+    return SimpleNamespace(
+        reply_token="token",
+        source=SimpleNamespace(user_id="U1", group_id=None, room_id=None),
+        timestamp=timestamp_ms,
+    )
+
+
+def send_reply(delivery, event=None):
+    async def run():
+        request = ReplyMessageRequest(reply_token="token", messages=[TextMessage(text="hi")])
+        with use_event(event or make_event()):
+            return await delivery.reply_message(request)
+
+    return asyncio.run(run())
+
+
+def retrying(api, **kwargs):
+    return RetryingMessagingApi(api, max_attempts=3, base_delay=0, **kwargs)
+
+
+@pytest.mark.parametrize("error", [api_error(500), asyncio.TimeoutError()])
+def test_reply_is_not_retried_after_ambiguous_failure(error):
+    api = FakeApi(reply_results=[error, INVALID_REPLY_TOKEN])
+    delivery = retrying(api)
+
+    with pytest.raises(type(error)):
+        send_reply(delivery)
+
+    # 受付済みの可能性があるため、再送もプッシュでの再送信もしない
+    assert len(api.replies) == 1
+    assert api.pushes == []
+    assert delivery.stats["reply"]["retried"] == 0
+    assert delivery.stats["reply"]["failed"] == 1
+    assert delivery.stats["reply"]["fallback_push"] == 0
+
+
+def test_reply_is_retried_after_connect_error():
+    api = FakeApi(reply_results=[connect_error(), None])
+    delivery = retrying(api)
+
+    send_reply(delivery)
+
+    assert len(api.replies) == 2
+    assert delivery.stats["reply"]["retried"] == 1
+    assert delivery.stats["reply"]["sent"] == 1
+    assert api.pushes == []
+
+
+def test_invalid_reply_token_falls_back_to_push_with_retry_key():
+    api = FakeApi(reply_results=[connect_error(), INVALID_REPLY_TOKEN])
+    delivery = retrying(api)
+
+    send_reply(delivery)
+
+    assert len(api.pushes) == 1
+    push_request, retry_key = api.pushes[0]
+    assert push_request.to == "U1"
+    assert [m.text for m in push_request.messages] == ["hi"]
+    assert retry_key
+    assert delivery.stats["reply"]["fallback_push"] == 1
+    assert delivery.stats["push"]["sent"] == 1
+
+
+def test_expired_reply_token_skips_reply():
+    api = FakeApi()
+    delivery = retrying(api, reply_token_ttl=60)
+
+    send_reply(delivery, make_event(timestamp_ms=1000))
+
+    assert api.replies == []
+    assert len(api.pushes) == 1
+
+
+def test_fallback_disabled_raises_invalid_reply_token():
+    api = FakeApi(reply_results=[INVALID_REPLY_TOKEN])
+    delivery = retrying(api, push_fallback=False)
+
+    with pytest.raises(ApiException):
+        send_reply(delivery)
+
+    assert api.pushes == []
+    assert delivery.stats["reply"]["failed"] == 1
+
+
+def test_push_retries_reuse_retry_key_and_409_is_deduplicated():
+    api = FakeApi(push_results=[api_error(500), api_error(409)])
+    delivery = retrying(api)
+
+    asyncio.run(delivery.push_message(SimpleNamespace(to="U1")))
+
+    keys = [key for _, key in api.pushes]
+    assert len(keys) == 2 and keys[0] == keys[1]
+    assert delivery.stats["push"]["retried"] == 1
+    assert delivery.stats["push"]["deduplicated"] == 1
+    assert delivery.stats["push"]["failed"] == 0
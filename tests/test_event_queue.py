@@ -0,0 +1,182 @@
+import asyncio
+
+import pytest
+
+from core.event_queue import (
+    BACKPRESSURE_WAIT,
+    EventDispatcher,
+    EventQueueFullError,
+)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 5))
+
+
+def blocking_handler():
+    """release がセットされるまで戻らないハンドラーと、処理したバッチの記録"""
+    release = asyncio.Event()
+    handled = []
+
+    async def handler(events, start_time, context):
+        await release.wait()
+        handled.append((events, context))
+
+    return handler, release, handled
+
+
+def test_reject_mode_raises_when_queue_is_full():
+    async def scenario():
+        handler, release, handled = blocking_handler()
+        dispatcher = EventDispatcher(handler, max_size=1, worker_count=1)
+        await dispatcher.start()
+
+        await dispatcher.submit(["a"], 0.0)
+        await asyncio.sleep(0)  # ワーカーが1件目を取り出して処理中になる
+        await dispatcher.submit(["b"], 0.0)
+        with pytest.raises(EventQueueFullError):
+            await dispatcher.submit(["c"], 0.0)
+
+        release.set()
+        await dispatcher.drain()
+        return handled, dispatcher.get_stats()
+
+    handled, stats = run(scenario())
+    assert [events for events, _ in handled] == [["a"], ["b"]]
+    assert stats["rejected_batches"] == 1
+    assert stats["enqueued_batches"] == 2
+    assert stats["max_depth"] == 1
+
+
+def test_wait_mode_rejects_after_put_timeout():
+    async def scenario():
+        handler, release, _ = blocking_handler()
+        dispatcher = EventDispatcher(
+            handler, max_size=1, worker_count=1, backpressure=BACKPRESSURE_WAIT, put_timeout=0.05
+        )
+        await dispatcher.start()
+        await dispatcher.submit(["a"], 0.0)
+        await asyncio.sleep(0)
+        await dispatcher.submit(["b"], 0.0)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(EventQueueFullError):
+            await dispatcher.submit(["c"], 0.0)
+        waited = loop.time() - started
+
+        release.set()
+        await dispatcher.drain()
+        return waited, dispatcher.get_stats()
+
+    waited, stats = run(scenario())
+    assert waited >= 0.04
+    assert stats["rejected_batches"] == 1
+
+
+def test_wait_mode_accepts_when_space_frees_up():
+    async def scenario():
+        handler, release, handled = blocking_handler()
+        dispatcher = EventDispatcher(
+            handler, max_size=1, worker_count=1, backpressure=BACKPRESSURE_WAIT, put_timeout=1.0
+        )
+        await dispatcher.start()
+        await dispatcher.submit(["a"], 0.0)
+        await asyncio.sleep(0)
+        await dispatcher.submit(["b"], 0.0)
+
+        asyncio.get_running_loop().call_later(0.01, release.set)
+        await dispatcher.submit(["c"], 0.0)
+        await dispatcher.drain()
+        return handled, dispatcher.get_stats()
+
+    handled, stats = run(scenario())
+    assert [events for events, _ in handled] == [["a"], ["b"], ["c"]]
+    assert stats["rejected_batches"] == 0
+
+
+def test_submit_after_drain_raises():
+    async def scenario():
+        handler, release, _ = blocking_handler()
+        release.set()
+        dispatcher = EventDispatcher(handler)
+        await dispatcher.start()
+        await dispatcher.drain()
+        with pytest.raises(EventQueueFullError):
+            await dispatcher.submit(["late"], 0.0)
+
+    run(scenario())
+
+
+def test_submit_before_start_raises():
+    async def scenario():
+        handler, _, _ = blocking_handler()
+        with pytest.raises(EventQueueFullError):
+            await EventDispatcher(handler).submit(["early"], 0.0)
+
+    run(scenario())
+
+
+def test_drain_processes_queued_batches_before_stopping_workers():
+    async def scenario():
+        handled = []
+
+        async def handler(events, start_time, context):
+            await asyncio.sleep(0.01)
+            handled.append((events, context))
+
+        dispatcher = EventDispatcher(handler, max_size=10, worker_count=2)
+        await dispatcher.start()
+        for index in range(5):
+            await dispatcher.submit([index], 0.0, context=f"ctx-{index}")
+        await dispatcher.drain()
+        return handled, dispatcher
+
+    handled, dispatcher = run(scenario())
+    assert sorted(events[0] for events, _ in handled) == [0, 1, 2, 3, 4]
+    assert all(context == f"ctx-{events[0]}" for events, context in handled)
+    stats = dispatcher.get_stats()
+    assert stats["processed_batches"] == 5
+    assert stats["depth"] == 0
+    assert dispatcher._workers == []
+
+
+def test_drain_timeout_cancels_remaining_work():
+    async def scenario():
+        handler, _, handled = blocking_handler()  # 解放されないハンドラー
+        dispatcher = EventDispatcher(handler, max_size=10, worker_count=1)
+        await dispatcher.start()
+        await dispatcher.submit(["a"], 0.0)
+        await dispatcher.submit(["b"], 0.0)
+        await dispatcher.drain(timeout=0.02)
+        return handled, dispatcher
+
+    handled, dispatcher = run(scenario())
+    assert handled == []
+    assert dispatcher._workers == []
+
+
+def test_handler_error_does_not_stop_worker():
+    async def scenario():
+        handled = []
+
+        async def handler(events, start_time, context):
+            if events == ["boom"]:
+                raise RuntimeError("boom")
+            handled.append(events)
+
+        dispatcher = EventDispatcher(handler, worker_count=1)
+        await dispatcher.start()
+        await dispatcher.submit(["boom"], 0.0)
+        await dispatcher.submit(["ok"], 0.0)
+        await dispatcher.drain()
+        return handled, dispatcher.get_stats()
+
+    handled, stats = run(scenario())
+    assert handled == [["ok"]]
+    assert stats["processed_batches"] == 2
+
+
+def test_unknown_backpressure_mode():
+    with pytest.raises(ValueError):
+        EventDispatcher(lambda *args: None, backpressure="drop")
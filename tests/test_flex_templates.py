@@ -0,0 +1,157 @@
+import json
+
+import pytest
+from linebot.v3.messaging import FlexBox, FlexBubble, FlexMessage, FlexText, TextMessage
+
+from core.flex_templates import (
+    FLEX_ALT_TEXT_MAX_CHARS,
+    FLEX_MESSAGE_MAX_BYTES,
+    FlexTemplate,
+    PayloadTooLarge,
+    PrecompiledMessage,
+    drop_fragment,
+    fragment_slot,
+    text_fallback,
+    text_slot,
+    truncate_text,
+)
+from handlers.events.messages.file_handler import FileHandler
+from handlers.events.messages.location_handler import LocationHandler
+
+
+def build_message():
+    return FlexMessage(
+        alt_text=f"受信: {text_slot('title')}",
+        contents=FlexBubble(
+            body=FlexBox(
+                layout="vertical",
+                contents=[FlexText(text=text_slot("title")), fragment_slot("rows")],
+            )
+        ),
+    )
+
+
+def build_row():
+    return FlexBox(layout="vertical", contents=[FlexText(text=text_slot("value"))])
+
+
+@pytest.fixture
+def template():
+    return FlexTemplate("test.message", build_message)
+
+
+@pytest.fixture
+def row_template():
+    return FlexTemplate("test.row", build_row)
+
+
+def sent_json(message):
+    """送信されるJSON（PrecompiledMessage はサイズも検証）"""
+    raw = message.to_json().encode()
+    assert len(raw) == message.size
+    return json.loads(raw)
+
+
+def test_render_size_matches_serialized_bytes(template, row_template):
+    rows = [row_template.render_fragment(value="値\"\\\n")]
+    message = template.render_message(title="タイトル", rows=rows)
+
+    payload = sent_json(message)
+    assert payload["altText"] == "受信: タイトル"
+    assert payload["contents"]["body"]["contents"][1]["contents"][0]["text"] == "値\"\\\n"
+    FlexMessage.from_dict(payload)
+
+
+def test_empty_fragment_slot_is_omitted(template):
+    payload = sent_json(template.render_message(title="t", rows=[]))
+    assert len(payload["contents"]["body"]["contents"]) == 1
+
+
+def test_message_within_limit_is_not_compacted(template):
+    message = template.render_fitted_message(
+        {"title": "short", "rows": []}, compactions=[truncate_text("title")]
+    )
+    assert sent_json(message)["altText"] == "受信: short"
+    assert template.compactions == 0
+
+
+def test_truncate_text_fits_oversized_value(template):
+    title = "あ" * 20000
+    message = template.render_fitted_message(
+        {"title": title, "rows": []}, compactions=[truncate_text("title")]
+    )
+
+    payload = sent_json(message)
+    assert message.size <= FLEX_MESSAGE_MAX_BYTES
+    text = payload["contents"]["body"]["contents"][0]["text"]
+    assert text.endswith("…") and title.startswith(text[:-1])
+    assert template.compactions == 1
+
+
+def test_drop_fragment_removes_largest_rows_first(template, row_template):
+    rows = [row_template.render_fragment(value=value) for value in ("a", "b" * 40000, "c")]
+    message = template.render_fitted_message(
+        {"title": "t", "rows": rows}, compactions=[drop_fragment("rows")]
+    )
+
+    body = sent_json(message)["contents"]["body"]["contents"]
+    assert [row["contents"][0]["text"] for row in body[1:]] == ["a", "c"]
+
+
+def test_fallback_when_compactions_do_not_fit(template):
+    values = {"title": "x" * 40000, "rows": []}
+
+    message = template.render_fitted_message(values, fallback=lambda: text_fallback("y" * 6000))
+    assert isinstance(message, TextMessage)
+    assert len(message.text) == 5000
+    assert template.fallbacks == 1
+
+    with pytest.raises(PayloadTooLarge):
+        template.render_fitted_message(values)
+
+
+def test_alt_text_is_truncated_to_limit(template):
+    title = "長" * 3000
+    message = template.render_fitted_message({"title": title, "rows": []})
+
+    payload = sent_json(message)
+    assert len(payload["altText"]) <= FLEX_ALT_TEXT_MAX_CHARS
+    assert payload["altText"].endswith("…")
+    # バブル内の値は切り詰めない（サイズの上限内のため）
+    assert payload["contents"]["body"]["contents"][0]["text"] == title
+    assert template.compactions == 1
+    FlexMessage.from_dict(payload)
+
+
+def test_alt_text_limit_is_split_between_slots():
+    def build():
+        return FlexMessage(
+            alt_text=f"{text_slot('a')} / {text_slot('b')}",
+            contents=FlexBubble(body=FlexBox(layout="vertical", contents=[FlexText(text="x")])),
+        )
+
+    template = FlexTemplate("test.alt", build)
+    payload = sent_json(template.render_message(a="a" * 2000, b="b" * 2000))
+    assert len(payload["altText"]) <= FLEX_ALT_TEXT_MAX_CHARS
+
+
+def test_file_handler_long_file_name_fits_limits():
+    handler = FileHandler(None)
+    info = {"file_name": "f" * 3000 + ".pdf", "file_size": 1024}
+    message = handler._create_file_flex_message(info, handler._analyze_file(info))
+
+    assert isinstance(message, PrecompiledMessage)
+    payload = sent_json(message)
+    assert len(payload["altText"]) <= FLEX_ALT_TEXT_MAX_CHARS
+    assert message.size <= FLEX_MESSAGE_MAX_BYTES
+
+
+def test_location_handler_long_title_fits_limits():
+    handler = LocationHandler(None)
+    info = {"title": "地" * 3000, "address": "住所" * 8000, "latitude": 35.6, "longitude": 139.7}
+    message = handler._create_location_flex_message(info, handler._analyze_location(info))
+
+    assert isinstance(message, PrecompiledMessage)
+    payload = sent_json(message)
+    assert len(payload["altText"]) <= FLEX_ALT_TEXT_MAX_CHARS
+    assert message.size <= FLEX_MESSAGE_MAX_BYTES
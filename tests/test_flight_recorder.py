@@ -0,0 +1,124 @@
+import json
+import uuid
+
+import pytest
+from linebot.v3.webhooks import Event
+
+from benchmarks import payloads
+from core.flight_recorder import MAX_ERROR_MESSAGE_LENGTH, FlightRecorder, redact_text
+
+USER_ID = "U" + uuid.uuid4().hex
+GROUP_ID = "C" + uuid.uuid4().hex
+ROOM_ID = "R" + uuid.uuid4().hex
+REPLY_TOKEN = uuid.uuid4().hex
+MESSAGE_TEXT = "連絡先は taro.yamada@example.com / 090-1234-5678 です"
+
+
+def make_event(source):
+    event = payloads.message_event(source)
+    event["replyToken"] = REPLY_TOKEN
+    event["message"]["text"] = MESSAGE_TEXT
+    return Event.from_dict(event)
+
+
+SOURCES = {
+    "user": {"type": "user", "userId": USER_ID},
+    "group": {"type": "group", "groupId": GROUP_ID, "userId": USER_ID},
+    "room": {"type": "room", "roomId": ROOM_ID, "userId": USER_ID},
+}
+
+
+def recorded_json(recorder):
+    return json.dumps(recorder.entries(), ensure_ascii=False)
+
+
+@pytest.mark.parametrize("source_type", SOURCES)
+def test_ids_and_reply_token_are_never_recorded_in_plain_text(source_type):
+    recorder = FlightRecorder()
+    event = make_event(SOURCES[source_type])
+    error = RuntimeError(
+        f"reply failed for {USER_ID} in {GROUP_ID}/{ROOM_ID}: "
+        f"Invalid reply token {REPLY_TOKEN} ({MESSAGE_TEXT})"
+    )
+
+    recorder.record(event, "text", {"total": 1.5}, error, api_calls=1)
+
+    text = recorded_json(recorder)
+    for secret in (USER_ID, GROUP_ID, ROOM_ID, REPLY_TOKEN, MESSAGE_TEXT):
+        assert secret not in text
+    (entry,) = recorder.entries()
+    assert entry["source_type"] == source_type
+    assert entry["message_type"] == "TextMessageContent"
+    assert entry["timings_ms"] == {"total": 1500.0}
+    assert entry["api_calls"] == 1
+
+
+def test_source_hash_is_stable_per_process_only():
+    recorder = FlightRecorder()
+    group_event = make_event(SOURCES["group"])
+    recorder.record(group_event, "text", {})
+    recorder.record(group_event, "text", {})
+
+    first, second = recorder.entries()
+    assert first["source_hash"] == second["source_hash"]
+    # グループのイベントはグループIDで識別（発言者のユーザーIDではない）
+    assert first["source_hash"] == recorder.anonymize(GROUP_ID)
+    assert first["source_hash"] != recorder.anonymize(USER_ID)
+    # 別プロセス（別の鍵）では同じIDでも一致しない
+    assert FlightRecorder().anonymize(GROUP_ID) != first["source_hash"]
+    assert recorder.anonymize(None) is None
+
+
+def test_redact_text_masks_personal_data_in_message_text():
+    redacted = redact_text(f"user {USER_ID} said: {MESSAGE_TEXT} token={REPLY_TOKEN}")
+
+    assert "taro.yamada@example.com" not in redacted
+    assert "090-1234-5678" not in redacted
+    assert USER_ID not in redacted and REPLY_TOKEN not in redacted
+    assert "[line-id]" in redacted
+    assert "[email]" in redacted
+    assert "[number]" in redacted
+    assert "[token]" in redacted
+
+
+def test_redact_text_truncates_long_messages():
+    redacted = redact_text("x " * MAX_ERROR_MESSAGE_LENGTH)
+    assert len(redacted) == MAX_ERROR_MESSAGE_LENGTH + len("...")
+    assert redacted.endswith("...")
+
+
+def test_ring_buffer_evicts_oldest_at_capacity():
+    recorder = FlightRecorder(capacity=3)
+    event = make_event(SOURCES["user"])
+    for index in range(5):
+        recorder.record(event, f"handler-{index}", {})
+
+    assert [entry["handler"] for entry in recorder.entries()] == [
+        "handler-4",
+        "handler-3",
+        "handler-2",
+    ]
+    assert [entry["handler"] for entry in recorder.entries(limit=1)] == ["handler-4"]
+    stats = recorder.get_stats()
+    assert (stats["size"], stats["recorded"], stats["overwritten"]) == (3, 5, 2)
+
+
+def test_should_record_slow_or_failed_only():
+    recorder = FlightRecorder(slow_threshold=1.0)
+    assert not recorder.should_record(0.5, failed=False)
+    assert recorder.should_record(0.5, failed=True)
+    assert recorder.should_record(1.0, failed=False)
+
+
+def test_dump_contains_only_redacted_entries(tmp_path):
+    recorder = FlightRecorder()
+    recorder.record(
+        make_event(SOURCES["group"]), "text", {}, RuntimeError(f"{USER_ID}: {MESSAGE_TEXT}")
+    )
+    path = tmp_path / "flight.json"
+
+    assert recorder.dump(str(path)) == 1
+    text = path.read_text(encoding="utf-8")
+    for secret in (USER_ID, GROUP_ID, REPLY_TOKEN, "taro.yamada@example.com", "090-1234-5678"):
+        assert secret not in text
+    assert json.loads(text)["stats"]["failed"] == 1
@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+from core.gazetteer import (
+    CITY_KINDS,
+    Gazetteer,
+    KDTree,
+    Place,
+    chord_to_km,
+    get_gazetteer,
+    haversine_km,
+    km_to_chord,
+    to_unit_vector,
+)
+
+
+def brute_force(places, latitude, longitude, k):
+    distances = sorted(haversine_km(latitude, longitude, p.latitude, p.longitude) for p in places)
+    return distances[:k]
+
+
+def random_points(rng, count):
+    return [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(count)]
+
+
+def test_chord_conversion_round_trip():
+    for km in (0.0, 0.5, 100.0, 5000.0, 20000.0):
+        assert chord_to_km(km_to_chord(km)) == pytest.approx(km, abs=1e-6)
+
+
+def test_chord_distance_matches_haversine():
+    tokyo, osaka = (35.6812, 139.7671), (34.7025, 135.4959)
+    a, b = to_unit_vector(*tokyo), to_unit_vector(*osaka)
+    chord = sum((x - y) ** 2 for x, y in zip(a, b)) ** 0.5
+    assert chord_to_km(chord) == pytest.approx(haversine_km(*tokyo, *osaka), rel=1e-9)
+    assert haversine_km(*tokyo, *osaka) == pytest.approx(403, abs=5)
+
+
+@pytest.mark.parametrize("k", [1, 5])
+def test_kdtree_matches_brute_force(k):
+    rng = random.Random(k)
+    points = [to_unit_vector(*point) for point in random_points(rng, 500)]
+    tree = KDTree(points)
+
+    for _ in range(200):
+        query = to_unit_vector(*random_points(rng, 1)[0])
+        expected = sorted(
+            sum((a - b) ** 2 for a, b in zip(point, query)) ** 0.5 for point in points
+        )[:k]
+        result = tree.query(query, k)
+        assert [distance for distance, _ in result] == pytest.approx(expected)
+        for distance, index in result:
+            actual = sum((a - b) ** 2 for a, b in zip(points[index], query)) ** 0.5
+            assert actual == pytest.approx(distance)
+
+
+def test_kdtree_max_distance_and_empty_tree():
+    tree = KDTree([to_unit_vector(0, 0), to_unit_vector(0, 10)])
+    query = to_unit_vector(0, 1)
+
+    assert [index for _, index in tree.query(query, 2, km_to_chord(200))] == [0]
+    assert tree.query(query, 1, km_to_chord(50)) == []
+    assert KDTree([]).query(query) == []
+    assert tree.query(query, 0) == []
+
+
+def test_kdtree_handles_antimeridian():
+    tree = KDTree([to_unit_vector(0, 179.9), to_unit_vector(0, 170)])
+    (_, index), = tree.query(to_unit_vector(0, -179.9))
+    assert index == 0
+
+
+def test_gazetteer_filters_by_kind():
+    places = [
+        Place("A市", "municipality", "X県", "A市", 35.0, 135.0),
+        Place("A駅", "station", "X県", "A市", 35.001, 135.0),
+        Place("B市", "municipality", "X県", "B市", 36.0, 135.0),
+    ]
+    gazetteer = Gazetteer(places)
+
+    place, distance = gazetteer.nearest_one(35.0, 135.0, CITY_KINDS)
+    assert place.name == "A市" and distance == pytest.approx(0, abs=1e-6)
+    assert gazetteer.nearest_one(35.5, 135.0, ("station",))[0].name == "A駅"
+    assert gazetteer.nearest_one(40.0, 135.0, ("station",), max_distance_km=3) is None
+    assert [p.name for p, _ in gazetteer.nearest(35.0, 135.0, k=3)] == ["A市", "A駅", "B市"]
+    assert gazetteer.nearest(35.0, 135.0, kinds=("landmark",)) == []
+    assert place.display_name == "X県A市"
+
+
+def test_bundled_gazetteer_matches_brute_force():
+    gazetteer = get_gazetteer()
+    stats = gazetteer.get_stats()["places"]
+    assert stats["municipality"] > 1700
+    assert stats["station"] > 9000
+
+    rng = random.Random(0)
+    cities = [place for place in gazetteer.places if place.kind in CITY_KINDS]
+    for _ in range(50):
+        latitude, longitude = rng.uniform(24, 46), rng.uniform(123, 146)
+        result = [distance for _, distance in gazetteer.nearest(latitude, longitude, 3, CITY_KINDS)]
+        assert result == pytest.approx(brute_force(cities, latitude, longitude, 3), abs=1e-6)
+
+
+def test_bundled_gazetteer_known_places():
+    gazetteer = get_gazetteer()
+
+    city, _ = gazetteer.nearest_one(35.6895, 139.6917, CITY_KINDS)  # 東京都庁付近
+    assert city.display_name == "東京都新宿区"
+    station, distance = gazetteer.nearest_one(35.681236, 139.767125, ("station",))
+    assert station.name == "東京駅" and distance < 0.5
@@ -0,0 +1,67 @@
+import pytest
+
+from core.histogram import (
+    BUCKET_COUNT,
+    MAX_TRACKABLE_US,
+    SUB_BUCKETS,
+    LatencyHistograms,
+    bucket_index,
+    bucket_upper_bound,
+)
+
+SAMPLE_VALUES = [0, 1, 15, 16, 17, 100, 1023, 1024, 65_537, 999_999, MAX_TRACKABLE_US]
+
+
+def test_small_values_have_exact_buckets():
+    for value in range(2 * SUB_BUCKETS):
+        assert bucket_index(value) == value
+        assert bucket_upper_bound(value) == value
+
+
+def test_buckets_are_contiguous_and_increasing():
+    for index in range(1, BUCKET_COUNT):
+        lower = bucket_upper_bound(index - 1) + 1
+        assert bucket_index(lower) == index
+        assert bucket_index(bucket_upper_bound(index)) == index
+
+
+@pytest.mark.parametrize("value", SAMPLE_VALUES)
+def test_value_is_within_bucket_relative_error(value):
+    upper = bucket_upper_bound(bucket_index(value))
+    assert value <= upper
+    assert upper - value <= max(0, value) / SUB_BUCKETS
+
+
+def test_values_over_max_go_to_last_bucket():
+    assert bucket_index(MAX_TRACKABLE_US) == BUCKET_COUNT - 1
+    assert bucket_index(MAX_TRACKABLE_US * 10) == BUCKET_COUNT - 1
+    assert bucket_index(-5) == 0
+
+
+def test_summary_percentiles():
+    histograms = LatencyHistograms(["handler"])
+    for ms in range(1, 101):
+        histograms.record("handler", ms / 1000)
+    histograms.record("unknown", 1.0)  # 未登録ラベルは無視
+
+    summary = histograms.summary()
+    assert list(summary) == ["handler"]
+    all_time = summary["handler"]["all_time"]
+    assert all_time["count"] == 100
+    assert all_time["max_ms"] == 100.0
+    assert all_time["mean_ms"] == 50.5
+    for percentile in (50, 90, 99):
+        value = all_time[f"p{percentile}_ms"]
+        assert percentile <= value <= percentile * (1 + 1 / SUB_BUCKETS)
+    assert summary["handler"]["10s"]["count"] == 100
+
+
+def test_export_buckets_is_cumulative():
+    histograms = LatencyHistograms(["handler"])
+    for seconds in (0.001, 0.004, 0.02, 2.0):
+        histograms.record("handler", seconds)
+
+    count, sum_us, cumulative = histograms.export_buckets([5_000, 50_000, 500_000])["handler"]
+    assert count == 4
+    assert sum_us == 2_025_000
+    assert cumulative == [2, 3, 3, 4]
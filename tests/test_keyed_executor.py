@@ -0,0 +1,157 @@
+import asyncio
+
+from core.keyed_executor import KeyedExecutor
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 5))
+
+
+def test_same_key_runs_in_order_and_keys_run_in_parallel():
+    async def scenario():
+        executor = KeyedExecutor(max_active_shards=4)
+        order = []
+        running = set()
+        peak = 0
+
+        async def job(key, index):
+            nonlocal peak
+            running.add(key)
+            peak = max(peak, len(running))
+            await asyncio.sleep(0.01)
+            running.discard(key)
+            order.append((key, index))
+
+        for index in range(3):
+            for key in ("a", "b"):
+                await executor.submit(key, job, key, index)
+        await executor.drain()
+        return order, peak, executor.get_stats()
+
+    order, peak, stats = run(scenario())
+    assert [index for key, index in order if key == "a"] == [0, 1, 2]
+    assert [index for key, index in order if key == "b"] == [0, 1, 2]
+    assert peak == 2
+    assert stats["completed_jobs"] == 6
+    assert stats["active_shards"] == 0
+
+
+def test_job_put_while_shard_finishes_is_not_lost():
+    async def scenario():
+        executor = KeyedExecutor(max_shard_depth=1)
+        done = []
+
+        async def job(name):
+            # await を挟まずに終わるジョブ（キューが空になった直後にシャードが解放される）
+            done.append(name)
+
+        await executor.submit("chat", job, "first")
+        # キューが満杯のため、2件目の投入はワーカーが1件目を取り出すまで待機する
+        await executor.submit("chat", job, "second")
+        await executor.drain()
+        return done, executor.get_stats()
+
+    done, stats = run(scenario())
+    assert done == ["first", "second"]
+    assert stats["completed_jobs"] == 2
+    assert stats["queued_jobs"] == 0
+
+
+def test_cancelled_blocked_submit_releases_shard():
+    async def scenario():
+        executor = KeyedExecutor(max_shard_depth=1)
+        release = asyncio.Event()
+        done = []
+
+        async def job(name):
+            await release.wait()
+            done.append(name)
+
+        await executor.submit("chat", job, "first")
+        await executor.submit("chat", job, "second")  # ワーカーが1件目を処理中のためキューに入る
+        blocked_submit = asyncio.create_task(executor.submit("chat", job, "third"))
+        await asyncio.sleep(0.01)
+        blocked_submit.cancel()
+        release.set()
+        await executor.drain()
+        return done, executor.get_stats()
+
+    done, stats = run(scenario())
+    assert done == ["first", "second"]
+    assert stats["active_shards"] == 0
+    assert stats["waiting_shards"] == 0
+
+
+def test_cancelled_first_submit_keeps_jobs_queued_by_others():
+    async def scenario():
+        executor = KeyedExecutor(max_active_shards=1)
+        release = asyncio.Event()
+        done = []
+
+        async def job(name):
+            await release.wait()
+            done.append(name)
+
+        await executor.submit("a", job, "busy")
+        first = asyncio.create_task(executor.submit("b", job, "job1"))
+        await asyncio.sleep(0.01)  # 空きスロット待ちでシャード b が未起動のまま
+        await executor.submit("b", job, "job2")  # 既存シャードのキューに入って正常終了
+        first.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        await executor.drain()
+        return done, executor.get_stats()
+
+    done, stats = run(scenario())
+    assert done == ["busy", "job2"]
+    assert stats["completed_jobs"] == 2
+    assert stats["submitted_jobs"] == 2
+    assert stats["active_shards"] == 0
+    assert stats["waiting_shards"] == 0
+
+
+def test_cancelled_first_submit_without_followers_discards_shard():
+    async def scenario():
+        executor = KeyedExecutor(max_active_shards=1)
+        release = asyncio.Event()
+        done = []
+
+        async def job(name):
+            await release.wait()
+            done.append(name)
+
+        await executor.submit("a", job, "busy")
+        first = asyncio.create_task(executor.submit("b", job, "job1"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0)
+        waiting = executor.get_stats()["waiting_shards"]
+        release.set()
+        await executor.drain()
+        return done, waiting
+
+    done, waiting = run(scenario())
+    assert done == ["busy"]
+    assert waiting == 0
+
+
+def test_failed_job_does_not_stop_shard():
+    async def scenario():
+        executor = KeyedExecutor()
+        done = []
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        async def ok():
+            done.append("ok")
+
+        await executor.submit("chat", failing)
+        await executor.submit("chat", ok)
+        await executor.drain()
+        return done, executor.get_stats()
+
+    done, stats = run(scenario())
+    assert done == ["ok"]
+    assert stats["failed_jobs"] == 1
+    assert stats["completed_jobs"] == 1
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from linebot.v3 import webhooks
+from linebot.v3.webhook import WebhookParser
+from linebot.v3.webhooks import FollowEvent, MessageEvent, PostbackEvent
+
+from benchmarks import payloads
+from core.lazy_parser import EVENT_TYPE_CLASS_NAMES, HandlerAwareParser
+
+SOURCE = {"type": "user", "userId": "U" + "0" * 32}
+
+EVENT_BUILDERS = [
+    payloads.message_event,
+    payloads.follow_event,
+    payloads.unfollow_event,
+    payloads.join_event,
+    payloads.leave_event,
+    payloads.member_joined_event,
+    payloads.member_left_event,
+    payloads.postback_event,
+    payloads.beacon_event,
+    payloads.unsend_event,
+    payloads.video_play_complete_event,
+    payloads.account_link_event,
+    payloads.activated_event,
+    payloads.membership_event,
+    payloads.delivery_event,
+]
+
+
+def all_event_classes():
+    return [getattr(webhooks, class_name) for class_name in EVENT_TYPE_CLASS_NAMES.values()]
+
+
+def test_mapping_names_existing_sdk_classes():
+    for type_value, class_name in EVENT_TYPE_CLASS_NAMES.items():
+        event_class = getattr(webhooks, class_name, None)
+        assert event_class is not None, type_value
+        assert issubclass(event_class, webhooks.Event)
+
+
+@pytest.mark.parametrize("build", EVENT_BUILDERS, ids=lambda build: build.__name__)
+def test_parses_same_class_as_sdk_parser(build):
+    body = payloads.build_body([build(SOURCE)])
+    sdk_events = WebhookParser("test", skip_signature_verification=lambda: True).parse(
+        body.decode(), ""
+    )
+
+    events = HandlerAwareParser(all_event_classes()).parse(body)
+
+    assert [type(event) for event in events] == [type(event) for event in sdk_events]
+    assert events[0].to_dict() == sdk_events[0].to_dict()
+
+
+def test_only_registered_types_are_built():
+    parser = HandlerAwareParser([MessageEvent, PostbackEvent])
+    body = payloads.build_body(
+        [
+            payloads.message_event(SOURCE),
+            payloads.follow_event(SOURCE),
+            payloads.postback_event(SOURCE),
+            {"type": "futureEvent"},
+        ]
+    )
+
+    events = parser.parse(body)
+
+    assert [type(event) for event in events] == [MessageEvent, PostbackEvent]
+    assert parser.unhandled_counts == {"follow": 1, "futureEvent": 1}
+    assert parser.get_stats()["handled_types"] == ["message", "postback"]
+
+
+def test_invalid_event_is_skipped():
+    parser = HandlerAwareParser([FollowEvent])
+    body = json.dumps({"destination": "U", "events": [{"type": "follow"}]}).encode()
+
+    assert parser.parse(body) == []
+    assert parser.invalid_events == 1
+
+
+def test_unknown_event_class_is_rejected():
+    class CustomEvent(webhooks.Event):
+        pass
+
+    with pytest.raises(ValueError, match="CustomEvent"):
+        HandlerAwareParser([MessageEvent, CustomEvent])
@@ -0,0 +1,58 @@
+import json
+import sys
+
+import pytest
+from linebot.v3.messaging import TextMessage
+
+from core.flex_templates import PrecompiledMessage
+from core.outbound import encode_request, push_request, reply_request, set_request_validation
+
+outbound = sys.modules["core.outbound"]
+
+FLEX = PrecompiledMessage.from_payload(
+    {
+        "type": "flex",
+        "altText": "alt",
+        "contents": {"type": "bubble", "body": {"type": "box", "layout": "vertical", "contents": []}},
+    }
+)
+
+
+@pytest.fixture(autouse=True)
+def restore_validation():
+    validate = outbound._validate_requests
+    yield
+    set_request_validation(validate)
+
+
+@pytest.mark.parametrize("notification_disabled", [None, True])
+def test_request_body_is_same_with_and_without_validation(notification_disabled):
+    bodies = []
+    for validate in (True, False):
+        set_request_validation(validate)
+        reply = reply_request(
+            reply_token="token",
+            messages=[TextMessage(text="hi"), FLEX],
+            notification_disabled=notification_disabled,
+        )
+        push = push_request(to="U1", messages=[FLEX], notification_disabled=notification_disabled)
+        bodies.append((json.loads(encode_request(reply)), json.loads(encode_request(push))))
+
+    assert bodies[0] == bodies[1]
+    reply_body, push_body = bodies[0]
+    assert reply_body["replyToken"] == "token"
+    assert reply_body["messages"][1] == FLEX.to_dict()
+    assert push_body["to"] == "U1"
+    assert reply_body["notificationDisabled"] == bool(notification_disabled)
+
+
+def test_validation_can_be_skipped():
+    messages = [TextMessage(text=str(index)) for index in range(6)]
+
+    set_request_validation(True)
+    with pytest.raises(ValueError):
+        reply_request(reply_token="token", messages=messages)
+
+    set_request_validation(False)
+    request = reply_request(reply_token="token", messages=messages)
+    assert len(request.messages) == 6
@@ -0,0 +1,231 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+from linebot.v3.messaging.exceptions import ApiException
+
+from core.rate_limiter import (
+    DEFAULT_RETRY_AFTER,
+    ApiRateLimiter,
+    RateLimitedMessagingApi,
+    TokenBucket,
+    parse_retry_after,
+)
+
+rate_limiter_module = sys.modules["core.rate_limiter"]
+
+
+class FakeClock:
+    """time.monotonic と asyncio.sleep の代わり（sleep は時計を進めるだけ）"""
+
+    def __init__(self, now=100.0):
+        self.now = now
+        self.sleeps = []
+        # sleep のたびに呼ばれるフック（待機中の429などの再現用）
+        self.on_sleep = None
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        if self.on_sleep is not None:
+            self.on_sleep(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(
+        rate_limiter_module,
+        "asyncio",
+        SimpleNamespace(sleep=clock.sleep, CancelledError=asyncio.CancelledError),
+    )
+    return clock
+
+
+def rate_limited_error(retry_after=None):
+    error = ApiException(status=429, reason="Too Many Requests")
+    error.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    return error
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("3", 3.0),
+        ("0.5", 0.5),
+        ("-1", 0.0),
+        (None, DEFAULT_RETRY_AFTER),
+        ("", DEFAULT_RETRY_AFTER),
+        ("Wed, 21 Oct 2015 07:28:00 GMT", DEFAULT_RETRY_AFTER),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_reservations_wait_in_arrival_order(clock):
+    bucket = TokenBucket(rate=10, burst=0.2)  # 2回分のバースト、0.1秒ごとに1トークン
+
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits == pytest.approx([0.0, 0.0, 0.1, 0.2, 0.3])
+
+    # 時間の経過で補充される（容量を超えては貯まらない）
+    clock.now += 10
+    assert bucket.reserve() == 0.0
+    assert bucket.tokens == pytest.approx(bucket.capacity - 1)
+
+
+def test_capacity_is_at_least_one_request(clock):
+    bucket = TokenBucket(rate=60 / 3600)  # 60回/時
+    assert bucket.capacity == 1.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(60.0)
+
+
+def test_refund_returns_reserved_token(clock):
+    bucket = TokenBucket(rate=1)
+    bucket.reserve()
+    assert bucket.reserve() == pytest.approx(1.0)
+    bucket.refund()
+    assert bucket.tokens == pytest.approx(0.0)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_block_delays_reservations(clock):
+    bucket = TokenBucket(rate=100)
+    bucket.block(5)
+    bucket.block(1)  # 短い方で上書きしない
+    assert bucket.reserve() == pytest.approx(5.0)
+    clock.now += 5
+    assert bucket.reserve() == 0.0
+
+
+def test_acquire_waits_for_token(clock):
+    limiter = ApiRateLimiter({"push": 1})
+    waits = []
+    limiter.on_wait = lambda endpoint, waited: waits.append((endpoint, waited))
+
+    async def scenario():
+        await limiter.acquire("push")
+        await limiter.acquire("push")
+
+    asyncio.run(scenario())
+    assert clock.sleeps == pytest.approx([1.0])
+    assert waits == [("push", 0.0), ("push", pytest.approx(1.0))]
+    stats = limiter.get_stats()["endpoints"]["push"]
+    assert (stats["acquired"], stats["waited"], stats["waiting"]) == (2, 1, 0)
+    assert stats["max_wait_ms"] == pytest.approx(1000.0)
+
+
+def test_acquire_refunds_token_when_cancelled(clock):
+    limiter = ApiRateLimiter({"push": 1})
+    bucket = limiter.buckets["push"]
+
+    def cancel(seconds):
+        raise asyncio.CancelledError
+
+    async def scenario():
+        await limiter.acquire("push")
+        clock.on_sleep = cancel
+        with pytest.raises(asyncio.CancelledError):
+            await limiter.acquire("push")
+
+    asyncio.run(scenario())
+    # キャンセルされた予約分は戻され、次の呼び出しの待ち時間に影響しない
+    assert bucket.tokens == pytest.approx(0.0)
+    assert limiter.get_stats()["endpoints"]["push"]["waiting"] == 0
+    assert limiter.get_stats()["endpoints"]["push"]["acquired"] == 1
+
+
+def test_block_during_wait_extends_it(clock):
+    limiter = ApiRateLimiter({"push": 1})
+
+    def rate_limited_once(seconds):
+        clock.on_sleep = None
+        limiter.rate_limited("push", 3)  # 待機を始めた時点から3秒
+
+    async def scenario():
+        await limiter.acquire("push")
+        clock.on_sleep = rate_limited_once
+        return await limiter.acquire("push")
+
+    started = clock.now
+    waited = asyncio.run(scenario())
+    assert clock.sleeps == pytest.approx([1.0, 2.0])
+    assert waited == pytest.approx(3.0)
+    assert clock.now == pytest.approx(started + 3.0)
+    assert limiter.get_stats()["endpoints"]["push"]["rate_limited"] == 1
+
+
+def test_unknown_endpoint_uses_scaled_default_limit(clock):
+    limiter = ApiRateLimiter({"push": 100}, default_limit=2000, scale=0.25)
+    assert limiter.buckets["push"].rate == 25
+    assert limiter.buckets["multicast"].rate == 50
+    assert limiter._bucket("profile").rate == 500
+
+
+class FakeApi:
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+        self.not_an_endpoint = "value"
+
+    async def push_message(self, request):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def get_bot_info(self):
+        return "bot"
+
+
+def test_429_is_retried_after_retry_after(clock):
+    limiter = ApiRateLimiter({"push": 100})
+    fake = FakeApi([rate_limited_error("2"), rate_limited_error(), "ok"])
+    api = RateLimitedMessagingApi(fake, limiter)
+
+    assert asyncio.run(api.push_message("request")) == "ok"
+    assert fake.calls == 3
+    # Retry-After の秒数、ヘッダーが無い場合は既定値だけ待ってから再送
+    assert clock.sleeps == pytest.approx([2.0, DEFAULT_RETRY_AFTER])
+    stats = limiter.get_stats()["endpoints"]["push"]
+    assert (stats["rate_limited"], stats["retried"]) == (2, 2)
+
+
+def test_429_retries_are_bounded(clock):
+    limiter = ApiRateLimiter({"push": 100}, max_rate_limited_retries=1)
+    fake = FakeApi([rate_limited_error("1"), rate_limited_error("1"), "ok"])
+    api = RateLimitedMessagingApi(fake, limiter)
+
+    with pytest.raises(ApiException) as excinfo:
+        asyncio.run(api.push_message("request"))
+    assert excinfo.value.status == 429
+    assert fake.calls == 2
+    assert limiter.get_stats()["endpoints"]["push"]["retried"] == 1
+
+
+def test_other_errors_are_not_retried(clock):
+    limiter = ApiRateLimiter()
+    fake = FakeApi([ApiException(status=500, reason="error"), "ok"])
+    api = RateLimitedMessagingApi(fake, limiter)
+
+    with pytest.raises(ApiException):
+        asyncio.run(api.push_message("request"))
+    assert fake.calls == 1
+    assert limiter.get_stats()["endpoints"]["push"]["rate_limited"] == 0
+
+
+def test_non_endpoint_attributes_are_delegated(clock):
+    limiter = ApiRateLimiter()
+    api = RateLimitedMessagingApi(FakeApi([]), limiter)
+
+    assert api.not_an_endpoint == "value"
+    assert asyncio.run(api.get_bot_info()) == "bot"
+    assert limiter.stats == {}
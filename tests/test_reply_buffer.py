@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+
+from linebot.v3.messaging import TextMessage
+
+from core.outbound import reply_request
+from core.reply_buffer import ReplyCoalescingMessagingApi
+
+
+class FakeApi:
+    def __init__(self):
+        self.replies = []
+        self.pushes = []
+
+    async def reply_message(self, request, **kwargs):
+        self.replies.append(request)
+
+    async def push_message(self, request, **kwargs):
+        self.pushes.append(request)
+
+
+def make_event(reply_token="token", user_id="U1"):
+    return SimpleNamespace(
+        reply_token=reply_token,
+        source=SimpleNamespace(user_id=user_id, group_id=None, room_id=None),
+    )
+
+
+def texts(request):
+    return [message.text for message in request.messages]
+
+
+def dispatch(api, event, replies):
+    """ハンドラーが replies の各リストを1回ずつ返信した場合の送信"""
+
+    async def run():
+        with api.buffer(event) as buffer:
+            for messages in replies:
+                await api.reply_message(
+                    reply_request(
+                        reply_token=event.reply_token,
+                        messages=[TextMessage(text=text) for text in messages],
+                    )
+                )
+            await api.flush(buffer)
+
+    asyncio.run(run())
+
+
+def test_replies_are_coalesced_into_one_request():
+    fake = FakeApi()
+    api = ReplyCoalescingMessagingApi(fake)
+
+    dispatch(api, make_event(), [["a"], ["b", "c"]])
+
+    assert [texts(request) for request in fake.replies] == [["a", "b", "c"]]
+    assert fake.pushes == []
+    assert api.get_stats()["requests_saved"] == 1
+
+
+def test_overflow_is_pushed_in_batches():
+    fake = FakeApi()
+    api = ReplyCoalescingMessagingApi(fake)
+
+    dispatch(api, make_event(), [[str(index)] for index in range(12)])
+
+    assert [texts(request) for request in fake.replies] == [["0", "1", "2", "3", "4"]]
+    assert [texts(request) for request in fake.pushes] == [
+        ["5", "6", "7", "8", "9"],
+        ["10", "11"],
+    ]
+    assert all(request.to == "U1" for request in fake.pushes)
+
+
+def test_overflow_without_push_target_is_dropped():
+    fake = FakeApi()
+    api = ReplyCoalescingMessagingApi(fake)
+
+    dispatch(api, make_event(user_id=None), [[str(index)] for index in range(7)])
+
+    assert len(fake.replies) == 1
+    assert api.get_stats()["dropped_messages"] == 2
+
+
+def test_disabled_sends_each_reply():
+    fake = FakeApi()
+    api = ReplyCoalescingMessagingApi(fake, enabled=False)
+
+    dispatch(api, make_event(), [["a"], ["b"]])
+
+    assert [texts(request) for request in fake.replies] == [["a"], ["b"]]
+
+
+def test_send_error_is_logged_not_raised():
+    class FailingApi(FakeApi):
+        async def reply_message(self, request, **kwargs):
+            raise RuntimeError("down")
+
+    api = ReplyCoalescingMessagingApi(FailingApi())
+
+    dispatch(api, make_event(), [["a"]])
+
+    assert api.get_stats()["flush_errors"] == 1
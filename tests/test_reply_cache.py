@@ -0,0 +1,95 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+from linebot.v3.messaging import TextMessage
+
+from core.flex_templates import PrecompiledMessage
+from core.reply_cache import RenderedReplyCache, message_size
+
+reply_cache_module = sys.modules["core.reply_cache"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(reply_cache_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def renderer(text):
+    calls = []
+
+    def render():
+        calls.append(text)
+        return TextMessage(text=text)
+
+    return render, calls
+
+
+def test_hit_returns_cached_message_without_rendering(clock):
+    cache = RenderedReplyCache()
+    render, calls = renderer("a")
+
+    first = cache.get_or_render("sticker", ("1", "2"), render)
+    second = cache.get_or_render("sticker", ("1", "2"), render)
+
+    assert second is first
+    assert calls == ["a"]
+    stats = cache.get_stats()["namespaces"]["sticker"]
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_namespaces_do_not_share_entries(clock):
+    cache = RenderedReplyCache()
+    cache.get_or_render("file", "key", renderer("file")[0])
+    message = cache.get_or_render("location", "key", renderer("location")[0])
+    assert message.text == "location"
+
+
+def test_expired_entry_is_rendered_again(clock):
+    cache = RenderedReplyCache(ttl=10)
+    render, calls = renderer("a")
+    cache.get_or_render("file", "key", render)
+    clock.now += 10
+    cache.get_or_render("file", "key", render)
+
+    assert len(calls) == 2
+    assert cache.get_stats()["namespaces"]["file"]["expired"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = RenderedReplyCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.get_or_render("file", key, renderer(key)[0])
+    cache.get_or_render("file", "a", renderer("a")[0])  # a を最近使用に
+    cache.get_or_render("file", "c", renderer("c")[0])
+
+    render_b, calls = renderer("b")
+    cache.get_or_render("file", "b", render_b)
+    assert calls == ["b"]
+    assert cache.get_stats()["namespaces"]["file"]["evicted"] >= 1
+
+
+def test_byte_limit(clock):
+    message = PrecompiledMessage.from_payload({"type": "text", "text": "x" * 100})
+    cache = RenderedReplyCache(max_bytes=message_size(message) * 2)
+
+    for key in range(3):
+        cache.get_or_render("file", key, lambda: message)
+    assert cache.get_stats()["entries"] == 2
+    assert cache.get_stats()["payload_bytes"] <= cache.max_bytes
+
+    cache.configure(max_bytes=10)
+    cache.get_or_render("file", "large", lambda: message)
+    stats = cache.get_stats()
+    assert stats["entries"] == 0
+    assert stats["namespaces"]["file"]["uncacheable"] == 1
+
+
+def test_disabled_cache_always_renders(clock):
+    cache = RenderedReplyCache(enabled=False)
+    render, calls = renderer("a")
+    cache.get_or_render("file", "key", render)
+    cache.get_or_render("file", "key", render)
+    assert len(calls) == 2
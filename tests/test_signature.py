@@ -0,0 +1,51 @@
+import base64
+
+import pytest
+from linebot.v3.webhook import SignatureValidator
+
+from benchmarks.payloads import build_body, sign_body
+from core.signature import SignatureVerifier
+
+SECRET = "channel-secret"
+
+
+@pytest.fixture
+def body():
+    return build_body([{"type": "follow", "text": "日本語"}])
+
+
+def test_accepts_signature_computed_by_sdk(body):
+    verifier = SignatureVerifier(SECRET)
+    signature = sign_body(body, SECRET)
+
+    assert SignatureValidator(SECRET).validate(body.decode(), signature)
+    assert verifier.verify(body, signature)
+    # 鍵付けしたHMACを使い回しても毎回同じ結果になる
+    assert verifier.verify(body, signature)
+    assert verifier.get_stats()["verified"] == 2
+
+
+@pytest.mark.parametrize(
+    "signature",
+    [
+        None,
+        "",
+        "not base64!",
+        base64.b64encode(b"short").decode(),
+        sign_body(b"other body", SECRET),
+        sign_body(b"", "other-secret"),
+    ],
+)
+def test_rejects_invalid_signature(body, signature):
+    verifier = SignatureVerifier(SECRET)
+
+    assert not verifier.verify(body, signature)
+    assert verifier.get_stats()["rejected"] == 1
+
+
+def test_rejects_modified_body(body):
+    verifier = SignatureVerifier(SECRET)
+    signature = sign_body(body, SECRET)
+
+    assert not verifier.verify(body + b" ", signature)
+    assert not SignatureVerifier("other-secret").verify(body, signature)
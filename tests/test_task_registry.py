@@ -0,0 +1,147 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+from linebot.v3.webhooks import Event
+
+from benchmarks import payloads
+from core.task_registry import EventDeadlineExceeded, TaskRegistry
+
+task_registry_module = sys.modules["core.task_registry"]
+
+SOURCE = {"type": "user", "userId": "U" + "0" * 32}
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=NOW)
+    monkeypatch.setattr(task_registry_module, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def make_event(builder=payloads.message_event, age=0.0):
+    event = builder(SOURCE)
+    event["timestamp"] = int((NOW - age) * 1000)
+    return Event.from_dict(event)
+
+
+def test_deadline_is_remaining_reply_token_lifetime(clock):
+    registry = TaskRegistry(reply_token_ttl=60, default_timeout=30, min_timeout=1)
+
+    assert registry.deadline_for(make_event()) == pytest.approx(60)
+    assert registry.deadline_for(make_event(age=45)) == pytest.approx(15)
+
+
+def test_min_timeout_is_applied_to_stale_events(clock):
+    registry = TaskRegistry(reply_token_ttl=60, min_timeout=2)
+
+    # 再送などでリプライトークンの期限を過ぎたイベントにも最低限の時間は与える
+    assert registry.deadline_for(make_event(age=59.5)) == 2
+    assert registry.deadline_for(make_event(age=600)) == 2
+
+
+def test_events_without_reply_token_use_default_timeout(clock):
+    registry = TaskRegistry(reply_token_ttl=60, default_timeout=30)
+
+    assert registry.deadline_for(make_event(payloads.unfollow_event, age=600)) == 30
+    assert registry.deadline_for(make_event(payloads.leave_event)) == 30
+
+
+def test_handler_past_deadline_is_cancelled():
+    registry = TaskRegistry()
+    observed = []
+
+    async def slow_handler():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            observed.append("cancelled")
+            raise
+
+    async def scenario():
+        with pytest.raises(EventDeadlineExceeded):
+            await registry.run(slow_handler(), "TextHandler", timeout=0.01)
+
+    asyncio.run(scenario())
+    assert observed == ["cancelled"]
+    stats = registry.get_stats()
+    assert stats["timeouts_by_handler"] == {"TextHandler": 1}
+    assert stats["timeouts_total"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["completed"] == 0
+
+
+def test_handler_within_deadline_returns_result():
+    registry = TaskRegistry()
+
+    async def handler():
+        return "done"
+
+    assert asyncio.run(registry.run(handler(), "TextHandler", timeout=1)) == "done"
+    assert registry.get_stats()["completed"] == 1
+
+
+def test_handler_errors_propagate():
+    registry = TaskRegistry()
+
+    async def failing():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(registry.run(failing(), "TextHandler", timeout=1))
+    assert registry.in_flight == 0
+
+
+def test_cancel_all_cancels_in_flight_work():
+    registry = TaskRegistry()
+    observed = []
+
+    async def handler(name):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            observed.append(name)
+            raise
+
+    async def scenario():
+        runs = [
+            asyncio.create_task(registry.run(handler(name), "TextHandler", timeout=10))
+            for name in ("a", "b")
+        ]
+        await asyncio.sleep(0.01)
+        in_flight = registry.in_flight
+        cancelled = await registry.cancel_all()
+        results = await asyncio.gather(*runs, return_exceptions=True)
+        return in_flight, cancelled, results
+
+    in_flight, cancelled, results = asyncio.run(scenario())
+    assert (in_flight, cancelled) == (2, 2)
+    assert sorted(observed) == ["a", "b"]
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert registry.in_flight == 0
+    assert registry.get_stats()["cancelled"] == 2
+
+
+def test_cancelling_caller_cancels_handler():
+    registry = TaskRegistry()
+    observed = []
+
+    async def handler():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            observed.append("cancelled")
+            raise
+
+    async def scenario():
+        run = asyncio.create_task(registry.run(handler(), "TextHandler", timeout=10))
+        await asyncio.sleep(0.01)
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert observed == ["cancelled"]
+    assert registry.in_flight == 0